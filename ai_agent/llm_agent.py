@@ -6,40 +6,61 @@
         # "browser_click", "params": {"ref": 123, "element": "description"}})
     # Parse LLM response to extract JSON action
 
-# Imports the load_dotenv function from the python-dotenv package, which reads
-# environment variables from a .env file.
-from dotenv import load_dotenv
 # Imports the standard os module, providing functions to interact with the
 # operating system, such as reading environment variables.
 import os
 # Imports the standard json module, enabling conversion between Python
 # objects and JSON strings.
 import json
-# Imports the Client class from the xai_sdk package, used to interact
-# with the xAI API or service.
-from xai_sdk import Client
+# Imports the standard sys module, used below to make the shared playwright_demo
+# code importable from this folder.
+import sys
+# Absolute path of playwright_demo, found from this file's location so the
+# agent can be started from any working directory (python ai_agent/main.py).
+PLAYWRIGHT_DEMO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'playwright_demo')
+PLAYWRIGHT_DEMO_DIR = os.path.normpath(PLAYWRIGHT_DEMO_DIR)
+if PLAYWRIGHT_DEMO_DIR not in sys.path:
+    sys.path.append(PLAYWRIGHT_DEMO_DIR)
+# Imports the provider-agnostic backend factory shared with playwright_demo, so
+# this agent and the Orchestrator talk to LLMs through the same interface.
+from src.ai.llm_backend import create_backend
+# Imports the tolerant JSON extractor, which pulls the first JSON object out of
+# a response even when it is wrapped in code fences/prose or single-quoted.
+from src.ai.response_parser import extract_json
 
-# Load xAI API key
-load_dotenv()
-api_key = os.getenv("XAI_API_KEY")
+# The backend (and the SDK behind it) is created on the first query instead of at import time, so importing this
+# file stays fast and works without an API key or the xai_sdk package installed
+_backend = None
 
-# Initialize Grok client
-client = Client(api_key=api_key)
+def get_backend():
+    # Load xAI API key and initialize Grok backend (set LLM_BACKEND=local to run without network access)
+    global _backend
+    if _backend is None:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _backend = create_backend(
+            os.getenv("LLM_BACKEND", "xai"),
+            model="grok-4-fast-reasoning",
+            max_tokens=150
+        )
+    return _backend
+
+# Params each method needs, matching the helpers in mcp_client.py
+METHOD_PARAMS = {
+    "browser_click": ("ref", "element"),
+    "browser_type": ("ref", "element", "text"),
+    "browser_navigate": ("url",),
+}
 
 def query_llm(goal, snapshot):
     # Query LLM with user goal and page snapshot, return JSON action
     # Variable prompt is assigned an f-string that formats a structured instruction
     # containing the goal, a JSON-encoded snapshot, and a directive to output the next
     # action as JSON with method (string) and params (dictionary).
-    prompt = f"Goal: {goal}\nSnapshot: {json.dumps(snapshot)}\nOutput next action as JSON: {{'method': str, 'params': dict}}"
+    prompt = f'Goal: {goal}\nSnapshot: {json.dumps(snapshot)}\nOutput next action as JSON only, e.g. {{"method": "browser_click", "params": {{"ref": "e26", "element": "description"}}}}'
     try:
-        response = client.chat.completions.create(
-            model="grok-4-fast-reasoning",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=150
-        )
-        raw_content = response.choices[0].message.content
-        action = json.loads(raw_content)
+        raw_content = get_backend().complete(prompt)
+        action = extract_json(raw_content)
         return validate_llm_action(action)
     except Exception as e:
         print(f"LLM query failed: {e}")
@@ -54,4 +75,16 @@ def validate_llm_action(action):
     if "method" not in action or "params" not in action:
         print("Invalid action: missing 'method' or 'params'")
         return None
+    # Check the params match what main.py will unpack into the MCP helper
+    required = METHOD_PARAMS.get(action["method"])
+    if required is None:
+        print(f"Invalid action: unknown method '{action['method']}'")
+        return None
+    if not isinstance(action["params"], dict):
+        print("Invalid action: 'params' is not a dictionary")
+        return None
+    missing = [name for name in required if name not in action["params"]]
+    if missing:
+        print(f"Invalid action: {action['method']} missing {', '.join(missing)}")
+        return None
     return action
\ No newline at end of file
@@ -1,37 +1,119 @@
 import subprocess
 import time
-import requests
 import json
-from playwright.sync_api import sync_playwright
+import os
+import sys
+import socket
+import tempfile
+# playwright and requests are imported inside the functions that use them, so importing this file (or running a
+# short command) doesn't pay for loading them
 from mcp_client import browser_navigate, browser_snapshot, browser_click, browser_type
 from llm_agent import query_llm
+# Shared load profiles (full / no-media / text-only) from playwright_demo, importing llm_agent above already put
+# playwright_demo on sys.path (by absolute path, so this works from any working directory)
+from src.browser.load_profile import get_load_profile, apply_to_context, mcp_server_args, chromium_launch_args
 
-def start_mcp_server(port=8931):
+# The one Chromium this process uses. launch_browser() fills it in, the MCP server attaches to the same browser
+# through "cdp_endpoint", and cleanup() tears it down once.
+SHARED_BROWSER = {}
+
+def start_mcp_server(port=8931, load_profile=None, cdp_endpoint=None):
     # Use npm exec (works on Windows, avoids npx.ps1)
     import shutil
     npm = shutil.which("npm")
     if not npm:
         raise RuntimeError("npm not found. Verify Node.js installation.")
     
+    # Flags that make the MCP browser skip images/media/trackers for this profile
+    profile = get_load_profile(load_profile)
+    command = [npm, "exec", "--", "@playwright/mcp@latest", "--port", str(port)] + mcp_server_args(profile)
+    # Attach to the shared browser instead of letting the server start its own
+    cdp_endpoint = cdp_endpoint or SHARED_BROWSER.get("cdp_endpoint")
+    if cdp_endpoint:
+        command += ["--cdp-endpoint", cdp_endpoint]
     process = subprocess.Popen(
-        [npm, "exec", "--", "@playwright/mcp@latest", "--port", str(port)],
+        command,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE
     )
     time.sleep(8)
-    print(f"MCP server started on port {port}")
+    print(f"MCP server started on port {port} (load profile: {profile['name']})")
     return process
 
-def launch_browser():
+def _free_port():
+    # Ask the OS for an unused local port for the DevTools endpoint
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _wait_for_cdp(endpoint, timeout=15):
+    # Chromium takes a moment to open its DevTools port, poll until it answers
+    import requests
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{endpoint}/json/version", timeout=1).ok:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    return False
+
+def launch_browser(load_profile=None, headless=None):
+    # Only one browser per process: later calls get the same handles back
+    if SHARED_BROWSER:
+        print("Reusing shared browser")
+        return (SHARED_BROWSER["playwright"], SHARED_BROWSER["browser"],
+                SHARED_BROWSER["context"], SHARED_BROWSER["page"])
+
+    # Headless unless HEADLESS=0 is set (handy for watching a run)
+    if headless is None:
+        headless = os.getenv("HEADLESS", "1") != "0"
+    profile = get_load_profile(load_profile)
+
+    from playwright.sync_api import sync_playwright
     playwright = sync_playwright().start()
-    browser = playwright.chromium.launch(headless=False)
+    # Start Chromium ourselves with a DevTools port so every client (this script, the MCP server, server.js) can
+    # attach to this one process instead of each launching its own browser
+    port = int(os.getenv("CDP_PORT", _free_port()))
+    cdp_endpoint = f"http://127.0.0.1:{port}"
+    chrome_args = [
+        playwright.chromium.executable_path,
+        f"--remote-debugging-port={port}",
+        f"--user-data-dir={tempfile.mkdtemp(prefix='ai-agent-chrome-')}",
+        "--no-first-run",
+        "--no-default-browser-check",
+    ] + chromium_launch_args(profile)
+    if headless:
+        chrome_args.append("--headless=new")
+    chrome_process = subprocess.Popen(chrome_args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    if not _wait_for_cdp(cdp_endpoint):
+        chrome_process.terminate()
+        playwright.stop()
+        raise RuntimeError(f"Chromium did not open DevTools endpoint {cdp_endpoint}")
+
+    browser = playwright.chromium.connect_over_cdp(cdp_endpoint)
     context = browser.new_context(
         viewport={"width": 1366, "height": 900},
         locale="en-US",
         timezone_id="UTC"
     )
+    # Block the resource types / hosts the profile says we don't need
+    apply_to_context(context, profile)
     page = context.new_page()
-    print("Browser launched")
+
+    # Child processes started after this (server.js reads CDP_ENDPOINT) attach to the same browser
+    os.environ["CDP_ENDPOINT"] = cdp_endpoint
+    SHARED_BROWSER.update({
+        "playwright": playwright,
+        "browser": browser,
+        "context": context,
+        "page": page,
+        "process": chrome_process,
+        "cdp_endpoint": cdp_endpoint,
+    })
+    print(f"Browser launched ({'headless' if headless else 'headful'}, load profile: {profile['name']}, CDP: {cdp_endpoint})")
     return playwright, browser, context, page
 
 def is_goal_complete(goal, snapshot):
@@ -40,14 +122,27 @@ def is_goal_complete(goal, snapshot):
     return any(keyword in page_text for keyword in goal_lower.split())
 
 def cleanup(mcp_process, playwright, browser):
+    # Safe to call more than once, the shared browser is only torn down the first time
+    if mcp_process and mcp_process.poll() is None:
+        mcp_process.terminate()
+    if not SHARED_BROWSER:
+        return
     browser.close()
     playwright.stop()
-    mcp_process.terminate()
+    # browser.close() only disconnects a CDP connection, stop the Chromium process itself too
+    chrome_process = SHARED_BROWSER["process"]
+    chrome_process.terminate()
+    try:
+        chrome_process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        chrome_process.kill()
+    SHARED_BROWSER.clear()
     print("Cleanup complete")
 
 def main():
-    mcp_process = start_mcp_server()
+    # Browser first, so the MCP server can attach to it instead of starting a second one
     playwright, browser, context, page = launch_browser()
+    mcp_process = start_mcp_server(cdp_endpoint=SHARED_BROWSER["cdp_endpoint"])
 
     # NEW LINE
     from mcp_client import initialize_mcp
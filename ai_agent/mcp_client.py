@@ -5,7 +5,6 @@
         # http://localhost:8931/mcp.
     # Parse responses and handle errors
 
-import requests  # Enables HTTP requests to communicate with MCP server at http://localhost:8931/mcp
 import json      # Handles parsing and formatting JSON data for MCP requests and responses
 
 # method represents the actions that the client tells the mcp server what to do
@@ -60,6 +59,9 @@ def send_mcp_request(method: str, params: dict | None = None):
     print(f"URL: {url}")
     print(f"Payload: {payload}")   # Now shows jsonrpc and id
     print(f"Headers: {headers}")
+    # Enables HTTP requests to communicate with MCP server at http://localhost:8931/mcp (imported on first use, it's
+    # the slowest import of the agent)
+    import requests
     try:
         response = requests.post(url, json=payload, headers=headers, timeout=10)
         print(f"Status: {response.status_code}")
@@ -7,6 +7,41 @@ const app = express();
 app.use(bodyParser.json());
 
 let browser, page;
+// true when server.js started the browser itself (then it also has to close it)
+let ownsBrowser = false;
+
+// One browser per server process. Attach to the shared Chromium over CDP when CDP_ENDPOINT is set
+// (ai_agent/main.py launch_browser starts it), otherwise launch a headless one (HEADLESS=0 to watch).
+// Repeated "initialize" calls reuse the same browser and page instead of launching another.
+async function getPage() {
+  if (!browser || !browser.isConnected()) {
+    if (process.env.CDP_ENDPOINT) {
+      browser = await chromium.connectOverCDP(process.env.CDP_ENDPOINT);
+      ownsBrowser = false;
+    } else {
+      browser = await chromium.launch({ headless: process.env.HEADLESS !== "0" });
+      ownsBrowser = true;
+    }
+    page = null;
+  }
+  if (!page || page.isClosed()) {
+    const context = browser.contexts()[0] || (await browser.newContext());
+    page = await context.newPage();
+  }
+  return page;
+}
+
+// Close (or just disconnect from) the browser once when the server stops.
+async function shutdown() {
+  if (browser) {
+    // close() on a CDP connection only disconnects, the shared browser keeps running for its owner
+    await browser.close().catch(() => {});
+    browser = null;
+  }
+  process.exit(0);
+}
+process.on("SIGINT", shutdown);
+process.on("SIGTERM", shutdown);
 
 app.post("/mcp", async (req, res) => {
   const { method, params, id } = req.body;
@@ -14,17 +49,15 @@ app.post("/mcp", async (req, res) => {
   try {
     switch (method) {
       case "initialize":
-        browser = await chromium.launch({ headless: false });
-        const context = await browser.newContext();
-        page = await context.newPage();
-        return res.json({ jsonrpc: "2.0", result: { status: "initialized" }, id });
+        await getPage();
+        return res.json({ jsonrpc: "2.0", result: { status: "initialized", sharedBrowser: !ownsBrowser }, id });
 
       case "browser_navigate":
-        await page.goto(params.url);
+        await (await getPage()).goto(params.url);
         return res.json({ jsonrpc: "2.0", result: { ok: true }, id });
 
       case "browser_snapshot":
-        const elements = await page.evaluate(() =>
+        const elements = await (await getPage()).evaluate(() =>
           Array.from(document.querySelectorAll("*")).map((el, i) => ({
             ref: i,
             text: el.innerText,
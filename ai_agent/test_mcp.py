@@ -4,8 +4,9 @@ from mcp_client import browser_navigate
 import time
 
 print("Starting MCP + Browser...")
-mcp_proc = start_mcp_server()
 pw, browser, ctx, page = launch_browser()
+# The MCP server attaches to the browser launched above
+mcp_proc = start_mcp_server()
 
 time.sleep(3)  # Wait for server
 
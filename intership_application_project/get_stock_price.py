@@ -1,22 +1,168 @@
 # Import necessary libraries
 # sync_playwright: Provides synchronous Playwright API to control a web browser.
-# Exception class for handling timeout errors in Playwright operations.
+# Exception class for handling timeout errors in Playwright operations (shared by the sync and async APIs).
 from playwright.sync_api import sync_playwright, TimeoutError
+# async_playwright: asyncio version of the Playwright API, lets one browser work on many pages at the same time.
+from playwright.async_api import async_playwright
 # datetime: Class for handling dates and times.
 # timedelta: Class for representing duration or difference between dates/times.
 from datetime import datetime, timedelta
+# asyncio: runs the per-ticker page loads concurrently.
+import asyncio
+# sys: read tickers from the command line.
+import sys
+# os: read the LOAD_PROFILE environment variable.
+import os
+# time: per-ticker timing.
+import time
+# Holiday-aware NYSE calendar and the persistent (ticker, trading day) quote cache.
+from trading_calendar import current_session, previous_trading_day
+from quote_cache import QuoteCache
+
+# Yahoo Finance quote page, {ticker} is filled in per symbol.
+QUOTE_URL = "https://finance.yahoo.com/quote/{ticker}/"
+# Container that holds the quote statistics, and the previous close field inside it.
+CONTAINER_SELECTOR = 'section.quote-statistics-container'
+PRICE_SELECTOR = f'{CONTAINER_SELECTOR} fin-streamer[data-field="regularMarketPreviousClose"]'
+
+# Page-load profiles: what each run blocks and how long page.goto waits. We only read one text field, so anything
+# visual is wasted bandwidth ("full" loads everything like a normal browser).
+LOAD_PROFILES = {
+    "full": {"blocked_resource_types": set(), "block_ads": False, "wait_until": "load"},
+    "no-media": {"blocked_resource_types": {"image", "font", "media"}, "block_ads": True,
+                 "wait_until": "domcontentloaded"},
+    "text-only": {"blocked_resource_types": {"image", "font", "media", "stylesheet"}, "block_ads": True,
+                  "wait_until": "domcontentloaded"},
+}
+DEFAULT_PROFILE = "no-media"
+# Ad/tracker hosts that Yahoo pages pull in (matched as substrings of the request URL).
+BLOCKED_DOMAINS = (
+    "doubleclick.net",
+    "googlesyndication.com",
+    "googletagservices.com",
+    "google-analytics.com",
+    "amazon-adsystem.com",
+    "adservice.google.com",
+    "scorecardresearch.com",
+    "taboola.com",
+    "outbrain.com",
+    "criteo.com",
+    "yieldmo.com",
+)
 
 # Function to determine the last trading day
-def get_last_trading_day():
-    today = datetime.now()
-    if today.weekday() == 6:  # Sunday
-        return today - timedelta(days=2)  # Friday
-    elif today.weekday() == 0:  # Monday
-        return today - timedelta(days=3)  # Friday
-    return today - timedelta(days=1)  # Yesterday
+# Yahoo's "Previous Close" is the close of the session before the latest one that has started, weekends and NYSE
+# holidays skipped. This is also the trading day cached quotes are keyed on.
+def get_last_trading_day(now=None):
+    return previous_trading_day(current_session(now))
+
+# True if the load profile says this request isn't needed.
+def should_block(profile, request):
+    if request.resource_type in profile["blocked_resource_types"]:
+        return True
+    return profile["block_ads"] and any(domain in request.url for domain in BLOCKED_DOMAINS)
+
+# Async route handler (batch mode): abort requests we don't need, let everything else through.
+async def block_heavy_resources(route, profile):
+    if should_block(profile, route.request):
+        await route.abort()
+    else:
+        await route.continue_()
+
+# Same thing for the synchronous API (fetch_spy_close).
+def block_heavy_resources_sync(route, profile):
+    if should_block(profile, route.request):
+        route.abort()
+    else:
+        route.continue_()
+
+# Fetch one ticker's previous close in its own browser context (own cookies/cache, runs in parallel with the rest).
+# Returns a dictionary: {"ticker", "close" (float or None), "text" (as shown on the page), "error", "seconds"}
+async def fetch_close(browser, ticker, semaphore, timeout_ms=20000, profile=LOAD_PROFILES[DEFAULT_PROFILE]):
+    # The semaphore caps how many pages are open at once.
+    async with semaphore:
+        start = time.perf_counter()
+        result = {"ticker": ticker, "close": None, "text": None, "error": None, "seconds": None}
+        context = await browser.new_context()
+        # Every request from this context goes through block_heavy_resources first.
+        if profile["blocked_resource_types"] or profile["block_ads"]:
+            await context.route("**/*", lambda route: block_heavy_resources(route, profile))
+        page = await context.new_page()
+
+        try:
+            # Yahoo writes class tickers with a dash (BRK.B -> BRK-B).
+            url = QUOTE_URL.format(ticker=ticker.upper().replace(".", "-"))
+            # The HTML is all we need, don't wait for every script/ad to finish loading (unless profile is "full").
+            await page.goto(url, wait_until=profile["wait_until"], timeout=timeout_ms)
+
+            price_element = page.locator(PRICE_SELECTOR)
+            # "attached" is enough, we only read the text (no need to wait for layout/visibility).
+            await price_element.first.wait_for(state="attached", timeout=timeout_ms)
+            text = (await price_element.first.inner_text()).strip()
+            result["text"] = text
+            result["close"] = float(text.replace(",", ""))
+
+        except TimeoutError:
+            result["error"] = "Page took too long to load or element not found."
+        except Exception as e:
+            result["error"] = str(e).splitlines()[0] if str(e) else type(e).__name__
+        finally:
+            await context.close()
+            result["seconds"] = round(time.perf_counter() - start, 3)
+
+        return result
+
+# Batch version: one browser, up to `concurrency` tickers loading at the same time.
+async def fetch_closes_async(tickers, concurrency=8, timeout_ms=20000, profile=DEFAULT_PROFILE):
+    profile = LOAD_PROFILES[profile]
+    semaphore = asyncio.Semaphore(concurrency)
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            # gather keeps the results in the same order as tickers.
+            return await asyncio.gather(*(fetch_close(browser, ticker, semaphore, timeout_ms, profile) for ticker in tickers))
+        finally:
+            await browser.close()
+
+# Synchronous entry point, e.g. fetch_closes(["SPY", "QQQ", "AAPL"], concurrency=10)
+# With a cache, tickers already stored for this trading day are served from it (no browser started if they all
+# are) and fresh successful scrapes are written back. Results have an extra "cached" key either way.
+def fetch_closes(tickers, concurrency=8, timeout_ms=20000, cache=None, trading_day=None, profile=DEFAULT_PROFILE):
+    tickers = [ticker.upper() for ticker in tickers]
+    trading_day = trading_day or get_last_trading_day()
+    cached = cache.get_many(tickers, trading_day) if cache else {}
+
+    # Only scrape what the cache didn't have (each ticker once, even if listed twice).
+    to_fetch = list(dict.fromkeys(ticker for ticker in tickers if ticker not in cached))
+    fetched = {}
+    if to_fetch:
+        for result in asyncio.run(fetch_closes_async(to_fetch, concurrency=concurrency, timeout_ms=timeout_ms,
+                                                     profile=profile)):
+            result["cached"] = False
+            fetched[result["ticker"]] = result
+            if cache and result["close"] is not None:
+                cache.put(result["ticker"], trading_day, result["close"], result["text"])
+
+    results = []
+    for ticker in tickers:
+        if ticker in cached:
+            quote = cached[ticker]
+            results.append({"ticker": ticker, "close": quote["close"], "text": quote["text"], "error": None,
+                            "seconds": 0.0, "cached": True})
+        else:
+            results.append(fetched[ticker])
+    return results
 
 # Main function to fetch SPY's last closing price
-def fetch_spy_close():
+def fetch_spy_close(cache=None, profile=DEFAULT_PROFILE):
+    # A close never changes after its trading day, so check the cache before starting a browser.
+    trading_day = get_last_trading_day()
+    cache = cache or QuoteCache()
+    cached = cache.get("SPY", trading_day)
+    if cached:
+        print(f"Spy's last closing price was: ${cached['text']} (cached)")
+        return
+
     # Initializes a Playwright instance using sync_playwright() for synchronous browser control.
     # 'with' ensures the Playwright instance is properly managed (e.g., resources are cleaned up after use).
     # as p assigns the Playwright instance to the variable p for use within the block.
@@ -27,13 +173,18 @@ def fetch_spy_close():
         # Variable page is assigned to a new browser page (tab) created by the browser instance for 
         # interacting with a web page.
         page = browser.new_page()
+        # Skip images/fonts/media/ads according to the load profile.
+        load_profile = LOAD_PROFILES[profile]
+        if load_profile["blocked_resource_types"] or load_profile["block_ads"]:
+            page.route("**/*", lambda route: block_heavy_resources_sync(route, load_profile))
 
         try:
             # The variable page, a Playwright page object, uses its goto method to navigate to the 
             # URL https://finance.yahoo.com/quote/SPY/, 
             # with timeout=30000 setting a 30-second limit (in milliseconds) for loading, raising a 
             # TimeoutError if exceeded.
-            page.goto("https://finance.yahoo.com/quote/SPY/", timeout=60000)
+            # wait_until comes from the load profile: "domcontentloaded" doesn't wait for every ad and script.
+            page.goto("https://finance.yahoo.com/quote/SPY/", timeout=60000, wait_until=load_profile["wait_until"])
 
             # to speed things up lets select the right container
             # A CSS selector is a pattern used to target and style HTML elements on a webpage, like 
@@ -62,6 +213,8 @@ def fetch_spy_close():
                 # retrieved using the inner_text() method of the Playwright locator.
                 price = price_element.inner_text()
                 print(f"Spy's last closing price was: ${price}")
+                # Remember it for the next run on the same trading day.
+                cache.put("SPY", trading_day, float(price.replace(",", "")), price)
             else:
                 print("Error: Could not find SPY's closing price on the page.")
 
@@ -77,4 +230,21 @@ def fetch_spy_close():
 if __name__ == "__main__":
     last_trading_day = get_last_trading_day()
     print(f"Fetching closing price for last trading day: {last_trading_day.strftime('%Y-%m-%d')}")
-    fetch_spy_close()
+    # python get_stock_price.py AAPL MSFT NVDA -> batch mode, no arguments -> the original SPY lookup
+    tickers = sys.argv[1:]
+    # LOAD_PROFILE=full|no-media|text-only picks what the browser skips loading.
+    profile = os.getenv("LOAD_PROFILE", DEFAULT_PROFILE)
+    cache = QuoteCache()
+    if tickers:
+        start = time.perf_counter()
+        for result in fetch_closes(tickers, cache=cache, trading_day=last_trading_day, profile=profile):
+            if result["error"]:
+                print(f"{result['ticker']}: Error: {result['error']} ({result['seconds']}s)")
+            else:
+                source = "cached" if result["cached"] else f"{result['seconds']}s"
+                print(f"{result['ticker']}'s last closing price was: ${result['text']} ({source})")
+        print(f"Fetched {len(tickers)} tickers in {time.perf_counter() - start:.1f}s")
+    else:
+        fetch_spy_close(cache, profile)
+    metrics = cache.metrics()
+    print(f"Cache: {metrics['hits']} hits, {metrics['misses']} misses, {metrics['writes']} writes")
@@ -0,0 +1,89 @@
+# Persistent cache of previous-close quotes keyed by (ticker, trading day).
+# A close never changes once its trading day is over, so a cached value can be served without starting a browser.
+
+# sqlite3: file-backed database that ships with Python, safe to share between runs.
+import sqlite3
+# os: build the default cache path next to this script.
+import os
+# datetime: timestamp each write.
+from datetime import datetime
+# threading: fetch_closes may write from several threads' results at once.
+import threading
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "quote_cache.sqlite3")
+
+
+class QuoteCache:
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        # check_same_thread=False + our own lock lets one cache object be used from any thread.
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        # Hit/miss/write counters for this process, see metrics().
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+        with self.lock:
+            # WAL lets readers keep going while another process writes.
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                """CREATE TABLE IF NOT EXISTS quotes (
+                    ticker TEXT NOT NULL,
+                    trading_day TEXT NOT NULL,
+                    close REAL NOT NULL,
+                    text TEXT,
+                    fetched_at TEXT NOT NULL,
+                    PRIMARY KEY (ticker, trading_day)
+                )"""
+            )
+            self.connection.commit()
+
+    # Cached quote for one ticker/day as {"ticker", "trading_day", "close", "text"}, or None.
+    def get(self, ticker, trading_day):
+        return self.get_many([ticker], trading_day).get(ticker.upper())
+
+    # Cached quotes for many tickers on one day, returned as {TICKER: quote}. Missing tickers are left out.
+    def get_many(self, tickers, trading_day):
+        tickers = [ticker.upper() for ticker in tickers]
+        day = str(trading_day)
+        found = {}
+        with self.lock:
+            # SQLite limits bound parameters per query, look tickers up in chunks.
+            for i in range(0, len(tickers), 500):
+                chunk = tickers[i:i + 500]
+                placeholders = ",".join("?" for _ in chunk)
+                rows = self.connection.execute(
+                    f"SELECT ticker, close, text FROM quotes WHERE trading_day = ? AND ticker IN ({placeholders})",
+                    [day, *chunk]
+                ).fetchall()
+                for ticker, close, text in rows:
+                    found[ticker] = {"ticker": ticker, "trading_day": day, "close": close, "text": text}
+            self.hits += len(found)
+            self.misses += len(set(tickers)) - len(found)
+        return found
+
+    # Store a successful quote (re-fetches of the same ticker/day overwrite the old row).
+    def put(self, ticker, trading_day, close, text=None):
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO quotes (ticker, trading_day, close, text, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (ticker.upper(), str(trading_day), close, text, datetime.now().isoformat(timespec="seconds"))
+            )
+            self.connection.commit()
+            self.writes += 1
+
+    # Counters for this process: hits, misses, writes and the hit rate.
+    def metrics(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,93 @@
+# NYSE trading calendar: weekends plus the exchange's full-day holidays.
+# Used to work out which session's close Yahoo's "Previous Close" field shows, so cached quotes get the right key.
+
+# date: calendar dates, datetime/time: the current time in New York, timedelta: stepping day by day.
+from datetime import date, datetime, time, timedelta
+# ZoneInfo: New York time zone (market hours are Eastern Time, wherever the script runs).
+from zoneinfo import ZoneInfo
+
+MARKET_TZ = ZoneInfo("America/New_York")
+# Regular session opens at 9:30 ET, before that the latest session is still the previous trading day.
+MARKET_OPEN = time(9, 30)
+
+# Cache of computed holiday sets per year.
+_holiday_cache = {}
+
+# The n-th given weekday (0=Monday) of a month, e.g. third Monday of January.
+def nth_weekday(year, month, weekday, n):
+    first = date(year, month, 1)
+    offset = (weekday - first.weekday()) % 7
+    return first + timedelta(days=offset + 7 * (n - 1))
+
+# The last given weekday of a month, e.g. last Monday of May.
+def last_weekday(year, month, weekday):
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    last = next_month - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+# Easter Sunday (anonymous Gregorian algorithm), needed for Good Friday.
+def easter_sunday(year):
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+# Fixed-date holidays move to Friday when they fall on Saturday and to Monday when they fall on Sunday.
+def observed(holiday):
+    if holiday.weekday() == 5:
+        return holiday - timedelta(days=1)
+    if holiday.weekday() == 6:
+        return holiday + timedelta(days=1)
+    return holiday
+
+# Set of NYSE full-day holidays for a year.
+def nyse_holidays(year):
+    if year in _holiday_cache:
+        return _holiday_cache[year]
+
+    holidays = {
+        nth_weekday(year, 1, 0, 3),              # Martin Luther King Jr. Day
+        nth_weekday(year, 2, 0, 3),              # Washington's Birthday
+        easter_sunday(year) - timedelta(days=2), # Good Friday
+        last_weekday(year, 5, 0),                # Memorial Day
+        observed(date(year, 7, 4)),              # Independence Day
+        nth_weekday(year, 9, 0, 1),              # Labor Day
+        nth_weekday(year, 11, 3, 4),             # Thanksgiving
+        observed(date(year, 12, 25)),            # Christmas
+    }
+    # New Year's Day on a Saturday is not made up on Friday Dec 31 (NYSE rule), Sunday moves to Monday.
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays.add(observed(new_year))
+    # Juneteenth became a market holiday in 2022.
+    if year >= 2022:
+        holidays.add(observed(date(year, 6, 19)))
+
+    _holiday_cache[year] = holidays
+    return holidays
+
+# True if the exchange holds a regular session on this date.
+def is_trading_day(day):
+    return day.weekday() < 5 and day not in nyse_holidays(day.year)
+
+# The last trading day strictly before `day`.
+def previous_trading_day(day):
+    day -= timedelta(days=1)
+    while not is_trading_day(day):
+        day -= timedelta(days=1)
+    return day
+
+# The most recent session that has started as of `now` (today once the market opens, otherwise the one before).
+def current_session(now=None):
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    today = now.date()
+    if is_trading_day(today) and now.time() >= MARKET_OPEN:
+        return today
+    return previous_trading_day(today)
@@ -0,0 +1,143 @@
+"""
+Startup benchmark: how long imports, short CLI commands and starting a goal process take. Runs offline, no browser
+or API key needed.
+
+    python benchmark.py              # 5 runs per measurement
+    python benchmark.py --runs 20
+    python benchmark.py --archive snapshot_archive   # also report on an archive written with SNAPSHOT_ARCHIVE=1
+
+Reports:
+    imports - time to import each module in a fresh interpreter (python -X importtime, median of the runs)
+    cli - wall time of `python jobs.py list` against an empty queue, interpreter startup included
+    goal process - cold: a new interpreter that imports the agent; warm: a process forked from the WarmRunner's
+        preloaded server (what `jobs.py worker --fork` does per goal)
+    archive (with --archive) - raw vs stored snapshot bytes and the time to read one random step
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+from src.jobs.warm_runner import WarmRunner, PRELOAD_MODULES
+from src.snapshot_archive import SnapshotArchive
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+AI_AGENT_DIR = os.path.join(PROJECT_DIR, "..", "ai_agent")
+
+# (module, folder it is imported from)
+IMPORTS = [
+    ("src.jobs.job_queue", PROJECT_DIR),
+    ("src.orchestrator", PROJECT_DIR),
+    ("src.browser.browser_actions", PROJECT_DIR),
+    ("src.ai.ai_client", PROJECT_DIR),
+    ("dotenv", PROJECT_DIR),
+    ("anthropic", PROJECT_DIR),
+    ("llm_agent", AI_AGENT_DIR),
+]
+
+
+class NoopOrchestrator:
+    """Does nothing, so the warm measurement is only the cost of getting a goal process running"""
+
+    goal_achieved = True
+
+    def execute_goal(self, goal, start_url=None, run_id=None):
+        return goal
+
+
+def noop_orchestrator_factory():
+    return NoopOrchestrator()
+
+
+def import_ms(module, cwd):
+    """Milliseconds to import a module (with everything it pulls in) in a fresh interpreter, None if not installed"""
+    run = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=cwd,
+                         capture_output=True, text=True)
+    if run.returncode != 0:
+        return None
+    # lines look like "import time:   self [us] | cumulative | imported package"
+    for line in run.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1000
+    return None
+
+
+def wall_ms(command, cwd):
+    start = time.perf_counter()
+    subprocess.run(command, cwd=cwd, capture_output=True, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def median(values):
+    values = [value for value in values if value is not None]
+    return statistics.median(values) if values else None
+
+
+def report(name, value):
+    print(f"  {name:<34} {'not installed' if value is None else f'{value:8.1f} ms'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import, CLI and goal process startup times")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--archive", help="snapshot archive folder to report on")
+    args = parser.parse_args()
+
+    print(f"⏱️ Startup benchmark ({args.runs} runs each, median)")
+
+    print("\n📦 imports")
+    for module, cwd in IMPORTS:
+        report(module, median([import_ms(module, cwd) for _ in range(args.runs)]))
+
+    print("\n💻 cli")
+    queue_path = os.path.join(tempfile.mkdtemp(), "jobs.sqlite3")
+    report("python -c pass", median([wall_ms([sys.executable, "-c", "pass"], PROJECT_DIR)
+                                     for _ in range(args.runs)]))
+    report("python jobs.py list", median([wall_ms([sys.executable, "jobs.py", "--queue", queue_path, "list"],
+                                                  PROJECT_DIR) for _ in range(args.runs)]))
+
+    print("\n🚀 goal process")
+    # the same modules the warm server preloads, i.e. what a goal process ends up importing
+    cold_script = "import importlib\nfor module in %r:\n    try: importlib.import_module(module)\n" \
+                  "    except ImportError: pass" % (PRELOAD_MODULES,)
+    report("cold (new interpreter + imports)", median([wall_ms([sys.executable, "-c", cold_script], PROJECT_DIR)
+                                                       for _ in range(args.runs)]))
+    runner = WarmRunner(noop_orchestrator_factory)
+    start = time.perf_counter()
+    runner.warm_up()
+    report(f"{runner.start_method} server start (once)", (time.perf_counter() - start) * 1000)
+    warm = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        runner.run_goal("noop")
+        warm.append((time.perf_counter() - start) * 1000)
+    report(f"warm ({runner.start_method})", median(warm))
+
+    if args.archive:
+        report_archive(SnapshotArchive(args.archive), args.runs)
+
+
+def report_archive(archive, runs):
+    print("\n🗄️ archive")
+    stats = archive.stats()
+    print(f"  {stats['runs']} runs, {stats['steps']} steps, {stats['chunks']} chunks: "
+          f"{stats['raw_bytes'] / 1e6:.2f} MB raw, {stats['stored_bytes'] / 1e6:.2f} MB stored (x{stats['ratio']})")
+    steps = [(run_id, entry["step"]) for run_id in archive.runs() for entry in archive.steps(run_id)]
+    if not steps:
+        return
+    reads = []
+    for run_id, step in random.sample(steps, min(runs, len(steps))):
+        start = time.perf_counter()
+        archive.get_snapshot(run_id, step)
+        reads.append((time.perf_counter() - start) * 1000)
+    report("read one random step", median(reads))
+
+
+if __name__ == "__main__":
+    main()
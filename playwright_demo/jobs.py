@@ -0,0 +1,94 @@
+"""
+Command line for the goal job queue (src/jobs).
+
+    python jobs.py submit "Find the cheapest laptop under $500" --start-url https://amazon.com
+    python jobs.py status 3
+    python jobs.py list --status failed
+    python jobs.py worker --concurrency 2          # run queued goals until Ctrl+C
+    python jobs.py worker --fork                   # every goal in its own process, forked from a preloaded server
+    python jobs.py worker --metrics-port 9464      # Prometheus metrics on http://127.0.0.1:9464/metrics
+    python jobs.py serve --port 8765 --workers 1   # HTTP endpoint (+ optional workers in the same process)
+
+Every command takes --queue PATH (default: JOB_QUEUE_PATH env var, then jobs.sqlite3 in this folder). Point workers
+on several hosts at the same file to share the work.
+"""
+
+import argparse
+from src.jobs.job_queue import JobQueue, job_to_json
+# the worker and HTTP server are imported by the commands that need them, so submit/status/list start right away
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Queue goals for the browser agent and run them with workers")
+    parser.add_argument("--queue", help="path of the SQLite queue file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="add a goal to the queue")
+    submit.add_argument("goal")
+    submit.add_argument("--start-url", default="https://google.com")
+    submit.add_argument("--max-attempts", type=int, default=3)
+
+    status = commands.add_parser("status", help="show one job")
+    status.add_argument("job_id", type=int)
+
+    listing = commands.add_parser("list", help="show the newest jobs")
+    listing.add_argument("--status", choices=["queued", "running", "done", "failed"])
+    listing.add_argument("--limit", type=int, default=20)
+
+    worker = commands.add_parser("worker", help="run queued goals until Ctrl+C")
+    worker.add_argument("--concurrency", type=int, default=1)
+    worker.add_argument("--lease-seconds", type=int, default=300)
+    worker.add_argument("--fork", action="store_true", help="run each goal in a process forked from a warm server")
+    worker.add_argument("--goal-timeout", type=float, default=1800,
+                        help="with --fork: seconds before a goal and its browser are stopped (0 = no limit)")
+    worker.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on this port")
+
+    serve = commands.add_parser("serve", help="HTTP endpoint for submitting goals and reading results")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--workers", type=int, default=0, help="also run this many worker threads")
+
+    args = parser.parse_args()
+    queue = JobQueue(args.queue)
+
+    if args.command == "submit":
+        job_id = queue.submit(args.goal, start_url=args.start_url, max_attempts=args.max_attempts)
+        print(f"✅ Queued job {job_id}")
+
+    elif args.command == "status":
+        job = queue.get(args.job_id)
+        print(job_to_json(job) if job else f"❌ No job {args.job_id}")
+
+    elif args.command == "list":
+        for job in queue.list_jobs(args.status, args.limit):
+            print(f"{job['id']:>5}  {job['status']:<8} attempts {job['attempts']}/{job['max_attempts']}  {job['goal']}")
+        print(queue.counts())
+
+    elif args.command == "worker":
+        from src.jobs.worker import JobWorker
+        if args.metrics_port is not None:
+            from src.utils.metrics import start_metrics_server
+            start_metrics_server(args.metrics_port)
+        JobWorker(queue, concurrency=args.concurrency, lease_seconds=args.lease_seconds,
+                  fork_per_goal=args.fork, goal_timeout=args.goal_timeout or None).run_forever()
+
+    elif args.command == "serve":
+        from src.jobs.worker import JobWorker
+        from src.jobs.http_api import make_server
+        workers = None
+        if args.workers:
+            workers = JobWorker(queue, concurrency=args.workers)
+            workers.start()
+        server = make_server(queue, args.host, args.port)
+        print(f"🌐 Job API on http://{args.host}:{server.server_address[1]}/jobs (metrics on /metrics)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\n🛑 Shutting down...")
+        server.server_close()
+        if workers:
+            workers.stop()
+
+
+if __name__ == "__main__":
+    main()
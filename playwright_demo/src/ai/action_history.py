@@ -0,0 +1,158 @@
+"""
+The purpose of this file is to give the model memory of what it already did during a goal. Every executed step is
+recorded (action, outcome, page). The last few steps are shown in full, older ones are folded into a one line
+summary so the prompt stays small no matter how long the run gets.
+
+It also spots loops: the same action repeated on the same page (same page fingerprint) didn't change anything the
+first time, so the prompt gets a warning telling the model to try something else.
+"""
+
+import hashlib
+from collections import Counter, deque
+from urllib.parse import urlparse
+
+
+class ActionHistory:
+
+    def __init__(self, max_recent=6, max_urls=5):
+        """
+        max_recent: how many steps are shown in full, older steps are compacted
+        max_urls: how many distinct visited pages are listed in the compacted part
+        """
+        self.max_recent = max_recent
+        # full detail of the latest steps, oldest drop off the left automatically
+        self.recent = deque(maxlen=max_recent)
+        # what's left of the steps that dropped off
+        self.compacted_steps = 0
+        self.compacted_actions = Counter()
+        self.compacted_failures = 0
+        self.visited_urls = deque(maxlen=max_urls)
+        # every host the goal has been on (visited_urls only keeps the latest pages)
+        self.visited_hosts = set()
+        # hosts where something was typed or submitted (the fast path searches a site once)
+        self.searched_hosts = set()
+        # how many times each (page fingerprint, action) pair was run
+        self.attempts = Counter()
+        # latest loop warnings, shown in the next prompt
+        self.warnings = deque(maxlen=2)
+
+    @staticmethod
+    def fingerprint(page_url, snapshot):
+        """Short hash identifying a page state (same URL and same snapshot means nothing changed)"""
+        return hashlib.sha1(f"{page_url}\n{snapshot}".encode("utf-8")).hexdigest()[:12]
+
+    @staticmethod
+    def action_key(action):
+        """The parts of an action that make it "the same action" as another one"""
+        return (action.get("action"), action.get("ref"), str(action.get("value", "")))
+
+    def is_loop(self, action, page_fingerprint):
+        """True if this exact action was already run on this exact page state"""
+        return self.attempts[(page_fingerprint, self.action_key(action))] > 0
+
+    def record(self, step_number, action, ok, page_url, page_fingerprint):
+        """Store one executed step, compacting the oldest one if the recent window is full"""
+        # parse errors never touched the page, they can't be a loop
+        if action.get("action") != "error":
+            if self.is_loop(action, page_fingerprint):
+                self.add_loop_warning(step_number, action)
+            self.attempts[(page_fingerprint, self.action_key(action))] += 1
+
+        if len(self.recent) == self.recent.maxlen:
+            oldest = self.recent[0]
+            self.compacted_steps += 1
+            self.compacted_actions[oldest["action"]] += 1
+            if not oldest["ok"]:
+                self.compacted_failures += 1
+
+        self.recent.append({
+            "step": step_number,
+            "action": action.get("action"),
+            "description": self.describe(action),
+            "ok": ok,
+            "url": page_url,
+        })
+
+        if page_url and page_url not in self.visited_urls:
+            self.visited_urls.append(page_url)
+        if page_url and urlparse(page_url).netloc:
+            self.visited_hosts.add(urlparse(page_url).netloc.lower())
+            if ok and action.get("action") in ("fill", "press_enter"):
+                self.searched_hosts.add(urlparse(page_url).netloc.lower())
+
+    def add_loop_warning(self, step_number, action):
+        """Tell the model (in the next summary) that this action already failed to change the page"""
+        self.warnings.append(
+            f"Step {step_number}: '{self.describe(action)}' was already tried on this exact page and nothing "
+            f"changed. Do NOT repeat it, choose a different action."
+        )
+
+    def summary(self):
+        """Compact text for the prompt, empty string when nothing has happened yet"""
+        if not self.recent:
+            return ""
+
+        lines = []
+        if self.compacted_steps:
+            counts = ", ".join(f"{count} {name}" for name, count in self.compacted_actions.most_common())
+            lines.append(f"Earlier steps ({self.compacted_steps}): {counts}; {self.compacted_failures} failed")
+        if self.visited_urls:
+            lines.append("Pages visited: " + ", ".join(self._short_url(url) for url in self.visited_urls))
+        for entry in self.recent:
+            outcome = "ok" if entry["ok"] else "FAILED"
+            lines.append(f"Step {entry['step']}: {entry['description']} on {self._short_url(entry['url'])} -> {outcome}")
+        for warning in self.warnings:
+            lines.append(f"WARNING: {warning}")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        """Plain JSON-safe copy of the history, saved in checkpoints"""
+        return {
+            "max_recent": self.max_recent,
+            "max_urls": self.visited_urls.maxlen,
+            "recent": list(self.recent),
+            "compacted_steps": self.compacted_steps,
+            "compacted_actions": dict(self.compacted_actions),
+            "compacted_failures": self.compacted_failures,
+            "visited_urls": list(self.visited_urls),
+            "visited_hosts": sorted(self.visited_hosts),
+            "searched_hosts": sorted(self.searched_hosts),
+            # (fingerprint, (action, ref, value)) keys flattened into lists
+            "attempts": [[fingerprint, *key, count] for (fingerprint, key), count in self.attempts.items()],
+            "warnings": list(self.warnings),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a history saved with to_dict()"""
+        history = cls(max_recent=data["max_recent"], max_urls=data["max_urls"])
+        history.recent.extend(data["recent"])
+        history.compacted_steps = data["compacted_steps"]
+        history.compacted_actions.update(data["compacted_actions"])
+        history.compacted_failures = data["compacted_failures"]
+        history.visited_urls.extend(data["visited_urls"])
+        # checkpoints from before visited_hosts existed: their urls are all we know
+        history.visited_hosts.update(data.get("visited_hosts") or
+                                     (urlparse(url).netloc.lower() for url in data["visited_urls"]))
+        history.searched_hosts.update(data.get("searched_hosts", []))
+        for fingerprint, action, ref, value, count in data["attempts"]:
+            history.attempts[(fingerprint, (action, ref, value))] = count
+        history.warnings.extend(data["warnings"])
+        return history
+
+    def describe(self, action):
+        """One line description of an action, e.g. fill e26 'laptop'"""
+        parts = [action.get("action", "?")]
+        if action.get("ref"):
+            parts.append(str(action["ref"]))
+        if action.get("value"):
+            value = str(action["value"])
+            parts.append(f"'{value[:60]}'")
+        return " ".join(parts)
+
+    def _short_url(self, url):
+        """Host + path without the query string, enough to tell pages apart"""
+        if not url:
+            return "unknown page"
+        parsed = urlparse(url)
+        return (parsed.netloc + parsed.path) or url
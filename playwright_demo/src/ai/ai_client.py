@@ -1,29 +1,68 @@
 """
 The purpose of this file is to connect to the claude api and handle all the ai communications. We will need to initialize API key. Find a way to send prompts to claude. Recieve and return responses. And handle any API errors.
+
+The actual provider call lives in llm_backend.py. By default this talks to Claude, set LLM_BACKEND=local (or pass a
+backend) to run the exact same agent against the offline LocalBackend.
 """
 
-from anthropic import Anthropic
 import os
-from dotenv import load_dotenv
+import time
+from src.ai.llm_backend import create_backend
+from src.utils.metrics import LLM_SECONDS, LLM_ERRORS
 
 class AnthropicClient:
 
-    def __init__(self):
+    def __init__(self, backend=None, model=None):
+        # imported here, python-dotenv is one of the slower imports and is only needed once a client is created
+        from dotenv import load_dotenv
         load_dotenv()
-        self.client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-        self.model = "claude-sonnet-4-20250514"
+        # any LLMBackend works here, fall back to whatever LLM_BACKEND names (Claude if unset)
+        self.backend = backend or create_backend(os.getenv("LLM_BACKEND", "anthropic"), model=model)
+        self.model = self.backend.model
 
     def get_next_action(self, prompt):
+        start = time.time()
+        try:
+            response = self.backend.complete(prompt)
+            LLM_SECONDS.observe(time.time() - start, self.model)
+            return response
+
+        except Exception as e:
+            LLM_ERRORS.inc(1, self.model)
+            print(f"❌ AI API call failed: {e}")
+            raise
+
+    def get_next_action_with_image(self, prompt, image_base64, media_type="image/jpeg"):
+        """Same as get_next_action, with a screenshot attached (visual fallback)"""
+        start = time.time()
         try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens = 1024,
-                messages = [{"role": "user", "content": prompt}]
-            )
-            return response.content[0].text
+            response = self.backend.complete_with_image(prompt, image_base64, media_type)
+            LLM_SECONDS.observe(time.time() - start, self.model)
+            return response
 
         except Exception as e:
+            LLM_ERRORS.inc(1, self.model)
             print(f"❌ AI API call failed: {e}")
             raise
 
-    
\ No newline at end of file
+    def stream_next_action(self, prompt):
+        """Yield the response text as it arrives instead of waiting for the whole answer"""
+        start = time.time()
+        try:
+            for chunk in self.backend.stream(prompt):
+                yield chunk
+            LLM_SECONDS.observe(time.time() - start, self.model)
+
+        except Exception as e:
+            LLM_ERRORS.inc(1, self.model)
+            print(f"❌ AI API stream failed: {e}")
+            raise
+
+    def get_next_actions(self, prompts, max_workers=4):
+        """Send several prompts at once, responses come back in the same order"""
+        try:
+            return self.backend.complete_batch(prompts, max_workers=max_workers)
+
+        except Exception as e:
+            print(f"❌ AI API batch call failed: {e}")
+            raise
@@ -0,0 +1,150 @@
+"""
+The purpose of this file is to skip the LLM for steps that are obvious from the goal and the page alone. Each rule
+looks at the goal, the parsed snapshot elements, the current URL, the previous action and the goal's ActionHistory
+(hosts visited / searched so far), and either returns an action dictionary (same shape ResponseParser returns, plus
+"confidence") or None.
+
+Rules:
+    navigate - goal says "go to amazon" / "open github.com" and that site hasn't been visited yet in this goal
+    search - goal says "search for X", the page has exactly one search box and this site wasn't searched yet
+    submit - the last action filled a search box, so press Enter
+"""
+
+import re
+from urllib.parse import urlparse
+from src.utils.snapshot_parser import SnapshotParser
+
+# sites people name without a domain, e.g. "go to the amazon website"
+KNOWN_SITES = {
+    "amazon": "https://www.amazon.com",
+    "google": "https://www.google.com",
+    "youtube": "https://www.youtube.com",
+    "github": "https://github.com",
+    "wikipedia": "https://www.wikipedia.org",
+    "ebay": "https://www.ebay.com",
+    "reddit": "https://www.reddit.com",
+    "walmart": "https://www.walmart.com",
+    "bestbuy": "https://www.bestbuy.com",
+}
+
+# "navigate to the amazon website", "go to github.com", "open www.python.org". Only verbs that mean "go there",
+# "search on github" or "turn on dark mode" don't ask for a navigation
+SITE_IN_GOAL = re.compile(
+    r"\b(?:go to|navigate to|open|visit|head to)\s+(?:the\s+)?(?:https?://)?(?:www\.)?"
+    r"(?P<site>[a-z0-9-]+(?:\.[a-z0-9-]+)*\.[a-z]{2,}|[a-z0-9-]+)",
+    re.IGNORECASE
+)
+
+# "search for wireless mouse", "search amazon for 'usb c cable' under $20", "look up python docs"
+QUERY_IN_GOAL = re.compile(
+    r"\b(?:search|look up|look for)\s+(?:[a-z0-9.-]+\s+for\s+|for\s+)?"
+    r"(?:\"(?P<quoted>[^\"]+)\"|'(?P<single>[^']+)'|(?P<plain>[^,.;]+?))"
+    r"(?=\s+(?:on|in|at|and|then|under|below|over)\b|[,.;]|$)",
+    re.IGNORECASE
+)
+
+
+class FastPathRules:
+
+    def __init__(self, min_confidence=0.85):
+        # actions below this confidence are left for the LLM to decide
+        self.min_confidence = min_confidence
+        self.snapshot_parser = SnapshotParser()
+
+    def suggest(self, goal, elements, page_url, last_action=None, history=None):
+        """
+        Return a high confidence action for this step, or None to fall back to the LLM.
+        last_action is the previous step's action dictionary with an added "ok" key (did it succeed).
+        history is the goal's ActionHistory (None = nothing happened yet).
+        """
+        for rule in (self._submit_search, self._navigate_to_site, self._fill_search):
+            action = rule(goal, elements, page_url, last_action, history)
+            if action and action["confidence"] >= self.min_confidence:
+                action["source"] = "fast_path"
+                action["goal_complete"] = False
+                return action
+        return None
+
+    def _navigate_to_site(self, goal, elements, page_url, last_action, history):
+        target = self.site_url(goal)
+        if not target:
+            return None
+
+        target_host = self._host(target)
+        if target_host in self._host(page_url):
+            return None
+        # the goal only asks to *start* there: once we've been on the site, leaving it (opening a search result)
+        # is the model's call, not something to undo
+        if history and any(target_host in self._host(f"https://{host}") for host in history.visited_hosts):
+            return None
+        # already tried this exact navigation and it didn't land there (redirect, block...), let the LLM handle it
+        if last_action and last_action.get("action") == "navigate" and last_action.get("value") == target:
+            return None
+
+        return {
+            "action": "navigate",
+            "value": target,
+            "reasoning": f"Goal names {target_host}, navigating there directly",
+            "confidence": 0.95,
+        }
+
+    def _fill_search(self, goal, elements, page_url, last_action, history):
+        query = self.search_query(goal)
+        if not query:
+            return None
+        # don't keep re-filling the same box, after one fill the submit rule or the LLM takes over
+        if last_action and last_action.get("action") == "fill":
+            return None
+        # the results page has the search box too, the query was already searched here
+        if history and urlparse(page_url or "").netloc.lower() in history.searched_hosts:
+            return None
+
+        boxes = self.snapshot_parser.find_search_boxes(elements)
+        if len(boxes) != 1:
+            return None
+
+        return {
+            "action": "fill",
+            "ref": boxes[0]["ref"],
+            "value": query,
+            "reasoning": f"Single search box '{boxes[0]['name']}' on page, searching for '{query}'",
+            "confidence": 0.9,
+        }
+
+    def _submit_search(self, goal, elements, page_url, last_action, history):
+        if not last_action or last_action.get("action") != "fill" or not last_action.get("ok"):
+            return None
+        if last_action.get("source") == "fast_path":
+            confidence = 0.95
+        else:
+            # the LLM filled something, only submit if it was a search box
+            search_refs = [box["ref"] for box in self.snapshot_parser.find_search_boxes(elements)]
+            confidence = 0.9 if last_action.get("ref") in search_refs else 0.5
+
+        return {
+            "action": "press_enter",
+            "reasoning": "Search box was just filled, submitting with Enter",
+            "confidence": confidence,
+        }
+
+    def site_url(self, goal):
+        """Return the URL of the site the goal asks to go to, or None"""
+        for match in SITE_IN_GOAL.finditer(goal):
+            site = match.group("site").lower()
+            if "." in site:
+                return f"https://{site}"
+            if site in KNOWN_SITES:
+                return KNOWN_SITES[site]
+        return None
+
+    def search_query(self, goal):
+        """Return the text the goal wants searched for, or None"""
+        match = QUERY_IN_GOAL.search(goal)
+        if not match:
+            return None
+        query = match.group("quoted") or match.group("single") or match.group("plain")
+        return query.strip() or None
+
+    def _host(self, url):
+        host = urlparse(url or "").netloc.lower()
+        return host[4:] if host.startswith("www.") else host
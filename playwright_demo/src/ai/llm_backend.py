@@ -0,0 +1,327 @@
+"""
+The purpose of this file is to hide which LLM provider we are talking to behind one small interface. Every backend
+can answer a single prompt (complete), answer many prompts at once (complete_batch) and stream an answer back piece
+by piece (stream). Both agents (playwright_demo and ai_agent) go through this so swapping Claude for Grok, a cheaper
+model, or the offline LocalBackend is a one line change.
+
+Backends:
+    AnthropicBackend - Claude through the anthropic SDK
+    XAIBackend - Grok through the xai_sdk package
+    LocalBackend - rule based / recorded answers, no network, deterministic (used for tests and load testing)
+    RecordingBackend - wraps another backend and saves every answer so LocalBackend can replay it later
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+
+
+def prompt_key(prompt):
+    """Short stable fingerprint of a prompt, used to match recorded responses back to the prompt that produced them"""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+
+class LLMBackend:
+    """
+    Base class every backend inherits from. Subclasses only have to implement complete(), the batch and streaming
+    calls fall back to complete() when a provider has nothing better to offer.
+    """
+
+    # name used by create_backend() and in log output
+    name = "base"
+
+    def __init__(self, model=None, max_tokens=1024):
+        self.model = model
+        self.max_tokens = max_tokens
+        # UsageTracker (src/ai/usage.py) every call is reported to, None = don't count
+        self.usage = None
+
+    def _record_usage(self, input_tokens=0, output_tokens=0, cache_read_tokens=0, cache_write_tokens=0, seconds=0.0):
+        """Report one call's token counts and latency to the attached UsageTracker"""
+        if self.usage is not None:
+            self.usage.add(self.model, input_tokens or 0, output_tokens or 0, cache_read_tokens or 0,
+                           cache_write_tokens or 0, seconds)
+
+    def complete(self, prompt, max_tokens=None):
+        """Send one prompt and return the full text response"""
+        raise NotImplementedError
+
+    def stream(self, prompt, max_tokens=None):
+        """
+        Yield the response as text chunks. Default is a single chunk holding the full answer so callers can always
+        iterate, even on backends without native streaming.
+        """
+        yield self.complete(prompt, max_tokens=max_tokens)
+
+    def complete_with_image(self, prompt, image_base64, media_type="image/jpeg", max_tokens=None):
+        """
+        Send a prompt together with one image (base64). Backends without vision support answer from the text alone.
+        """
+        return self.complete(prompt, max_tokens=max_tokens)
+
+    def complete_batch(self, prompts, max_tokens=None, max_workers=4):
+        """
+        Answer a list of prompts concurrently. Results come back in the same order as the prompts. Provider calls
+        spend almost all their time waiting on the network so a thread pool is enough here.
+        """
+        if not prompts:
+            return []
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(prompts))) as pool:
+            return list(pool.map(lambda p: self.complete(p, max_tokens=max_tokens), prompts))
+
+
+class AnthropicBackend(LLMBackend):
+    """Claude through the official anthropic SDK"""
+
+    name = "anthropic"
+
+    def __init__(self, model="claude-sonnet-4-20250514", max_tokens=1024, api_key=None):
+        super().__init__(model=model, max_tokens=max_tokens)
+        # imported here so the other backends work without the anthropic package installed
+        from anthropic import Anthropic
+        self.client = Anthropic(api_key=api_key or os.getenv("ANTHROPIC_API_KEY"))
+
+    def _record_response_usage(self, usage, start):
+        """Token counts from an Anthropic response.usage (cache fields are missing/None without prompt caching)"""
+        self._record_usage(
+            usage.input_tokens,
+            usage.output_tokens,
+            getattr(usage, "cache_read_input_tokens", 0),
+            getattr(usage, "cache_creation_input_tokens", 0),
+            time.time() - start
+        )
+
+    def complete(self, prompt, max_tokens=None):
+        start = time.time()
+        response = self.client.messages.create(
+            model=self.model,
+            max_tokens=max_tokens or self.max_tokens,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        self._record_response_usage(response.usage, start)
+        return response.content[0].text
+
+    def complete_with_image(self, prompt, image_base64, media_type="image/jpeg", max_tokens=None):
+        start = time.time()
+        response = self.client.messages.create(
+            model=self.model,
+            max_tokens=max_tokens or self.max_tokens,
+            messages=[{"role": "user", "content": [
+                {"type": "image", "source": {"type": "base64", "media_type": media_type, "data": image_base64}},
+                {"type": "text", "text": prompt},
+            ]}]
+        )
+        self._record_response_usage(response.usage, start)
+        return response.content[0].text
+
+    def stream(self, prompt, max_tokens=None):
+        start = time.time()
+        with self.client.messages.stream(
+            model=self.model,
+            max_tokens=max_tokens or self.max_tokens,
+            messages=[{"role": "user", "content": prompt}]
+        ) as stream:
+            for text in stream.text_stream:
+                yield text
+            self._record_response_usage(stream.get_final_message().usage, start)
+
+
+class XAIBackend(LLMBackend):
+    """Grok through the xai_sdk package (same call shape ai_agent/llm_agent.py has always used)"""
+
+    name = "xai"
+
+    def __init__(self, model="grok-4-fast-reasoning", max_tokens=150, api_key=None):
+        super().__init__(model=model, max_tokens=max_tokens)
+        # imported here so the other backends work without xai_sdk installed
+        from xai_sdk import Client
+        self.client = Client(api_key=api_key or os.getenv("XAI_API_KEY"))
+
+    def complete(self, prompt, max_tokens=None):
+        start = time.time()
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens or self.max_tokens
+        )
+        usage = getattr(response, "usage", None)
+        self._record_usage(
+            getattr(usage, "prompt_tokens", 0),
+            getattr(usage, "completion_tokens", 0),
+            seconds=time.time() - start
+        )
+        return response.choices[0].message.content
+
+    def stream(self, prompt, max_tokens=None):
+        start = time.time()
+        chunks = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens or self.max_tokens,
+            stream=True,
+            # the last chunk carries the token counts (and no choices)
+            stream_options={"include_usage": True}
+        )
+        usage = None
+        try:
+            for chunk in chunks:
+                usage = getattr(chunk, "usage", None) or usage
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if text:
+                    yield text
+        finally:
+            # also when the caller stops reading early, the tokens so far still count against the goal's budget
+            self._record_usage(
+                getattr(usage, "prompt_tokens", 0),
+                getattr(usage, "completion_tokens", 0),
+                seconds=time.time() - start
+            )
+
+
+class LocalBackend(LLMBackend):
+    """
+    Offline backend that never touches the network. Answers are picked in this order:
+        1. recorded - a response saved by RecordingBackend for this exact prompt
+        2. rules - list of (regex, response) pairs, first pattern found in the prompt wins
+        3. responses - scripted answers handed out one per call, in order
+        4. default_response - marks the goal complete so an orchestrator loop always ends
+    latency simulates provider response time (seconds) so load tests behave a bit like the real thing.
+    """
+
+    name = "local"
+
+    DEFAULT_RESPONSE = json.dumps({
+        "action": "complete",
+        "value": "Local backend has no more scripted actions",
+        "reasoning": "LocalBackend default response",
+        "goal_complete": True
+    })
+
+    def __init__(self, responses=None, rules=None, recorded=None, default_response=None, latency=0.0,
+                 model="local", max_tokens=1024):
+        super().__init__(model=model, max_tokens=max_tokens)
+        self.responses = list(responses or [])
+        self.rules = [(re.compile(pattern), response) for pattern, response in (rules or [])]
+        self.recorded = dict(recorded or {})
+        self.default_response = default_response or self.DEFAULT_RESPONSE
+        self.latency = latency
+        # load tests call complete() from many threads at once, guard the scripted response position
+        self._lock = threading.Lock()
+        self._position = 0
+        # number of prompts answered, handy for load test reports
+        self.calls = 0
+
+    @classmethod
+    def from_recording(cls, path, **kwargs):
+        """Build a LocalBackend that replays a JSONL file written by RecordingBackend"""
+        recorded = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    recorded[entry["key"]] = entry["response"]
+        return cls(recorded=recorded, **kwargs)
+
+    def complete(self, prompt, max_tokens=None):
+        response = self._pick_response(prompt)
+        # no real tokenizer offline, ~4 characters per token is close enough for budget tests
+        self._record_usage(len(prompt) // 4, len(response) // 4, seconds=self.latency)
+        return response
+
+    def _pick_response(self, prompt):
+        """The answer for a prompt (see the class docstring for the order)"""
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self._lock:
+            self.calls += 1
+
+            recorded = self.recorded.get(prompt_key(prompt))
+            if recorded is not None:
+                return recorded
+
+            for pattern, response in self.rules:
+                if pattern.search(prompt):
+                    return response
+
+            if self._position < len(self.responses):
+                response = self.responses[self._position]
+                self._position += 1
+                return response
+
+        return self.default_response
+
+    def stream(self, prompt, max_tokens=None):
+        # split on whitespace but keep it attached so joining the chunks gives back the exact response
+        for chunk in re.findall(r"\S+\s*|\s+", self.complete(prompt, max_tokens=max_tokens)):
+            yield chunk
+
+
+class RecordingBackend(LLMBackend):
+    """
+    Wraps a real backend and appends every prompt/response pair to a JSONL file. Point LocalBackend.from_recording()
+    at the file to replay a real session offline.
+    """
+
+    name = "recording"
+
+    def __init__(self, backend, path):
+        self.backend = backend
+        # the base constructor resets usage (forwarded to the wrapped backend), keep a tracker it already has
+        tracker = backend.usage
+        super().__init__(model=backend.model, max_tokens=backend.max_tokens)
+        self.usage = tracker
+        self.path = path
+        self._lock = threading.Lock()
+
+    # usage is counted by the wrapped backend, which knows the real token counts
+    @property
+    def usage(self):
+        return self.backend.usage
+
+    @usage.setter
+    def usage(self, tracker):
+        self.backend.usage = tracker
+
+    def complete(self, prompt, max_tokens=None):
+        response = self.backend.complete(prompt, max_tokens=max_tokens)
+        self._record(prompt, response)
+        return response
+
+    def stream(self, prompt, max_tokens=None):
+        chunks = []
+        for chunk in self.backend.stream(prompt, max_tokens=max_tokens):
+            chunks.append(chunk)
+            yield chunk
+        self._record(prompt, "".join(chunks))
+
+    def _record(self, prompt, response):
+        entry = {"key": prompt_key(prompt), "model": self.model, "response": response}
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+
+# maps the provider name used in config / env vars to the backend class
+BACKENDS = {
+    "anthropic": AnthropicBackend,
+    "xai": XAIBackend,
+    "local": LocalBackend,
+}
+
+
+def create_backend(provider="anthropic", **kwargs):
+    """
+    Build a backend by provider name, e.g. create_backend("local") or create_backend("anthropic", model="...").
+    Keyword arguments left as None are dropped so each backend keeps its own defaults.
+    """
+    if provider not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{provider}', expected one of: {', '.join(BACKENDS)}")
+    kwargs = {key: value for key, value in kwargs.items() if value is not None}
+    return BACKENDS[provider](**kwargs)
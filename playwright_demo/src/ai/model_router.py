@@ -0,0 +1,171 @@
+"""
+The purpose of this file is to pick which model answers each step. Easy steps (small page, early in the run, nothing
+failing) go to a small fast model. Hard steps go straight to the large model, and a small model answer that can't be
+parsed or comes back with low confidence gets escalated to the large model before it is acted on.
+
+Input:
+    prompt built by PromptBuilder
+    snapshot text, step number and how many recent steps failed (used to judge difficulty)
+Output:
+    parsed action dictionary (same shape ResponseParser returns)
+"""
+
+import time
+from src.utils.metrics import PARSE_FAILURES
+
+class ModelRouter:
+
+    # small/fast model used for easy steps, per provider (LLMBackend.name). A provider that isn't listed has no small
+    # tier, every step goes to its large model
+    SMALL_MODELS = {
+        "anthropic": "claude-3-5-haiku-20241022",
+    }
+    SMALL_MODEL = SMALL_MODELS["anthropic"]
+
+    def __init__(self, small_client, large_client, response_parser, confidence_threshold=0.6,
+                 max_easy_snapshot_chars=12000, max_easy_step=8, max_easy_failures=0):
+        """
+        small_client / large_client: anything with get_next_action(prompt) (normally AnthropicClient)
+        confidence_threshold: small model answers below this get escalated
+        max_easy_*: limits a step has to stay within to count as easy
+        """
+        self.small_client = small_client
+        self.large_client = large_client
+        self.response_parser = response_parser
+        self.confidence_threshold = confidence_threshold
+        self.max_easy_snapshot_chars = max_easy_snapshot_chars
+        self.max_easy_step = max_easy_step
+        self.max_easy_failures = max_easy_failures
+        self.reset()
+
+    @classmethod
+    def small_model_for(cls, provider):
+        """Small model name for a provider, None if it has no small tier"""
+        return cls.SMALL_MODELS.get(provider)
+
+    def reset(self):
+        """Start a new goal: normal mode and fresh totals (the summary is per goal)"""
+        # cheaper mode for goals close to their budget: small model only, no escalation (see downgrade())
+        self.downgraded = False
+        # running totals used for the end of run summary
+        self.stats = {
+            "small_calls": 0,
+            "large_calls": 0,
+            "escalations": 0,
+            "visual_calls": 0,
+            "small_seconds": 0.0,
+            "large_seconds": 0.0,
+        }
+
+    def assess_difficulty(self, snapshot, step_number, recent_failures):
+        """Return "easy" or "hard" for this step"""
+        if self.small_client is self.large_client:
+            return "hard"
+        if len(snapshot or "") > self.max_easy_snapshot_chars:
+            return "hard"
+        if step_number > self.max_easy_step:
+            return "hard"
+        if recent_failures > self.max_easy_failures:
+            return "hard"
+        return "easy"
+
+    def get_action(self, prompt, snapshot="", step_number=1, recent_failures=0):
+        """
+        Ask the right model for the next action and return the parsed action dictionary.
+        Exceptions from the large model are passed up to the caller, same as calling get_next_action directly.
+        """
+        # over budget: every step goes to the small model, the large one only if the small call fails outright
+        if self.downgraded and self.small_client is not self.large_client:
+            try:
+                return self._ask("small", prompt)
+            except Exception as e:
+                print(f"⚠️ Small model call failed ({e}), using large model")
+                return self._ask("large", prompt)
+
+        difficulty = self.assess_difficulty(snapshot, step_number, recent_failures)
+
+        if difficulty == "easy":
+            try:
+                action = self._ask("small", prompt)
+            except Exception as e:
+                print(f"⚠️ Small model call failed ({e}), escalating to large model")
+                action = None
+
+            reason = self._escalation_reason(action)
+            if not reason:
+                return action
+
+            self.stats["escalations"] += 1
+            print(f"⬆️  Router: escalating step {step_number} to large model ({reason})")
+
+        return self._ask("large", prompt)
+
+    def downgrade(self):
+        """Switch to the cheaper mode for the rest of the goal"""
+        self.downgraded = True
+
+    def get_visual_action(self, prompt, screenshot):
+        """
+        Ask the large model with a screenshot attached (visual fallback). screenshot is (image_base64, media_type).
+        A page that needed a screenshot is never an easy step, so this skips the small model.
+        """
+        self.stats["visual_calls"] += 1
+        return self._ask("large", prompt, screenshot)
+
+    def _ask(self, tier, prompt, screenshot=None):
+        """Call one tier, record its latency and return the parsed action"""
+        client = self.small_client if tier == "small" else self.large_client
+
+        start = time.time()
+        if screenshot:
+            ai_response = client.get_next_action_with_image(prompt, *screenshot)
+        else:
+            ai_response = client.get_next_action(prompt)
+        elapsed = time.time() - start
+
+        self.stats[f"{tier}_calls"] += 1
+        self.stats[f"{tier}_seconds"] += elapsed
+        print(f"🧭 Router: {tier} model ({client.model}) answered in {elapsed:.2f}s")
+        print(f"🔍 DEBUG - Claude's raw response: {ai_response}")
+
+        action = self.response_parser.parse(ai_response)
+        if action["action"] == "error":
+            PARSE_FAILURES.inc()
+        return action
+
+    def _escalation_reason(self, action):
+        """Return why a small model answer isn't good enough, or None if it is"""
+        if action is None:
+            return "call failed"
+        if action["action"] == "error":
+            return "parse failure"
+        try:
+            confidence = float(action.get("confidence", 1.0))
+        except (TypeError, ValueError):
+            return "unreadable confidence"
+        if confidence < self.confidence_threshold:
+            return f"low confidence {confidence:.2f}"
+        return None
+
+    def summary(self):
+        """
+        Totals for the run plus an estimate of time saved: every small call is compared against the average large
+        call latency (only when both tiers were actually used so the average means something).
+        """
+        stats = dict(self.stats)
+        small_calls = stats["small_calls"]
+        large_calls = stats["large_calls"]
+        stats["estimated_seconds_saved"] = 0.0
+        if small_calls and large_calls:
+            average_large = stats["large_seconds"] / large_calls
+            # escalated steps paid for both calls, don't count them as savings
+            kept_small = max(0, small_calls - stats["escalations"])
+            average_small = stats["small_seconds"] / small_calls
+            stats["estimated_seconds_saved"] = kept_small * (average_large - average_small) \
+                - stats["escalations"] * average_small
+        return stats
+
+    def print_summary(self):
+        stats = self.summary()
+        print(f"🧭 Router summary: {stats['small_calls']} small / {stats['large_calls']} large calls, "
+              f"{stats['escalations']} escalations, ~{stats['estimated_seconds_saved']:.1f}s saved")
@@ -13,7 +13,8 @@ Output: A formatted prompt string that tells Claude...
 
 class PromptBuilder:
     
-    def build(self, goal, snapshot, page_url, step_number):
+    def build(self, goal, snapshot, page_url, step_number, history=None, visual=False, max_steps=20, findings=None,
+              alternatives_below=None, max_alternatives=2):
         """
         Build a prompt for Claude to analyze page and decide next action
         
@@ -22,6 +23,13 @@ class PromptBuilder:
             snapshot: Page structure in YAML format from browser
             page_url: Current page URL
             step_number: Current step number
+            history: Compacted summary of earlier steps from ActionHistory (optional)
+            visual: True when a screenshot is attached and snapshot is only a pruned list of elements
+            max_steps: the goal's step budget
+            findings: summaries of pages opened by earlier explore actions and listings from extract actions (optional)
+            alternatives_below: confidence under which the model lists other candidate actions (speculative mode),
+                None to not ask for any
+            max_alternatives: how many alternatives it may list
         
         Returns:
             Formatted prompt string for Claude
@@ -35,19 +43,59 @@ class PromptBuilder:
             6. Client executes the action by calling MCP tools (like playwright_click on ref e26)
         """
         
+        # Only mention earlier steps once there are some
+        history_section = ""
+        if history:
+            history_section = f"""What you have done so far (don't repeat actions that failed or changed nothing):
+        {history}
+
+        """
+
+        # Pages looked at with "explore" (and listings read with "extract"), so the model can compare them without
+        # visiting each one
+        findings_section = ""
+        if findings:
+            findings_section = f"""Pages you explored or extracted listings from (the browser is still on the current page):
+        {findings}
+
+        """
+
+        # Speculative mode: when unsure the model lists runner-up actions, which are tried in parallel
+        alternatives_section = ""
+        if alternatives_below is not None and max_alternatives > 0:
+            alternatives_section = f"""If your confidence is below {alternatives_below:g}, also add "alternatives": up to {max_alternatives} other navigate actions
+        or clicks on links you considered, best first, e.g. [{{"action": "click", "ref": "e31"}}]. They are tried in parallel and the one
+        that works is kept.
+"""
+
+        # Visual fallback: the screenshot shows the page, the pruned snapshot only supplies refs to act on
+        structure_intro = "Here is the current page structure:"
+        if visual:
+            structure_intro = ("A screenshot of the current page is attached. The page structure was too large or "
+                               "unavailable, so here are only its actionable elements (use these refs):")
+
         prompt = f"""You are a browser automation assistant helping achieve this goal:
         {goal}
 
         Current page: {page_url}
-        Step: {step_number} of 20
+        Step: {step_number} of {max_steps}
 
-        Here is the current page structure:
+        {history_section}{findings_section}{structure_intro}
         {snapshot}
 
         You can perform these actions:
         - navigate: Go to a new URL (provide URL in "value")
         - click: Click an element (provide ref ID in "ref")
         - fill: Type text into an element (provide ref ID in "ref" and text in "value")
+        - press_enter: Press the Enter key (e.g. to submit a search you just filled)
+        - extract: Read the listings on this page (name, price, link) directly from the browser. Use it on a results page
+          when the goal asks for products/prices instead of reading them yourself. The matches come back to you in the
+          next step; set "goal_complete": true only if the filters below already cover everything the goal asks for.
+          Optional: "max_price", "min_price", "contains" (words the name must have), "sort" ("price_asc" or "price_desc"),
+          "limit", "selector" (CSS selector for one listing)
+        - explore: Open several links at once in background tabs and get a short summary of each in the next step,
+          without leaving this page. Use it to compare candidates (products, offers, results) instead of visiting them
+          one by one. Provide link refs in "refs" (e.g. ["e12", "e15"]) and/or URLs in "urls", up to 6.
         - complete: Mark goal as finished (provide result in "value")
 
         Respond ONLY with valid JSON in this exact format:
@@ -56,14 +104,18 @@ class PromptBuilder:
         "ref": "e26",
         "value": "laptop",
         "reasoning": "why you're doing this",
+        "confidence": 0.9,
         "goal_complete": false
         }}
 
+        "confidence" is how sure you are (0.0 to 1.0) that this action moves toward the goal.
+        {alternatives_section}
         For complete action:
         {{
         "action": "complete",
         "value": "The result/answer",
         "reasoning": "Goal achieved because...",
+        "confidence": 1.0,
         "goal_complete": true
         }}
         """
@@ -1,23 +1,157 @@
 import json
 
+# fields each action type must have (with a non-empty value) before we try to run it in the browser
+ACTION_SCHEMAS = {
+    "navigate": ("value",),
+    "click": ("ref",),
+    "fill": ("ref", "value"),
+    "press_enter": (),
+    "extract": (),
+    "explore": (),
+    "complete": (),
+    "error": (),
+}
+
+# Python style literals models sometimes emit instead of JSON ones
+LITERALS = {"True": "true", "False": "false", "None": "null"}
+# { positions tried before giving up, every try can walk to the end of the text so this keeps a long
+# brace-heavy answer (code, CSS) linear instead of quadratic
+MAX_OBJECT_STARTS = 8
+
+
+def extract_json(text):
+    """
+    Find the first JSON object in text and return it as a dictionary, or None if there isn't one.
+
+    Handles what models usually wrap around or break in their JSON:
+        - code fences and prose before/after the object
+        - single quoted strings ({'action': 'click'})
+        - Python literals (True/False/None)
+        - trailing commas before } or ]
+    """
+    if not text:
+        return None
+
+    # most responses are clean JSON, don't scan those
+    stripped = text.strip()
+    if stripped.startswith("{"):
+        try:
+            parsed = json.loads(stripped)
+            if isinstance(parsed, dict):
+                return parsed
+        except json.JSONDecodeError:
+            pass
+
+    start = text.find("{")
+    tries = 0
+    while start != -1 and tries < MAX_OBJECT_STARTS:
+        tries += 1
+        candidate = _scan_object(text, start)
+        if candidate is not None:
+            try:
+                parsed = json.loads(candidate)
+                if isinstance(parsed, dict):
+                    return parsed
+            except json.JSONDecodeError:
+                pass
+        # that brace didn't start a usable object, try the next one
+        start = text.find("{", start + 1)
+    return None
+
+
+def _scan_object(text, start):
+    """
+    Walk text from the { at start to its matching }, repairing as we go, and return the repaired JSON string.
+    Returns None if the braces never balance.
+    """
+    out = []
+    depth = 0
+    # quote character of the string we're inside (None when outside a string)
+    quote = None
+    i = start
+    length = len(text)
+
+    while i < length:
+        char = text[i]
+
+        if quote:
+            if char == "\\" and i + 1 < length:
+                following = text[i + 1]
+                # \' is not a valid JSON escape, inside a double quoted output string it's just '
+                out.append("'" if following == "'" else char + following)
+                i += 2
+                continue
+            if char == quote:
+                out.append('"')
+                quote = None
+            elif char == '"':
+                # double quote inside a single quoted string has to be escaped in JSON
+                out.append('\\"')
+            elif char == "\n":
+                out.append("\\n")
+            else:
+                out.append(char)
+            i += 1
+            continue
+
+        if char in ("'", '"'):
+            quote = char
+            out.append('"')
+        elif char in "{[":
+            depth += 1
+            out.append(char)
+        elif char in "}]":
+            # drop a trailing comma: {"a": 1,} -> {"a": 1}
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            depth -= 1
+            out.append(char)
+            if depth == 0:
+                return "".join(out)
+        elif char.isalpha():
+            # read a whole bare word so True/False/None can be swapped for their JSON versions
+            end = i
+            while end < length and (text[end].isalnum() or text[end] == "_"):
+                end += 1
+            word = text[i:end]
+            out.append(LITERALS.get(word, word))
+            i = end
+            continue
+        else:
+            out.append(char)
+        i += 1
+
+    return None
+
+
 class ResponseParser:
-    
+
     def parse(self, ai_response):
         """
         Parse Claude's JSON response into a Python dictionary
-        
+
         Args:
-            ai_response: String response from Claude (should be JSON)
-        
+            ai_response: String response from Claude (should be JSON, but fences/prose/sloppy quoting are tolerated)
+
         Returns:
             Dictionary with action details, or error action if parsing fails
         """
-        
+
         # Try to parse JSON
         try:
-            # Convert JSON string to Python dictionary
-            action_dict = json.loads(ai_response)
-            
+            # Pull the first JSON object out of the response and convert it to a Python dictionary
+            action_dict = extract_json(ai_response)
+
+            if action_dict is None:
+                # Return error action - no JSON object anywhere in the response
+                return {
+                    "action": "error",
+                    "message": "Failed to parse JSON: no JSON object found in response",
+                    "goal_complete": False
+                }
+
             # Validate required fields exist
             if "action" not in action_dict:
                 # Return error action - missing required field
@@ -26,32 +160,36 @@ class ResponseParser:
                     "message": "Response missing 'action' field",
                     "goal_complete": False
                 }
-            
+
             # Validate action type is valid
-            valid_actions = ["navigate", "click", "fill", "complete", "error"]
-            if action_dict["action"] not in valid_actions:
+            if action_dict["action"] not in ACTION_SCHEMAS:
                 # Return error action - invalid action type
                 return {
                     "action": "error",
                     "message": f"Invalid action type: {action_dict['action']}",
                     "goal_complete": False
                 }
-            
+
+            # Validate the action has everything it needs to run
+            for field in ACTION_SCHEMAS[action_dict["action"]]:
+                if action_dict.get(field) in (None, ""):
+                    return {
+                        "action": "error",
+                        "message": f"'{action_dict['action']}' action missing '{field}'",
+                        "goal_complete": False
+                    }
+
+            # Models sometimes copy the ref straight out of the snapshot: "[ref=e26]" -> "e26"
+            if isinstance(action_dict.get("ref"), str):
+                action_dict["ref"] = action_dict["ref"].strip("[] ").replace("ref=", "")
+
             # Return the parsed dictionary
             return action_dict
-            
-        except json.JSONDecodeError as e:
-            # JSON parsing failed - return error action
-            return {
-                "action": "error",
-                "message": f"Failed to parse JSON: {str(e)}",
-                "goal_complete": False
-            }
-        
+
         except Exception as e:
             # Some other error - return error action
             return {
                 "action": "error",
                 "message": f"Unexpected error: {str(e)}",
                 "goal_complete": False
-            }
\ No newline at end of file
+            }
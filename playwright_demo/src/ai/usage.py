@@ -0,0 +1,130 @@
+"""
+The purpose of this file is to count what every goal costs: tokens in / cached / out, estimated dollars, and time spent
+waiting on the model. Backends report each call to a UsageTracker, the Orchestrator reads it per step and per goal
+and checks the totals against a GoalBudget.
+
+Budgets (any of them can be None = no limit):
+    max_steps - steps per goal (what Orchestrator.max_steps always was)
+    max_input_tokens / max_output_tokens - tokens per goal (input includes cached tokens)
+    max_cost - estimated dollars per goal
+    max_seconds - wall time per goal
+Once any budget is downgrade_at (default 80%) used up the goal switches to the cheaper mode (small model only, no
+screenshots). Once a budget is fully used up the goal stops.
+"""
+
+import os
+import threading
+
+# dollars per million tokens: (input, output, cache read, cache write). Unknown models use DEFAULT_PRICE.
+MODEL_PRICES = {
+    "claude-sonnet-4-20250514": (3.00, 15.00, 0.30, 3.75),
+    "claude-3-5-haiku-20241022": (0.80, 4.00, 0.08, 1.00),
+    "grok-4-fast-reasoning": (0.20, 0.50, 0.05, 0.20),
+    "local": (0.0, 0.0, 0.0, 0.0),
+}
+DEFAULT_PRICE = (3.00, 15.00, 0.30, 3.75)
+
+
+def estimate_cost(model, input_tokens=0, output_tokens=0, cache_read_tokens=0, cache_write_tokens=0):
+    """Estimated dollars for one call. input_tokens are the uncached ones, as the Anthropic API reports them"""
+    input_price, output_price, read_price, write_price = MODEL_PRICES.get(model, DEFAULT_PRICE)
+    return (input_tokens * input_price + output_tokens * output_price
+            + cache_read_tokens * read_price + cache_write_tokens * write_price) / 1_000_000
+
+
+class UsageTracker:
+    """Running totals of model usage, shared by every backend a goal talks to (thread safe)"""
+
+    FIELDS = ("calls", "input_tokens", "cache_read_tokens", "cache_write_tokens", "output_tokens", "cost", "seconds")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.totals = dict.fromkeys(self.FIELDS, 0)
+
+    def add(self, model, input_tokens=0, output_tokens=0, cache_read_tokens=0, cache_write_tokens=0, seconds=0.0):
+        """Record one model call"""
+        cost = estimate_cost(model, input_tokens, output_tokens, cache_read_tokens, cache_write_tokens)
+        with self._lock:
+            self.totals["calls"] += 1
+            self.totals["input_tokens"] += input_tokens
+            self.totals["cache_read_tokens"] += cache_read_tokens
+            self.totals["cache_write_tokens"] += cache_write_tokens
+            self.totals["output_tokens"] += output_tokens
+            self.totals["cost"] += cost
+            self.totals["seconds"] += seconds
+
+    def snapshot(self):
+        """Copy of the current totals"""
+        with self._lock:
+            return dict(self.totals)
+
+    def since(self, earlier):
+        """Usage between an earlier snapshot() and now, e.g. for one step"""
+        now = self.snapshot()
+        return {field: now[field] - earlier.get(field, 0) for field in self.FIELDS}
+
+    def reset(self):
+        with self._lock:
+            self.totals = dict.fromkeys(self.FIELDS, 0)
+
+
+def format_usage(usage):
+    """One line summary: calls, tokens in (cached) / out, cost and model time"""
+    total_input = usage["input_tokens"] + usage["cache_read_tokens"] + usage["cache_write_tokens"]
+    return (f"{usage['calls']} calls, {total_input} in ({usage['cache_read_tokens']} cached) / "
+            f"{usage['output_tokens']} out tokens, ~${usage['cost']:.4f}, {usage['seconds']:.1f}s waiting on the model")
+
+
+def _env_number(name, cast=float):
+    """Number from an environment variable, None if unset/empty"""
+    value = os.getenv(name)
+    return cast(value) if value else None
+
+
+class GoalBudget:
+
+    def __init__(self, max_steps=20, max_input_tokens=None, max_output_tokens=None, max_cost=None, max_seconds=None,
+                 downgrade_at=0.8):
+        self.max_steps = max_steps
+        self.max_input_tokens = max_input_tokens
+        self.max_output_tokens = max_output_tokens
+        self.max_cost = max_cost
+        self.max_seconds = max_seconds
+        self.downgrade_at = downgrade_at
+
+    @classmethod
+    def from_env(cls):
+        """Budget from GOAL_MAX_STEPS, GOAL_MAX_INPUT_TOKENS, GOAL_MAX_OUTPUT_TOKENS, GOAL_MAX_COST, GOAL_MAX_SECONDS"""
+        return cls(
+            max_steps=_env_number("GOAL_MAX_STEPS", int) or 20,
+            max_input_tokens=_env_number("GOAL_MAX_INPUT_TOKENS", int),
+            max_output_tokens=_env_number("GOAL_MAX_OUTPUT_TOKENS", int),
+            max_cost=_env_number("GOAL_MAX_COST"),
+            max_seconds=_env_number("GOAL_MAX_SECONDS"),
+        )
+
+    def used(self, usage, elapsed_seconds):
+        """Fraction of each limited budget used so far, e.g. {"cost": 0.42}"""
+        input_tokens = usage["input_tokens"] + usage["cache_read_tokens"] + usage["cache_write_tokens"]
+        spent = {
+            "input_tokens": (input_tokens, self.max_input_tokens),
+            "output_tokens": (usage["output_tokens"], self.max_output_tokens),
+            "cost": (usage["cost"], self.max_cost),
+            "seconds": (elapsed_seconds, self.max_seconds),
+        }
+        return {name: value / limit for name, (value, limit) in spent.items() if limit}
+
+    def check(self, usage, elapsed_seconds):
+        """
+        ("ok", None), ("downgrade", reason) or ("stop", reason) for the goal's usage so far.
+        Steps are not checked here, the orchestrator loop already stops at max_steps.
+        """
+        used = self.used(usage, elapsed_seconds)
+        if not used:
+            return "ok", None
+        name, fraction = max(used.items(), key=lambda item: item[1])
+        if fraction >= 1:
+            return "stop", f"{name} budget used up ({fraction:.0%})"
+        if fraction >= self.downgrade_at:
+            return "downgrade", f"{name} budget {fraction:.0%} used"
+        return "ok", None
@@ -0,0 +1,96 @@
+"""
+The purpose of this file is to try more than one action before committing to one. When the model isn't sure (low
+confidence) it names alternatives next to its pick. Speculative mode runs the pick and the alternatives at the same
+time, each in its own explorer session (explorer.py) cloned from the main tab: same url, same localStorage /
+sessionStorage / cookies (get_storage_state / restore_storage_state, the same state checkpoints use). Every branch is
+snapshotted after its action, and the branch that got somewhere is the one the main tab then performs. The others
+are thrown away, so a wrong guess no longer costs the steps it takes to back out of it.
+
+Every candidate really runs in its clone and the winner runs again on the main tab, so only actions that are safe to
+run twice are tried this way: navigate, and clicks on links (the ref is matched by role + name on the clone's own
+snapshot, refs are per session). A button can add to a cart, submit a form or delete something, the clone would do
+it and then the main tab a second time. fill / press_enter also depend on the main tab's focus and typed text.
+
+Clones are not exact copies of a logged-in tab: restore_storage_state can only set cookies through document.cookie,
+so HttpOnly cookies (usually the session cookie) are not copied. A clone of a logged-in page may be logged out and
+see a different page than the main tab would.
+"""
+
+import re
+import time
+
+from src.browser.explorer import snapshot_text
+from src.utils.snapshot_parser import SnapshotParser
+
+SPECULATIVE_ACTIONS = ("click", "navigate")
+# what a click may land on to be tried in a clone (following a link only loads a page)
+SPECULATIVE_ROLES = ("link",)
+
+WORD = re.compile(r"[a-z0-9$]+")
+
+
+def can_speculate(action, element=None):
+    """True if the action is safe to run both in a clone and then on the main tab (navigate, or a click on a link)"""
+    if action.get("action") not in SPECULATIVE_ACTIONS:
+        return False
+    return action["action"] == "navigate" or bool(element) and element["role"] in SPECULATIVE_ROLES
+
+
+def match_ref(ref, element, elements):
+    """The ref on a clone's page for the element the main tab called `ref` (same role and name, else the same ref)"""
+    if element:
+        for candidate in elements:
+            if candidate["role"] == element["role"] and candidate["name"] == element["name"]:
+                return candidate["ref"]
+    return ref
+
+
+def run_branch(browser, url, storage, action, element=None):
+    """
+    Clone the main tab into `browser` (url + storage), run the action, snapshot the result.
+    Returns {"action", "ok", "url", "snapshot", "changed", "seconds"}, changed = the action changed the clone's page.
+    """
+    start = time.time()
+    branch = {"action": action, "ok": False, "url": url, "snapshot": "", "changed": False, "seconds": 0.0}
+    if not browser.navigate_to_website(url):
+        branch["seconds"] = time.time() - start
+        return branch
+    if storage:
+        browser.restore_storage_state(storage)
+
+    # the clone's own "before", comparing with the main tab would count ads / timestamps as changes. Also refs only
+    # exist in a session after it took a snapshot of the page
+    before = snapshot_text(browser.take_page_snapshot())
+    before_url = browser.get_current_url() or url
+    if action["action"] == "click":
+        elements = SnapshotParser().parse_yaml(before)
+        ref = match_ref(action.get("ref"), element, elements)
+        description = f'{element["role"]} "{element["name"]}"' if element and element["name"] else None
+        branch["ok"] = browser.click(ref, element=description)
+    elif action["action"] == "navigate":
+        branch["ok"] = browser.navigate_to_website(action.get("value", ""))
+
+    branch["snapshot"] = snapshot_text(browser.take_page_snapshot())
+    branch["url"] = browser.get_current_url() or before_url
+    branch["changed"] = branch["url"] != before_url or branch["snapshot"] != before
+    branch["seconds"] = time.time() - start
+    return branch
+
+
+def pick_branch(branches, goal):
+    """
+    The branch that moved toward the goal, None if none of them changed anything. A branch made progress when its
+    action worked and changed the page, ties go to the page that mentions more words of the goal, then to the model's
+    own ranking (branches are in rank order, anything that isn't a branch dict is an error and skipped).
+    """
+    goal_words = set(WORD.findall(goal.lower()))
+    best = None
+    best_key = None
+    for rank, branch in enumerate(branches):
+        if not isinstance(branch, dict) or not branch["ok"] or not branch["changed"]:
+            continue
+        overlap = len(goal_words & set(WORD.findall(branch["snapshot"].lower())))
+        key = (overlap, -rank)
+        if best_key is None or key > best_key:
+            best, best_key = branch, key
+    return best
@@ -1,17 +1,27 @@
 
 
 from src.mcp_client import SessionMCPClient
+# builds the in-page listing extractor and filters/sorts its records locally
+from src.browser.extraction import build_extraction_script, refine_records
+# shrinks screenshots before they are sent to the LLM
+from src.utils.image_utils import downscale_image
+from src.utils.metrics import SNAPSHOT_BYTES, BROWSER_ACTIONS
 
 import json
+import time
 
 class BrowserAutomator:
     
-    def __init__(self):
+    def __init__(self, load_profile=None):
         """
         Special constructor that runs when creating new instance of the class. It creates an instance variable names client and assigns it a new SessionMCPClient object. We then create and initialized variable and assign it to false which tracks whether the browser connection has been setup.
+        load_profile picks which resources the browser skips ("full", "no-media", "text-only"), see load_profile.py.
         """
-        self.client = SessionMCPClient()
+        self.client = SessionMCPClient(load_profile=load_profile)
         self.initialized = False
+        # How long click/press_enter keep checking whether a timed out action started a navigation
+        self.navigation_wait = 10
+        self.navigation_poll_interval = 0.5
     
     def initialize(self):
         """
@@ -40,10 +50,10 @@ class BrowserAutomator:
         result = self.client.send_tool_call("browser_navigate", {"url": url})
         if result and not result.get("error"):
             print(f"✅ Successfully navigated to {url}")
-            return True
+            return self._counted("navigate", True)
         else:
             print(f"❌ Failed to navigate: {result}")
-            return False
+            return self._counted("navigate", False)
     
     def take_page_snapshot(self):
         """
@@ -58,11 +68,39 @@ class BrowserAutomator:
         result = self.client.send_tool_call("browser_snapshot", {})
         if result and not result.get("error"):
             print("✅ Page snapshot captured!")
+            content = result.get("result", {}).get("content", [])
+            SNAPSHOT_BYTES.observe(sum(len(part.get("text", "").encode("utf-8")) for part in content))
             return result
         else:
             print(f"❌ Failed to capture snapshot: {result}")
             return None
     
+    def take_screenshot(self, max_width=1024, quality=60):
+        """
+        Capture the visible viewport as a downscaled JPEG for the visual fallback.
+        Returns (image_base64, media_type) or None if the capture failed or the server omits images (text-only profile).
+        """
+        if not self.initialized:
+            print("❌ Browser not initialized!")
+            return None
+        
+        print("🖼️ Taking screenshot...")
+        
+        result = self.client.send_tool_call("browser_take_screenshot", {"type": "jpeg"})
+        if not result or result.get("error"):
+            print(f"❌ Failed to take screenshot: {result}")
+            return None
+        
+        # the image is one of the content items, next to a text item describing the capture
+        for item in result.get("result", {}).get("content", []):
+            if item.get("type") == "image" and item.get("data"):
+                image, media_type = downscale_image(item["data"], item.get("mimeType", "image/jpeg"), max_width, quality)
+                print(f"✅ Screenshot captured ({len(image) * 3 // 4 // 1024} KB)")
+                return image, media_type
+        
+        print("⚠️ Screenshot response had no image")
+        return None
+    
     def get_page_title(self):
         """
         Get the page title by executing JavaScript in the browser.
@@ -114,19 +152,27 @@ class BrowserAutomator:
 
 
 
+    def _counted(self, action, ok):
+        """Count the action's outcome (agent_browser_actions_total, see metrics.py) and hand ok back"""
+        BROWSER_ACTIONS.inc(1, action, "ok" if ok else "failed")
+        return ok
+
     # Needs defining/understanding
 
-    def click(self, ref):
-        """Click an element using its ref ID"""
+    def click(self, ref, element=None):
+        """Click an element using its ref ID. element is its accessible description (e.g. 'button "Add to cart"')"""
         if not self.initialized:
             print("❌ Browser not initialized!")
             return False
         
         print(f"🖱️ Clicking element: {ref}")
         
+        # where we were before the click, to tell whether a timed out click navigated away
+        before_url = self.client.last_url
+        
         try:
             result = self.client.send_tool_call("browser_click", {
-                "element": "clickable element",
+                "element": element or "clickable element",
                 "ref": ref
             })
             
@@ -134,18 +180,20 @@ class BrowserAutomator:
             
             if result and not result.get("error"):
                 print(f"✅ Successfully clicked {ref}")
-                return True
+                return self._counted("click", True)
+            elif result and result["error"].get("timed_out"):
+                # Clicks that start a navigation often outlast the call, only count it if the page really changed
+                return self._counted("click", self._navigated_after_timeout(before_url))
             else:
                 print(f"❌ Failed to click: {result}")
-                return False
+                return self._counted("click", False)
                 
         except Exception as e:
-            # Timeout is expected during navigation
-            print(f"⚠️ Click timeout (navigation in progress) - treating as success")
-            return True  # Changed from False to True
+            print(f"❌ EXCEPTION in click(): {e}")
+            return self._counted("click", False)
         
-    def fill(self, ref, text):
-        """Fill a text field with the given text"""
+    def fill(self, ref, text, element=None):
+        """Fill a text field with the given text. element is its accessible description (e.g. 'combobox "Search"')"""
         if not self.initialized:
             print("❌ Browser not initialized!")
             return False
@@ -154,7 +202,7 @@ class BrowserAutomator:
         
         try:
             result = self.client.send_tool_call("browser_type", {
-                "element": "text input field",
+                "element": element or "text input field",
                 "ref": ref, 
                 "text": text
             })
@@ -164,16 +212,16 @@ class BrowserAutomator:
             
             if result and not result.get("error"):
                 print(f"✅ Successfully filled {ref}")
-                return True
+                return self._counted("fill", True)
             else:
                 print(f"❌ Failed to fill: {result}")
-                return False
+                return self._counted("fill", False)
                 
         except Exception as e:
             print(f"❌ EXCEPTION in fill(): {e}")
             import traceback
             traceback.print_exc()
-            return False
+            return self._counted("fill", False)
         
     def press_enter(self):
         """
@@ -189,6 +237,9 @@ class BrowserAutomator:
         
         print("⌨️ Pressing Enter...")
         
+        # where we were before pressing Enter, to tell whether a timed out key press submitted a form
+        before_url = self.client.last_url
+        
         # Try sending the tool call using the correct method
         try:
             # Send the tool call using "browser_press_key"
@@ -200,17 +251,159 @@ class BrowserAutomator:
             # If there was success
             if result and not result.get("error"):
                 print("✅ Successfully pressed Enter")
-                return True
+                return self._counted("press_enter", True)
+            # Enter often triggers form submission/navigation which outlasts the call, check where the page went
+            elif result and result["error"].get("timed_out"):
+                return self._counted("press_enter", self._navigated_after_timeout(before_url))
             # If there wasnt
             else:
                 print(f"❌ Failed to press Enter: {result}")
-                return False
+                return self._counted("press_enter", False)
                 
-        # Catch any exception - most commonly a timeout when Enter triggers navigation
-        except Exception:
-            # Enter often triggers form submission/navigation
-            print(f"⚠️ Press Enter timeout (navigation in progress) - treating as success")
-            return True
+        # Catch any other exception (timeouts come back as error responses now)
+        except Exception as e:
+            print(f"❌ EXCEPTION in press_enter(): {e}")
+            return self._counted("press_enter", False)
+    
+    def extract(self, spec):
+        """
+        Read listings (name, price, link) from the current page with a single browser_evaluate call, then filter and
+        sort them locally. spec is the "extract" action (see extraction.py for its keys).
+        Returns the list of records (empty if nothing matched) or None if the call failed.
+        """
+        if not self.initialized:
+            print("❌ Browser not initialized!")
+            return None
+        
+        print("🔎 Extracting listings from the page...")
+        
+        result = self.client.send_tool_call("browser_evaluate", {
+            "function": build_extraction_script(spec)
+        })
+        
+        if not result or result.get("error"):
+            print(f"❌ Failed to extract: {result}")
+            return None
+        
+        records = self._evaluate_result_json(result)
+        if not isinstance(records, list):
+            print("⚠️ Unexpected response structure")
+            return None
+        
+        refined = refine_records(records, spec)
+        print(f"✅ Extracted {len(records)} listings, {len(refined)} match")
+        return refined
+    
+    def _evaluate_result_json(self, result):
+        """
+        Value of a browser_evaluate call whose function returned JSON.stringify(...): the result text has it as a JSON
+        string literal on its own line. Returns None if no line decodes.
+        """
+        content = result.get("result", {}).get("content", [])
+        text = content[0].get("text", "") if content else ""
+        for line in text.split('\n'):
+            try:
+                value = json.loads(line)
+                if isinstance(value, str):
+                    value = json.loads(value)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(value, (list, dict)):
+                return value
+        return None
+    
+    def get_storage_state(self):
+        """
+        The current page's origin, localStorage, sessionStorage and cookies (only those scripts can see, HttpOnly
+        cookies stay in the browser profile). Saved in checkpoints so a resumed run is still logged in / keeps its cart.
+        Returns a dictionary or None if the page couldn't be read.
+        """
+        if not self.initialized:
+            print("❌ Browser not initialized!")
+            return None
+        
+        result = self.client.send_tool_call("browser_evaluate", {
+            "function": """() => JSON.stringify({
+                origin: location.origin,
+                localStorage: Object.fromEntries(Object.entries(localStorage)),
+                sessionStorage: Object.fromEntries(Object.entries(sessionStorage)),
+                cookies: document.cookie
+            })"""
+        })
+        if not result or result.get("error"):
+            print(f"⚠️ Failed to read storage: {result}")
+            return None
+        return self._evaluate_result_json(result)
+    
+    def restore_storage_state(self, state):
+        """
+        Put storage saved by get_storage_state back. The browser has to be on a page of the same origin already,
+        the page is reloaded afterwards so its scripts see the restored values. Returns True on success.
+        """
+        if not self.initialized or not state:
+            return False
+        
+        print(f"💾 Restoring storage for {state.get('origin')}")
+        script = """() => {
+            const state = %s;
+            if (location.origin !== state.origin) return 'origin mismatch';
+            for (const [key, value] of Object.entries(state.localStorage || {})) localStorage.setItem(key, value);
+            for (const [key, value] of Object.entries(state.sessionStorage || {})) sessionStorage.setItem(key, value);
+            for (const cookie of (state.cookies || '').split('; ')) if (cookie) document.cookie = cookie + '; path=/';
+            return 'restored';
+        }""" % json.dumps(state)
+        result = self.client.send_tool_call("browser_evaluate", {"function": script})
+        # the script's return value is on the line after the "### Result" header
+        content = (result or {}).get("result", {}).get("content", [])
+        lines = content[0].get("text", "").split('\n') if content else []
+        if not result or result.get("error") or len(lines) < 2 or lines[1].strip('"') != "restored":
+            print(f"⚠️ Failed to restore storage: {result}")
+            return False
+        # reload so the page starts with the restored storage
+        return self.navigate_to_website(self.client.last_url) if self.client.last_url else True
+    
+    def _navigation_state(self):
+        """Current (url, document.readyState), or None if the page didn't answer (still busy loading)"""
+        result = self.client.send_tool_call("browser_evaluate", {
+            "function": "() => document.location.href + ' ' + document.readyState"
+        })
+        if not result or result.get("error"):
+            return None
+        content = result.get("result", {}).get("content", [])
+        if content:
+            lines = content[0].get("text", "").split('\n')
+            if len(lines) > 1 and " " in lines[1]:
+                url, ready_state = lines[1].strip('"').rsplit(" ", 1)
+                return url, ready_state
+        return None
+    
+    def _navigated_after_timeout(self, before_url):
+        """
+        Completion check for a click / key press whose call timed out. Polls the page for up to navigation_wait seconds:
+        - the URL changed: the action started a navigation, success
+        - same URL and the document finished loading: nothing happened, failure
+        Without a known starting URL any finished page counts as success (the old "treat timeout as success" behaviour).
+        """
+        print("⏳ Action timed out, checking whether it started a navigation...")
+        deadline = time.time() + self.navigation_wait
+        while True:
+            state = self._navigation_state()
+            if state:
+                url, ready_state = state
+                if before_url and url != before_url:
+                    print(f"✅ Navigation detected: {url}")
+                    self.client.last_url = url
+                    return True
+                if ready_state == "complete":
+                    if before_url is None:
+                        print("⚠️ Page finished loading, starting URL unknown - treating as success")
+                        return True
+                    print("❌ Action timed out and the page did not navigate")
+                    return False
+            if time.time() >= deadline:
+                print("❌ Page still not ready after the action timed out")
+                return False
+            time.sleep(self.navigation_poll_interval)
 
     def get_current_url(self):
         if not self.initialized:
@@ -234,6 +427,8 @@ class BrowserAutomator:
                 if len(lines) > 1:
                     url = lines[1].strip('"')
                     print(f"✅ Current URL: {url}")
+                    # lets the MCP client return here if the server has to be restarted
+                    self.client.last_url = url
                     return url
             
             # If no content, the response might just be {'success': True}
@@ -0,0 +1,150 @@
+"""
+The purpose of this file is to look at several pages at once. For breadth-heavy goals (compare these 4 laptops, check
+which of these shops has it in stock) visiting every candidate in the main tab costs a few full steps each, one after
+the other. The "explore" action instead hands a list of links to an ExplorerPool: each link is opened in its own
+browser session, snapshotted and boiled down to a short text summary, all at the same time. The Orchestrator puts the
+summaries into the next prompt, so the model sees every candidate in one step and the main tab never leaves its page.
+
+One MCP server drives one tab at a time, so every explorer is its own BrowserAutomator (own MCP session, own browser
+context). Explorers are started on first use, reused for every explore step of a goal, and closed when the goal ends.
+Wall time of an explore step is about the slowest page, not the sum of all of them.
+
+map() runs any function on the explorer sessions the same way, speculative branches (branches.py) use it too.
+"""
+
+import re
+import time
+from queue import Queue, Empty
+
+# ref / cursor markers and link targets say nothing about the page's content
+MARKER = re.compile(r'\s*\[(ref|cursor)=[^\]]*\]')
+
+
+def snapshot_text(result):
+    """YAML text of a browser_snapshot result (without the "Page URL / Page Snapshot" header), "" if there is none"""
+    text = ""
+    if isinstance(result, dict):
+        content = result.get("result", {}).get("content", [])
+        text = content[0].get("text", "") if content else ""
+    if "```yaml" in text:
+        text = text.split("```yaml")[1].split("```")[0]
+    return text.strip()
+
+
+def summarize_snapshot(snapshot, max_chars=1500):
+    """
+    Page content as short text: one line per named element (headings, text, list items, links, prices...), without
+    refs, urls, indentation or repeats, cut at max_chars
+    """
+    lines = []
+    seen = set()
+    used = 0
+    for line in (snapshot or "").splitlines():
+        line = MARKER.sub("", line).strip().lstrip("- ").strip()
+        # "/url: ..." children and unnamed containers ("generic:", "list:")
+        if not line or line.startswith("/url:") or re.fullmatch(r"[\w-]+:?", line):
+            continue
+        line = line.rstrip(":")
+        if line in seen:
+            continue
+        if used + len(line) + 1 > max_chars:
+            lines.append("...")
+            break
+        seen.add(line)
+        lines.append(line)
+        used += len(line) + 1
+    return "\n".join(lines)
+
+
+def format_findings(findings):
+    """Findings as a prompt section (empty string when there are none)"""
+    parts = []
+    for finding in findings:
+        if finding["ok"]:
+            parts.append(f"[{finding['url']}]\n{finding['summary']}")
+        else:
+            parts.append(f"[{finding['url']}]\n(could not be loaded: {finding['error']})")
+    return "\n\n".join(parts)
+
+
+class ExplorerPool:
+
+    def __init__(self, browser_factory, max_tabs=3, summary_chars=1500):
+        """
+        browser_factory: builds one explorer browser (BrowserAutomator, FakeBrowser in tests)
+        max_tabs: how many pages are open at the same time (and the most explorer sessions ever started)
+        summary_chars: size of each page summary
+        """
+        self.browser_factory = browser_factory
+        self.max_tabs = max_tabs
+        self.summary_chars = summary_chars
+        # initialized explorers not visiting a page right now
+        self.idle = Queue()
+        self.browsers = []
+
+    def _acquire(self):
+        """An idle explorer, or a new one if all are busy. None if it won't start"""
+        try:
+            return self.idle.get_nowait()
+        except Empty:
+            pass
+        # each explore step runs at most max_tabs visits, so a new explorer is only needed while we have fewer
+        browser = self.browser_factory()
+        if not browser.initialize():
+            browser.client.close()
+            return None
+        self.browsers.append(browser)
+        return browser
+
+    def _run(self, work, item):
+        """work(browser, item) on an explorer session, the exception instead of the result if it raised"""
+        browser = self._acquire()
+        if browser is None:
+            return RuntimeError("explorer browser did not start")
+        try:
+            return work(browser, item)
+        except Exception as e:
+            return e
+        finally:
+            self.idle.put(browser)
+
+    def map(self, work, items):
+        """
+        Call work(browser, item) for every item at the same time (max_tabs at once), each on an explorer session of
+        its own. Results come back in item order, a call that raised (or got no session) returns its exception.
+        """
+        if not items:
+            return []
+        # imported here like in LLMBackend.complete_batch, most goals never explore
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(self.max_tabs, len(items))) as pool:
+            return list(pool.map(lambda item: self._run(work, item), items))
+
+    def _visit(self, browser, url):
+        """Open one page in an explorer and summarize it"""
+        start = time.time()
+        if not browser.navigate_to_website(url):
+            return {"url": url, "ok": False, "error": "navigation failed", "seconds": time.time() - start}
+        summary = summarize_snapshot(snapshot_text(browser.take_page_snapshot()), self.summary_chars)
+        if not summary:
+            return {"url": url, "ok": False, "error": "empty snapshot", "seconds": time.time() - start}
+        return {"url": url, "ok": True, "summary": summary, "seconds": time.time() - start}
+
+    def explore(self, urls):
+        """Visit the urls concurrently (max_tabs at a time), returns one finding per url in the same order"""
+        findings = []
+        for url, finding in zip(urls, self.map(self._visit, urls)):
+            if isinstance(finding, Exception):
+                finding = {"url": url, "ok": False, "error": str(finding), "seconds": 0.0}
+            findings.append(finding)
+        return findings
+
+    def close(self):
+        """Close every explorer session"""
+        for browser in self.browsers:
+            try:
+                browser.client.close()
+            except Exception as e:
+                print(f"⚠️ Failed to close explorer: {e}")
+        self.browsers = []
+        self.idle = Queue()
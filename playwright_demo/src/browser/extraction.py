@@ -0,0 +1,174 @@
+"""
+The purpose of this file is to pull listings (name, price, link) straight out of the page instead of having the LLM
+read them from a huge snapshot.
+
+build_extraction_script() turns an extraction spec into one browser_evaluate function that returns compact JSON
+records. refine_records() then filters, sorts and trims them locally, so "cheapest laptop under $500" is answered
+without another LLM call. That only holds when the spec says everything the goal asks for (spec_covers_goal());
+otherwise the records go back to the model, which decides whether they answer the goal.
+
+Spec (the "extract" action from the model, every key optional):
+    selector - CSS selector matching one element per listing. Without it, listings are found by looking for the
+               smallest element around each link that also shows a price
+    fields - {"name": css, "price": css, "link": "css@href"} overrides for reading each field inside a listing
+    max_price / min_price - price range to keep
+    contains - words that must all appear in the name (case-insensitive)
+    sort - "price_asc" (default when prices are present) or "price_desc"
+    limit - how many records to keep (default 5)
+"""
+
+import re
+import json
+
+# the browser never sends back more listings than this, however many the page has
+MAX_RECORDS = 50
+DEFAULT_LIMIT = 5
+
+PRICE_PATTERN = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+EXTRACTION_SCRIPT = """() => {
+    const spec = %s;
+    const priceRe = /[$€£]\\s?\\d[\\d,]*(?:\\.\\d+)?/;
+    const text = el => ((el && (el.innerText || el.textContent)) || '').trim();
+    const pick = (root, field) => {
+        const [css, attr] = field.split('@');
+        const el = css ? root.querySelector(css) : root;
+        if (!el) return null;
+        return attr ? el.getAttribute(attr) : text(el);
+    };
+
+    let listings = [];
+    if (spec.selector) {
+        listings = Array.from(document.querySelectorAll(spec.selector));
+    } else {
+        // smallest ancestor (up to 6 levels) of each link whose text contains a price
+        const seen = new Set();
+        for (const link of document.querySelectorAll('a[href]')) {
+            let node = link, depth = 0;
+            while (node && depth < 6 && !priceRe.test(text(node))) { node = node.parentElement; depth++; }
+            if (!node || depth >= 6 || seen.has(node)) continue;
+            seen.add(node);
+            listings.push(node);
+        }
+    }
+
+    const fields = spec.fields || {};
+    const records = listings.slice(0, %d).map(listing => {
+        const links = listing.matches('a[href]') ? [listing] : Array.from(listing.querySelectorAll('a[href]'));
+        const best = links.sort((a, b) => text(b).length - text(a).length)[0];
+        const price = text(listing).match(priceRe);
+        return {
+            name: (fields.name ? pick(listing, fields.name) : text(best || listing).split('\\n')[0] || '').slice(0, 200),
+            price: fields.price ? pick(listing, fields.price) : (price ? price[0] : null),
+            link: fields.link ? pick(listing, fields.link) : (best ? best.href : null)
+        };
+    });
+    return JSON.stringify(records);
+}"""
+
+
+def build_extraction_script(spec):
+    """The browser_evaluate function for a spec (only selector/fields matter in the browser)"""
+    browser_spec = {key: spec[key] for key in ("selector", "fields") if spec.get(key)}
+    return EXTRACTION_SCRIPT % (json.dumps(browser_spec), MAX_RECORDS)
+
+
+def parse_price(text):
+    """"$1,299.99" -> 1299.99, None if there's no number"""
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return float(text)
+    match = PRICE_PATTERN.search(str(text))
+    if not match:
+        return None
+    try:
+        return float(match.group().replace(",", ""))
+    except ValueError:
+        return None
+
+
+def refine_records(records, spec):
+    """Filter, de-duplicate, sort and trim extracted records locally according to the spec"""
+    words = str(spec.get("contains") or "").lower().split()
+    max_price = parse_price(spec.get("max_price"))
+    min_price = parse_price(spec.get("min_price"))
+
+    refined = []
+    seen_links = set()
+    for record in records:
+        name = (record.get("name") or "").strip()
+        if not name:
+            continue
+        # the same product is often linked from its image and its title
+        link = record.get("link")
+        if link and link in seen_links:
+            continue
+        price_value = parse_price(record.get("price"))
+        if max_price is not None and (price_value is None or price_value > max_price):
+            continue
+        if min_price is not None and (price_value is None or price_value < min_price):
+            continue
+        if words and not all(word in name.lower() for word in words):
+            continue
+        if link:
+            seen_links.add(link)
+        refined.append(dict(record, name=name, price_value=price_value))
+
+    sort = spec.get("sort") or ("price_asc" if any(r["price_value"] is not None for r in refined) else None)
+    if sort in ("price_asc", "price_desc"):
+        # records without a price go last either way
+        priced = [r for r in refined if r["price_value"] is not None]
+        unpriced = [r for r in refined if r["price_value"] is None]
+        priced.sort(key=lambda r: r["price_value"], reverse=(sort == "price_desc"))
+        refined = priced + unpriced
+
+    try:
+        limit = int(spec.get("limit") or DEFAULT_LIMIT)
+    except (TypeError, ValueError):
+        limit = DEFAULT_LIMIT
+    return refined[:max(1, limit)]
+
+
+# "under $500", "less than 500 dollars", "at least $20"... -> which spec key the amount belongs to
+PRICE_BOUND_PATTERN = re.compile(
+    r"\b(under|below|less than|cheaper than|at most|up to|max(?:imum)?|over|above|more than|at least|min(?:imum)?)"
+    r"\s*(?:of\s*)?[$€£]?\s?(\d[\d,]*(?:\.\d+)?)", re.IGNORECASE)
+LOWER_BOUND_WORDS = ("over", "above", "more than", "at least", "min")
+
+
+def goal_price_bounds(goal):
+    """{"max_price": 500.0} for "laptop under $500", {} when the goal names no price limit"""
+    bounds = {}
+    for word, amount in PRICE_BOUND_PATTERN.findall(goal or ""):
+        key = "min_price" if word.lower().startswith(LOWER_BOUND_WORDS) else "max_price"
+        bounds.setdefault(key, parse_price(amount))
+    return bounds
+
+
+def spec_covers_goal(goal, spec):
+    """
+    True when the extract spec already applies the goal's price limits, so the refined records are the answer.
+    Goals without a price limit (or with other wishes the spec can't express) are left to the model to judge
+    """
+    bounds = goal_price_bounds(goal)
+    if not bounds:
+        return False
+    # any other wish in the goal ("with 16GB RAM", "rated 4 stars") is something the spec can't check
+    leftover = PRICE_BOUND_PATTERN.sub("", goal)
+    if re.search(r"\b(with|rated|stars?|reviews?|brand|color|colour|size|and)\b", leftover, re.IGNORECASE):
+        return False
+    return all(parse_price(spec.get(key)) == value for key, value in bounds.items())
+
+
+def format_records(records):
+    """Readable answer text, one record per line"""
+    lines = []
+    for number, record in enumerate(records, 1):
+        line = f"{number}. {record['name']}"
+        if record.get("price"):
+            line += f" - {record['price']}"
+        if record.get("link"):
+            line += f" ({record['link']})"
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,207 @@
+"""
+The purpose of this file is to stop the browser downloading things the agent never looks at. The agent only reads the
+DOM / accessibility tree, so images, fonts, media and trackers are wasted bytes and wasted page-ready time.
+
+Profiles:
+    full - load everything (what a normal browser does)
+    no-media - block images, media, fonts and ad/tracker hosts, wait for domcontentloaded instead of load
+    text-only - no-media plus stylesheets and any third-party host
+
+The same profile feeds both kinds of browser we start:
+    - @playwright/mcp server: mcp_server_args() turns it into CLI flags + a config file (SessionMCPClient._start_server)
+    - direct Playwright launchers: ResourceBlocker is a route handler for context.route("**/*", ...)
+"""
+
+import os
+import json
+import tempfile
+import threading
+from urllib.parse import urlparse
+
+LOAD_PROFILES = {
+    "full": {
+        "blocked_resource_types": (),
+        "block_trackers": False,
+        "block_third_party": False,
+        "wait_until": "load",
+    },
+    "no-media": {
+        "blocked_resource_types": ("image", "media", "font"),
+        "block_trackers": True,
+        "block_third_party": False,
+        "wait_until": "domcontentloaded",
+    },
+    "text-only": {
+        "blocked_resource_types": ("image", "media", "font", "stylesheet"),
+        "block_trackers": True,
+        "block_third_party": True,
+        "wait_until": "domcontentloaded",
+    },
+}
+
+DEFAULT_PROFILE = "no-media"
+
+# ad / analytics hosts (subdomains included) blocked by every profile except "full"
+TRACKER_HOSTS = (
+    "doubleclick.net",
+    "googlesyndication.com",
+    "googletagmanager.com",
+    "googletagservices.com",
+    "google-analytics.com",
+    "googleadservices.com",
+    "adservice.google.com",
+    "amazon-adsystem.com",
+    "scorecardresearch.com",
+    "facebook.net",
+    "connect.facebook.net",
+    "hotjar.com",
+    "taboola.com",
+    "outbrain.com",
+    "criteo.com",
+    "criteo.net",
+    "adnxs.com",
+    "quantserve.com",
+)
+
+# ad-serving subdomains that the MCP browser has to block by exact origin
+MCP_TRACKER_ORIGINS = (
+    "https://securepubads.g.doubleclick.net",
+    "https://stats.g.doubleclick.net",
+    "https://googleads.g.doubleclick.net",
+    "https://pagead2.googlesyndication.com",
+    "https://tpc.googlesyndication.com",
+    "https://aax.amazon-adsystem.com",
+    "https://c.amazon-adsystem.com",
+    "https://sb.scorecardresearch.com",
+)
+
+# font CDNs, blocked at origin level for the MCP browser which can't filter by resource type
+FONT_HOSTS = ("fonts.googleapis.com", "fonts.gstatic.com", "use.typekit.net")
+
+
+def get_load_profile(name=None):
+    """
+    Return the profile dictionary for a name (None means BROWSER_LOAD_PROFILE env var, then the default).
+    With VISUAL_FALLBACK=1 the default is "full": no-media turns images off, and the screenshots the fallback
+    sends the model would show empty boxes where the product photos, icons and image buttons are.
+    """
+    default = "full" if os.getenv("VISUAL_FALLBACK", "0") == "1" else DEFAULT_PROFILE
+    name = name or os.getenv("BROWSER_LOAD_PROFILE", default)
+    if name not in LOAD_PROFILES:
+        raise ValueError(f"Unknown load profile '{name}', expected one of: {', '.join(LOAD_PROFILES)}")
+    return dict(LOAD_PROFILES[name], name=name)
+
+
+def _host_matches(host, hosts):
+    """True if host is one of hosts or a subdomain of one"""
+    return any(host == blocked or host.endswith("." + blocked) for blocked in hosts)
+
+
+def _site(host):
+    """Rough registrable domain (last two labels), enough to tell first-party from third-party"""
+    return ".".join(host.split(".")[-2:])
+
+
+def should_block(profile, resource_type, url, page_url=None):
+    """Decide whether one request should be aborted under this profile"""
+    if resource_type in profile["blocked_resource_types"]:
+        return True
+
+    host = urlparse(url).hostname or ""
+    if profile["block_trackers"] and _host_matches(host, TRACKER_HOSTS):
+        return True
+
+    if profile["block_third_party"] and page_url and resource_type != "document":
+        page_host = urlparse(page_url).hostname or ""
+        if page_host and _site(host) != _site(page_host):
+            return True
+
+    return False
+
+
+class ResourceBlocker:
+    """
+    Route handler for the synchronous Playwright API: context.route("**/*", ResourceBlocker(profile)).
+    Counts what it let through and what it blocked so runs can report the savings.
+    """
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.blocked = 0
+        self.allowed = 0
+
+    def __call__(self, route):
+        request = route.request
+        # the page the request belongs to (frame can be gone for late requests, then only type/host rules apply)
+        try:
+            page_url = request.frame.page.url
+        except Exception:
+            page_url = None
+
+        if should_block(self.profile, request.resource_type, request.url, page_url):
+            self.blocked += 1
+            route.abort()
+        else:
+            self.allowed += 1
+            route.continue_()
+
+
+def apply_to_context(context, profile):
+    """Install the profile on a Playwright BrowserContext, returns the ResourceBlocker for its counters"""
+    blocker = ResourceBlocker(profile)
+    if profile["blocked_resource_types"] or profile["block_trackers"] or profile["block_third_party"]:
+        context.route("**/*", blocker)
+    return blocker
+
+
+def chromium_launch_args(profile):
+    """Chromium command line switches that approximate the profile's resource type blocking"""
+    launch_args = []
+    if "image" in profile["blocked_resource_types"]:
+        launch_args.append("--blink-settings=imagesEnabled=false")
+    if "media" in profile["blocked_resource_types"]:
+        launch_args.append("--autoplay-policy=user-gesture-required")
+    return launch_args
+
+
+def mcp_server_args(profile, config_dir=None):
+    """
+    Extra command line arguments for `npx @playwright/mcp` that apply the profile.
+
+    The MCP browser can't filter by resource type, so the closest equivalents are used: Chromium's image setting
+    and autoplay policy via a config file, blocked origins for trackers/fonts, and --image-responses omit for
+    text-only runs. Stylesheets and third-party filtering are not available through the MCP server.
+    """
+    if profile["name"] == "full":
+        return []
+
+    launch_args = chromium_launch_args(profile)
+    blocked_hosts = list(TRACKER_HOSTS) if profile["block_trackers"] else []
+    if "font" in profile["blocked_resource_types"]:
+        blocked_hosts.extend(FONT_HOSTS)
+
+    # blockedOrigins matches whole origins (no subdomain wildcard), so list the usual www./ad-serving variants too
+    blocked_origins = []
+    for host in blocked_hosts:
+        blocked_origins.extend([f"https://{host}", f"https://www.{host}"])
+    if profile["block_trackers"]:
+        blocked_origins.extend(MCP_TRACKER_ORIGINS)
+
+    config = {
+        "browser": {"launchOptions": {"args": launch_args}},
+        "network": {"blockedOrigins": blocked_origins},
+    }
+
+    config_dir = config_dir or tempfile.gettempdir()
+    config_path = os.path.join(config_dir, f"playwright-mcp-{profile['name']}.json")
+    # every client starting a server rewrites this file: write a temp file (unique per process and thread) and
+    # swap it in, so a server starting meanwhile never reads half a config
+    temp_path = f"{config_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    os.replace(temp_path, config_path)
+
+    args = ["--config", config_path]
+    if profile["name"] == "text-only":
+        args.extend(["--image-responses", "omit"])
+    return args
@@ -0,0 +1,74 @@
+"""
+The purpose of this file is to save a goal's progress after every step so a failed or crashed run can pick up where it
+stopped instead of starting over from start_url and paying for every LLM call again.
+
+A checkpoint is one JSON file per run id:
+    goal, start_url - what the run is doing
+    step - last finished step
+    current_url - page the browser was on after that step
+    storage - the page's localStorage / sessionStorage / script-visible cookies (see BrowserAutomator.get_storage_state)
+    history - ActionHistory.to_dict(), so the prompt still knows what was already tried
+    recent_failures, last_action - router / fast path state
+    status - "running" while resumable, "done" once the goal completed, "stopped" when it ran out of steps
+
+Files are written to a temp file and renamed, so a crash mid-write leaves the previous checkpoint intact.
+"""
+
+import os
+import json
+import time
+import threading
+
+DEFAULT_CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", os.path.join(os.path.dirname(__file__), "..", "checkpoints"))
+
+
+class CheckpointStore:
+
+    def __init__(self, directory=None):
+        self.directory = os.path.abspath(directory or DEFAULT_CHECKPOINT_DIR)
+
+    def path(self, run_id):
+        """File for a run id (anything but letters, digits, - and _ is replaced)"""
+        safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in str(run_id))
+        return os.path.join(self.directory, f"{safe}.json")
+
+    def save(self, run_id, checkpoint):
+        """Write (replace) the checkpoint for a run"""
+        os.makedirs(self.directory, exist_ok=True)
+        checkpoint = dict(checkpoint, run_id=run_id, updated_at=time.time())
+        path = self.path(run_id)
+        # per process and thread, so two saves of the same run never share a temp file
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f, default=str)
+        os.replace(temp_path, path)
+
+    def load(self, run_id):
+        """The saved checkpoint for a run, or None"""
+        try:
+            with open(self.path(run_id), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def resumable(self, run_id):
+        """The checkpoint if the run stopped part way (status "running"), otherwise None"""
+        checkpoint = self.load(run_id)
+        if checkpoint and checkpoint.get("status") == "running":
+            return checkpoint
+        return None
+
+    def mark(self, run_id, status, result=None):
+        """Update the status (and result) of an existing checkpoint"""
+        checkpoint = self.load(run_id)
+        if checkpoint:
+            checkpoint["status"] = status
+            if result is not None:
+                checkpoint["result"] = result
+            self.save(run_id, checkpoint)
+
+    def delete(self, run_id):
+        try:
+            os.remove(self.path(run_id))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,91 @@
+"""
+The purpose of this file is to let other programs submit goals and read results over HTTP (localhost by default),
+using only the standard library.
+
+    POST /jobs            {"goal": "...", "start_url": "https://...", "max_attempts": 3}  -> {"id": 1}
+    GET  /jobs            newest jobs (?status=queued|running|done|failed, ?limit=50)
+    GET  /jobs/<id>       one job with its status, result / error
+    GET  /stats           number of jobs per status
+    GET  /metrics         agent metrics of this process in the Prometheus text format (src/utils/metrics.py)
+"""
+
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from src.utils.metrics import REGISTRY
+
+
+def make_handler(queue):
+    """Request handler class bound to one JobQueue"""
+
+    class JobRequestHandler(BaseHTTPRequestHandler):
+
+        def _send_json(self, status, body):
+            payload = json.dumps(body, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = [part for part in url.path.split("/") if part]
+            query = parse_qs(url.query)
+
+            if parts == ["stats"]:
+                return self._send_json(200, queue.counts())
+            if parts == ["metrics"]:
+                payload = REGISTRY.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                return
+            if parts == ["jobs"]:
+                try:
+                    limit = int(query.get("limit", ["50"])[0])
+                except ValueError:
+                    return self._send_json(400, {"error": "limit must be a number"})
+                return self._send_json(200, queue.list_jobs(query.get("status", [None])[0], limit))
+            if len(parts) == 2 and parts[0] == "jobs" and parts[1].isdigit():
+                job = queue.get(int(parts[1]))
+                if job is None:
+                    return self._send_json(404, {"error": f"job {parts[1]} not found"})
+                return self._send_json(200, job)
+            return self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            if urlparse(self.path).path.rstrip("/") != "/jobs":
+                return self._send_json(404, {"error": "not found"})
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except (ValueError, json.JSONDecodeError):
+                return self._send_json(400, {"error": "body must be JSON"})
+            if not isinstance(body, dict) or not str(body.get("goal", "")).strip():
+                return self._send_json(400, {"error": "'goal' is required"})
+
+            try:
+                max_attempts = int(body.get("max_attempts", 3))
+            except (TypeError, ValueError):
+                return self._send_json(400, {"error": "max_attempts must be a number"})
+
+            job_id = queue.submit(
+                str(body["goal"]).strip(),
+                start_url=body.get("start_url") or "https://google.com",
+                max_attempts=max_attempts
+            )
+            return self._send_json(201, {"id": job_id})
+
+        def log_message(self, format, *args):
+            print(f"🌐 HTTP {self.address_string()} {format % args}")
+
+    return JobRequestHandler
+
+
+def make_server(queue, host="127.0.0.1", port=8765):
+    """HTTP server for the queue (call serve_forever() on it, port 0 picks a free port)"""
+    return ThreadingHTTPServer((host, port), make_handler(queue))
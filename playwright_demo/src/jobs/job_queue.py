@@ -0,0 +1,192 @@
+"""
+The purpose of this file is to keep a durable queue of goals for the agent to work through. Jobs live in a SQLite
+database, so they survive restarts and any number of workers (threads, processes, or hosts sharing the file) can pull
+from the same queue.
+
+A worker claims a job by taking a lease on it: the job is marked running and owned by that worker until the lease
+expires. Workers extend the lease (heartbeat) while a goal runs. If a worker dies, its lease runs out and the job is
+handed to the next worker that asks. Failed attempts go back in the queue until max_attempts is used up.
+
+Job states:
+    queued - waiting for a worker (new, or retried after a failed attempt)
+    running - leased by a worker
+    done - finished, result holds the agent's answer
+    failed - every attempt failed (or the lease ran out on the last one), error holds the last error
+
+Note: several hosts can share the queue only through a filesystem with working file locks (a local disk, or a network
+share that supports them). SQLite over plain NFS can corrupt the database.
+"""
+
+import os
+import time
+import json
+import sqlite3
+
+DEFAULT_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", os.path.join(os.path.dirname(__file__), "..", "..", "jobs.sqlite3"))
+
+
+class JobQueue:
+
+    def __init__(self, path=None):
+        self.path = os.path.abspath(path or DEFAULT_QUEUE_PATH)
+        with self._connect() as connection:
+            # WAL lets workers read the queue while another one is writing
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                """CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    goal TEXT NOT NULL,
+                    start_url TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL DEFAULT 3,
+                    worker TEXT,
+                    lease_expires REAL,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )"""
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)")
+
+    def _connect(self):
+        """
+        New connection per call: connections can't be shared between threads, and opening one is cheap next to an
+        agent run. isolation_level=None means we issue BEGIN ourselves, timeout waits out other workers' writes.
+        """
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        return _ClosingConnection(connection)
+
+    def submit(self, goal, start_url="https://google.com", max_attempts=3):
+        """Add a goal to the queue, returns the job id"""
+        now = time.time()
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "INSERT INTO jobs (goal, start_url, max_attempts, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (goal, start_url, max_attempts, now, now)
+            )
+            return cursor.lastrowid
+
+    def claim(self, worker_id, lease_seconds=300):
+        """
+        Lease the oldest job that is queued (or whose lease expired) to this worker. Returns the job dictionary or
+        None if there's nothing to do. BEGIN IMMEDIATE takes the write lock first, so two workers can never claim the
+        same job.
+        """
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                # a worker died on the last allowed attempt: that job is out of retries
+                connection.execute(
+                    """UPDATE jobs SET status = 'failed', error = COALESCE(error, 'lease expired'), worker = NULL,
+                       lease_expires = NULL, updated_at = ?
+                       WHERE status = 'running' AND lease_expires < ? AND attempts >= max_attempts""",
+                    (now, now)
+                )
+                row = connection.execute(
+                    """SELECT id FROM jobs
+                       WHERE status = 'queued' OR (status = 'running' AND lease_expires < ?)
+                       ORDER BY id LIMIT 1""",
+                    (now,)
+                ).fetchone()
+                if row is None:
+                    connection.execute("COMMIT")
+                    return None
+                connection.execute(
+                    """UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, lease_expires = ?,
+                       updated_at = ? WHERE id = ?""",
+                    (worker_id, now + lease_seconds, now, row["id"])
+                )
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        return self.get(row["id"])
+
+    def heartbeat(self, job_id, worker_id, lease_seconds=300):
+        """Extend the lease while the goal is still running. False means the job is no longer ours"""
+        now = time.time()
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (now + lease_seconds, now, job_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id, worker_id, result):
+        """Store the result of a successful run. False if the lease was lost (another worker owns the job now)"""
+        now = time.time()
+        with self._connect() as connection:
+            cursor = connection.execute(
+                """UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_expires = NULL, updated_at = ?
+                   WHERE id = ? AND worker = ? AND status = 'running'""",
+                (result, now, job_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id, worker_id, error, retry=True):
+        """
+        Record a failed attempt: back to queued if it has attempts left, otherwise failed. retry=False fails the job
+        right away (the goal ended on its own, another attempt would end the same way).
+        False if the lease was lost.
+        """
+        now = time.time()
+        retry = 1 if retry else 0
+        with self._connect() as connection:
+            cursor = connection.execute(
+                """UPDATE jobs SET
+                       status = CASE WHEN ? AND attempts < max_attempts THEN 'queued' ELSE 'failed' END,
+                       worker = CASE WHEN ? AND attempts < max_attempts THEN NULL ELSE worker END,
+                       error = ?, lease_expires = NULL, updated_at = ?
+                   WHERE id = ? AND worker = ? AND status = 'running'""",
+                (retry, retry, error, now, job_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def get(self, job_id):
+        """One job as a dictionary, or None"""
+        with self._connect() as connection:
+            row = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list_jobs(self, status=None, limit=50):
+        """Newest jobs first, optionally only one status"""
+        query = "SELECT * FROM jobs"
+        params = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        with self._connect() as connection:
+            return [dict(row) for row in connection.execute(query, params).fetchall()]
+
+    def counts(self):
+        """Number of jobs per status, e.g. {"queued": 3, "running": 1, "done": 10, "failed": 0}"""
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        with self._connect() as connection:
+            for row in connection.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"):
+                counts[row["status"]] = row["n"]
+        return counts
+
+
+class _ClosingConnection:
+    """sqlite3's own context manager only commits, this one also closes the connection"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self.connection
+
+    def __exit__(self, *exc_info):
+        self.connection.close()
+        return False
+
+
+def job_to_json(job):
+    """JSON text for a job dictionary (CLI and HTTP output)"""
+    return json.dumps(job, indent=2, default=str)
@@ -0,0 +1,146 @@
+"""
+The purpose of this file is to start each goal in a fresh process without paying for Python startup and the agent's
+imports every time. A WarmRunner uses multiprocessing's forkserver: one small server process imports everything the
+agent needs once (PRELOAD_MODULES), then forks a copy of itself for every goal. The child starts with the modules
+already loaded, runs one goal in its own Orchestrator and sends the result back over a pipe.
+
+Why a separate process per goal: a crash, leak or stuck browser in one goal can't take the worker down with it, and
+memory goes back to the OS when the goal ends. Why a forkserver instead of os.fork() in the worker: the worker runs
+threads (heartbeats, other jobs), and forking a threaded process can copy a lock someone else was holding. The
+forkserver is single threaded, so forking it is safe.
+
+forkserver only exists on POSIX; on Windows the runner falls back to spawn (a fresh interpreter per goal, slower).
+
+Every goal process leads its own process group, so the MCP server and the browser it starts are in that group too. A
+goal that runs past goal_timeout gets SIGTERM for the whole group, then SIGKILL after kill_grace seconds: the
+browser goes down with the goal instead of being left running without a parent (a killed goal never reaches
+SessionMCPClient.close()). Windows has no process groups, there only the goal process itself is killed.
+
+The goal process also sends back its metrics (src/utils/metrics.py), the runner adds them to this process's registry
+so the worker's /metrics covers goals that ran in children.
+"""
+
+import os
+import time
+import signal
+import multiprocessing
+from multiprocessing.connection import wait
+
+from src.jobs.worker import default_orchestrator_factory
+from src.utils.metrics import REGISTRY
+
+# imported once in the forkserver, every goal process starts with them loaded. Missing optional packages are skipped.
+PRELOAD_MODULES = [
+    "src.orchestrator",
+    "src.browser.browser_actions",
+    "src.ai.ai_client",
+    "anthropic",
+    "dotenv",
+]
+
+
+def _run_goal(orchestrator_factory, goal, start_url, run_id, connection):
+    """Body of a goal process: run the goal, send back (result, succeeded, stopped, metrics of this process)"""
+    # own process group, everything this goal starts (MCP server, browser) can be stopped together
+    if hasattr(os, "setsid"):
+        os.setsid()
+    try:
+        orchestrator = orchestrator_factory()
+        result = orchestrator.execute_goal(goal, start_url=start_url, run_id=run_id)
+        connection.send((result, getattr(orchestrator, "goal_achieved", False),
+                         getattr(orchestrator, "goal_stopped", False), REGISTRY.export()))
+    except Exception as e:
+        connection.send((f"Worker error: {e}", False, False, REGISTRY.export()))
+    finally:
+        connection.close()
+
+
+def _noop():
+    pass
+
+
+def _signal_group(process, sig):
+    """Send sig to the goal process's group (just the process where there are no groups). Gone already is fine"""
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, sig)
+        elif process.is_alive():
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+class WarmRunner:
+
+    def __init__(self, orchestrator_factory=None, preload=None, goal_timeout=None, kill_grace=5):
+        """
+        orchestrator_factory: builds the Orchestrator inside the goal process (must be a module level function so it
+            can be sent to the child)
+        preload: modules the forkserver imports up front (default PRELOAD_MODULES)
+        goal_timeout: seconds before a goal process (and the browser it started) is stopped (None = no limit)
+        kill_grace: seconds between SIGTERM and SIGKILL when a goal is stopped
+        """
+        self.orchestrator_factory = orchestrator_factory or default_orchestrator_factory
+        self.goal_timeout = goal_timeout
+        self.kill_grace = kill_grace
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            self.context = multiprocessing.get_context("forkserver")
+            # the forkserver is shared by the whole process, the preload list only counts before it starts
+            self.context.set_forkserver_preload(list(PRELOAD_MODULES if preload is None else preload))
+        else:
+            self.context = multiprocessing.get_context("spawn")
+        self.start_method = self.context.get_start_method()
+
+    def warm_up(self):
+        """
+        Start the forkserver now (imports the preload modules) instead of on the first goal. Returns the seconds it
+        takes to start and finish an empty process once the server is up, i.e. the per-goal spawn cost from here on.
+        """
+        timings = []
+        for _ in range(2):
+            process = self.context.Process(target=_noop, daemon=True)
+            start = time.perf_counter()
+            process.start()
+            process.join()
+            timings.append(time.perf_counter() - start)
+        # the first start includes launching the server and the imports
+        return timings[-1]
+
+    def run_goal(self, goal, start_url="https://google.com", run_id=None):
+        """
+        Run one goal in a fresh process. Returns (result, succeeded, stopped), like reading orchestrator.goal_achieved
+        and goal_stopped. Timeouts and crashed processes are (error, False, False)
+        """
+        receiver, sender = self.context.Pipe(duplex=False)
+        process = self.context.Process(
+            target=_run_goal,
+            args=(self.orchestrator_factory, goal, start_url, run_id, sender),
+            daemon=True
+        )
+        process.start()
+        # only the child writes, close our copy so recv() sees EOF if the child dies
+        sender.close()
+
+        crashed = False
+        try:
+            if receiver.poll(self.goal_timeout):
+                result, succeeded, stopped, metrics = receiver.recv()
+                # a fresh process per goal, so everything it counted happened during this goal
+                REGISTRY.merge(metrics)
+            else:
+                # SIGTERM lets the server and browser shut down cleanly, whatever is left after kill_grace is killed
+                _signal_group(process, signal.SIGTERM)
+                result, succeeded, stopped = f"Worker error: goal timed out after {self.goal_timeout}s", False, False
+        except EOFError:
+            crashed = True
+        finally:
+            receiver.close()
+        # wait for the goal process to end without reaping it (its pid, the group id, can't be reused meanwhile),
+        # then kill what's left of the group: a timed out or crashed goal never closed its browser
+        wait([process.sentinel], self.kill_grace)
+        _signal_group(process, getattr(signal, "SIGKILL", signal.SIGTERM))
+        process.join()
+
+        if crashed:
+            return f"Worker error: goal process exited with code {process.exitcode}", False, False
+        return result, succeeded, stopped
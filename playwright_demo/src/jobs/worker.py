@@ -0,0 +1,151 @@
+"""
+The purpose of this file is to run queued goals. A JobWorker runs `concurrency` threads, each one claims a job from the
+JobQueue, runs it in its own Orchestrator (own browser / MCP server), and writes the result back. While a goal runs,
+a heartbeat keeps the job's lease alive so other workers leave it alone.
+
+Start more threads, more processes or more hosts on the same queue to get more throughput, every worker just pulls
+the next job. With fork_per_goal=True each goal runs in its own process forked from a warm server that already has the
+agent imported (see warm_runner.py), instead of in the worker thread.
+"""
+
+import os
+import time
+import socket
+import threading
+import traceback
+
+from src.jobs.job_queue import JobQueue
+
+
+def default_orchestrator_factory():
+    """Fresh Orchestrator per job, imported lazily so the queue can be used without the agent's dependencies"""
+    from src.orchestrator import Orchestrator
+    return Orchestrator()
+
+
+class JobWorker:
+
+    def __init__(self, queue=None, concurrency=1, lease_seconds=300, poll_interval=2, orchestrator_factory=None,
+                 worker_name=None, fork_per_goal=False, goal_timeout=1800):
+        """
+        queue: JobQueue to pull from (default queue file if None)
+        concurrency: how many goals run at the same time in this process
+        lease_seconds: how long a claimed job stays ours without a heartbeat
+        poll_interval: seconds to wait before asking again when the queue is empty
+        orchestrator_factory: builds the Orchestrator for each job (swap in fakes for tests)
+        fork_per_goal: run every goal in a fresh process forked from a preloaded server (WarmRunner)
+        goal_timeout: with fork_per_goal, seconds before a goal's process and browser are stopped and the job fails
+            (None = no limit). A goal running in a thread can't be stopped from outside, GOAL_MAX_SECONDS covers it
+        """
+        self.queue = queue or JobQueue()
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.orchestrator_factory = orchestrator_factory or default_orchestrator_factory
+        self.runner = None
+        if fork_per_goal:
+            from src.jobs.warm_runner import WarmRunner
+            self.runner = WarmRunner(self.orchestrator_factory, goal_timeout=goal_timeout)
+        # host + pid identifies this process across hosts sharing the queue, threads add their number
+        self.worker_name = worker_name or f"{socket.gethostname()}-{os.getpid()}"
+        self.stop_event = threading.Event()
+        self.threads = []
+        # totals for this process
+        self.completed = 0
+        self.failed = 0
+        self.lock = threading.Lock()
+
+    def run_once(self, worker_id=None):
+        """Claim and run one job. Returns the finished job dictionary, or None if the queue was empty"""
+        worker_id = worker_id or f"{self.worker_name}-0"
+        job = self.queue.claim(worker_id, self.lease_seconds)
+        if job is None:
+            return None
+
+        print(f"📥 [{worker_id}] Job {job['id']} (attempt {job['attempts']} of {job['max_attempts']}): {job['goal']}")
+        heartbeat_stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job["id"], worker_id, heartbeat_stop), daemon=True)
+        heartbeat.start()
+
+        try:
+            # a retried job resumes from the checkpoint its last attempt left behind
+            run_id = f"job-{job['id']}"
+            if self.runner:
+                result, succeeded, stopped = self.runner.run_goal(job["goal"], start_url=job["start_url"],
+                                                                  run_id=run_id)
+            else:
+                orchestrator = self.orchestrator_factory()
+                result = orchestrator.execute_goal(job["goal"], start_url=job["start_url"], run_id=run_id)
+                succeeded = getattr(orchestrator, "goal_achieved", False)
+                stopped = getattr(orchestrator, "goal_stopped", False)
+        except Exception as e:
+            traceback.print_exc()
+            result = f"Worker error: {e}"
+            succeeded = stopped = False
+        finally:
+            heartbeat_stop.set()
+            heartbeat.join()
+
+        if succeeded:
+            stored = self.queue.complete(job["id"], worker_id, result)
+        else:
+            # out of steps or budget is the goal's answer, only errors and crashes get another attempt
+            stored = self.queue.fail(job["id"], worker_id, result, retry=not stopped)
+        if not stored:
+            print(f"⚠️ [{worker_id}] Lost the lease on job {job['id']}, result discarded")
+
+        with self.lock:
+            if succeeded:
+                self.completed += 1
+            else:
+                self.failed += 1
+        finished = self.queue.get(job["id"])
+        print(f"📤 [{worker_id}] Job {job['id']} -> {finished['status']}")
+        return finished
+
+    def _heartbeat(self, job_id, worker_id, stop):
+        """Extend the lease every third of its length until the job finishes"""
+        while not stop.wait(self.lease_seconds / 3):
+            if not self.queue.heartbeat(job_id, worker_id, self.lease_seconds):
+                print(f"⚠️ [{worker_id}] Job {job_id} is no longer leased to us")
+                return
+
+    def _loop(self, number):
+        worker_id = f"{self.worker_name}-{number}"
+        while not self.stop_event.is_set():
+            try:
+                job = self.run_once(worker_id)
+            except Exception:
+                # a broken queue file / locked database shouldn't kill the thread, try again after a pause
+                traceback.print_exc()
+                job = None
+            if job is None:
+                self.stop_event.wait(self.poll_interval)
+
+    def start(self):
+        """Start the worker threads (returns right away)"""
+        print(f"👷 Worker {self.worker_name}: {self.concurrency} threads on {self.queue.path}")
+        if self.runner:
+            # import everything once before the first job instead of during it
+            seconds = self.runner.warm_up()
+            print(f"🔥 Warm {self.runner.start_method} server ready, goal processes start in {seconds * 1000:.0f}ms")
+        for number in range(self.concurrency):
+            thread = threading.Thread(target=self._loop, args=(number,), daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self, timeout=None):
+        """Ask the threads to stop after their current job and wait for them"""
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout)
+
+    def run_forever(self):
+        """Start the threads and block until Ctrl+C"""
+        self.start()
+        try:
+            while not self.stop_event.is_set():
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print("\n🛑 Stopping after the current jobs...")
+        self.stop()
@@ -9,33 +9,117 @@ import subprocess
 import json
 # module that lets your run muliple pieces of code at the same time (In this case so the notifications dont get mixed with the reponses?)
 import threading
-# importing the data structure
-from queue import Queue
+# importing the data structures (Empty/Full are raised when a queue wait times out, deque keeps the stderr tail)
+from queue import Queue, Empty, Full
+from collections import deque
+# used to pick how the server command is launched (Windows needs the shell to find npx.cmd)
+import os
+# measures how long each tool takes, feeds the adaptive timeouts
+import time
+# which resources the MCP browser should skip loading
+from src.browser.load_profile import get_load_profile, mcp_server_args
+# tools the server offers, cached on disk per server version, used to check calls before sending them
+from src.tool_catalog import ToolCatalog
+from src.utils.profiler import NO_PHASE
+from src.utils.metrics import MCP_SECONDS, MCP_ERRORS, ACTIVE_SESSIONS
+
+# tools that are safe to send again after the server died mid-call (reading the page, or going to a URL).
+# A click, fill or key press may already have happened before the crash, sending it twice could submit twice
+IDEMPOTENT_TOOLS = frozenset((
+    "browser_snapshot", "browser_navigate", "browser_evaluate", "browser_tabs",
+    "browser_take_screenshot", "browser_console_messages", "browser_network_requests",
+))
+
+
+def current_rss_bytes():
+    """Resident memory of this process in bytes (None if the platform doesn't tell us)"""
+    try:
+        # Linux: second field of /proc/self/statm is resident pages
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        # macOS/BSD fallback: peak (not current) RSS, in bytes on macOS and kilobytes elsewhere
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return None
+
 
 # The SessionMCPClient class that is contains all the necessary functions for client objects
 class SessionMCPClient:
 
-    def __init__(self):
+    def __init__(self, load_profile=None, catalog_dir=None, max_notifications=100, stderr_lines=50, profiler=None):
         """
         Constructor that initializes stdio-based MCP client variables
+
+        load_profile: "full", "no-media" or "text-only" (see src/browser/load_profile.py). Defaults to the
+        BROWSER_LOAD_PROFILE env var, then "no-media".
+        catalog_dir: where the tool catalog is cached (defaults to MCP_CATALOG_DIR, then a folder in the temp dir).
+        max_notifications / stderr_lines: how many unread server notifications and stderr lines are kept, so a session
+        running for hours uses the same memory as a short one.
+        profiler: optional RunProfiler (src/utils/profiler.py), tool calls are tagged "mcp:<tool>" in its samples
         """
+        # Resource blocking profile the MCP browser is started with
+        self.load_profile = get_load_profile(load_profile)
+        # Command that starts the MCP server (load profile flags are added to it)
+        self.server_command = ['npx', '@playwright/mcp']
         # Once the server starts this holds a Popen object. This is the handle to the running MCP server subprocess - it's the "remote control" that lets you talk to it.
         self.process = None
         # Used to generate unique ID's for each JSON-RPC request sent the the server.
         self.request_id = 1
         # This stores the session identifier after the MCP connection is established
         self.session_id = None
-        # Thread safe data structure that stores server responses added by the backround thread and retrieved by the main thread.
-        self.response_queue = Queue()
+        # Thread safe data structure that stores server notifications added by the backround thread and retrieved by the main thread.
+        # Bounded: when nobody reads it, the oldest is dropped right away (counted in notifications_dropped)
+        self.response_queue = Queue(maxsize=max_notifications)
+        self.notifications_dropped = 0
         # Holds the background Thread object that continuously reads stdout and fills response_queueariable that will continuily fill response_queue
         self.reader_thread = None
+        # Requests still waiting for an answer: request id -> one-slot Queue the reader thread drops the response into.
+        # Lets the supervisor fail every waiting request the moment the server dies instead of each one timing out.
+        self.pending = {}
+        self.pending_lock = threading.Lock()
+        # Last lines the server wrote to stderr, printed when it crashes so we can see why
+        self.stderr_tail = deque(maxlen=stderr_lines)
+        # Supervisor settings: restart a crashed server (at most max_restarts times) and go back to last_url
+        self.auto_restart = True
+        self.max_restarts = 3
+        self.restart_count = 0
+        self.last_url = None
+        # only these are retried on the restarted server, see IDEMPOTENT_TOOLS
+        self.idempotent_tools = IDEMPOTENT_TOOLS
+        # Timeout policy: each tool gets its own timeout learned from how long it usually takes (see timeout_for).
+        # Until a tool has min_samples measurements it gets default_timeout. timeout_overrides pins a tool/method to a fixed value.
+        self.default_timeout = 30
+        self.min_timeout = 5
+        self.max_timeout = 120
+        self.timeout_factor = 3
+        self.min_samples = 5
+        self.timeout_overrides = {}
+        # tool name (or method name for non tool calls) -> last 50 latencies in seconds
+        self.latencies = {}
+        # ids of requests we gave up on, their late answers are dropped instead of piling up in response_queue
+        # (a dict used as an ordered set, the oldest ids are forgotten after max_cancelled)
+        self.cancelled = {}
+        self.max_cancelled = 256
+        # Tool names + compiled argument validators, filled from tools/list or the on-disk cache for this server version
+        self.catalog = ToolCatalog(catalog_dir)
+        # serverInfo from the initialize response ({"name", "version"}), the catalog cache key
+        self.server_info = None
+        # set by the Orchestrator when profiling is on, None costs nothing
+        self.profiler = profiler
         
     def get_next_id(self):
         """
         Returns the current request ID, then increments it for the next request. Each ID matches a request to its corresponding response.
         """
-        current = self.request_id
-        self.request_id += 1
+        with self.pending_lock:
+            current = self.request_id
+            self.request_id += 1
         return current
     
     def _start_server(self):
@@ -43,10 +127,13 @@ class SessionMCPClient:
         Launch MCP server subprocess via npx and start daemon thread to continuously read server responses from stdout and place them in response_queue.
         """
         print("=== Starting MCP Server ===")
+        print(f"Load profile: {self.load_profile['name']}")
+        # Base command plus the flags that apply the load profile (blocked images/media/trackers...)
+        command = self.server_command + mcp_server_args(self.load_profile)
         # "Process Open" launches a new program as a separate process and gives you control over it. 
         self.process = subprocess.Popen(
             # This line runs the npx.cmd with @playwright/mcp as an argument. Because 'shell=True' below the line knows to run this with cmd.exe
-            ['npx', '@playwright/mcp'],
+            command,
             # Creates a pipe communication channel for sending data TO the subprocess
             stdin=subprocess.PIPE,
             # Creates a pipe for receiving data FROM the subprocess
@@ -57,40 +144,219 @@ class SessionMCPClient:
             text=True,
             # bufsize=1 with text=True means line buffering - sends/receives complete lines at once when '\n' is written
             bufsize=1,
-            # When shell is true this runs the first command "['npx', '@playwright/mcp']" through the system shell (cmd.exe)
-            shell=True
+            # On Windows the command runs through the system shell (cmd.exe) so npx.cmd is found. Elsewhere the list is
+            # run directly, with shell=True a POSIX shell would silently drop every argument after 'npx'
+            shell=(os.name == "nt")
         )
         
         # Start background thread to read responses
         # Consider the Thread object to be a backround worker that runs code in parallel.
         # Create background worker thread to continuously read server responses. 
         # target=function to run, daemon=True auto-kills thread when main program exits
-        self.reader_thread = threading.Thread(target=self._read_responses, daemon=True)
+        # Each thread gets the process it belongs to, so threads left over from a crashed server can't touch a restarted one
+        self.reader_thread = threading.Thread(target=self._read_responses, args=(self.process,), name="mcp-reader",
+                                              daemon=True)
         # Launch background thread - begins running _read_responses() in parallel with main code
         self.reader_thread.start()
+        # Drain stderr so a chatty server can't fill the pipe and block, keeping the last lines for crash reports
+        threading.Thread(target=self._read_stderr, args=(self.process,), daemon=True).start()
+        # Supervisor thread: waits for the process to exit and fails everything still waiting on it
+        threading.Thread(target=self._supervise, args=(self.process,), daemon=True).start()
         print("✅ Server started")
     
-    def _read_responses(self):
+    def _read_responses(self, process):
         """
-        This is a loop that continues as long as the server as been started AND it is still running. 'self.process.poll() returns None if the process is still running
+        This is a loop that continues as long as the server as been started AND it is still running. readline() returns an empty string once the server closes stdout (exited/crashed), which ends the loop.
+        Responses go to the request waiting on their id, anything else (notifications) goes to response_queue.
         """
-        while self.process and self.process.poll() is None:
+        while True:
             try:
                 # Reads a complete line from the MCP server's stdout pipe and stores it in line
-                line = self.process.stdout.readline()
-                # if there was something to read, we us json loads ()
-                if line:
-                    # strips the whitespaces/newlines at the ends and loads the string into a dictionary
-                    response = json.loads(line.strip())
-                    # add the response dictionary to the back of the queue
-                    self.response_queue.put(response)
-            except:
+                line = process.stdout.readline()
+            except Exception as e:
                 print(f"❌ Background thread error: {e}")
                 break
+            # empty string means end of file, the server is gone
+            if not line:
+                break
+            # skip blank lines
+            if not line.strip():
+                continue
+            try:
+                # strips the whitespaces/newlines at the ends and loads the string into a dictionary
+                response = json.loads(line.strip())
+            except json.JSONDecodeError:
+                print(f"⚠️ Ignoring non-JSON line from server: {line.strip()[:200]}")
+                continue
+            
+            # hand the response to whoever is waiting for this id
+            with self.pending_lock:
+                waiter = self.pending.pop(response.get("id"), None) if isinstance(response, dict) else None
+                late = waiter is None and isinstance(response, dict) and response.get("id") in self.cancelled
+                if late:
+                    self.cancelled.pop(response.get("id"))
+            if waiter:
+                waiter.put(response)
+            elif late:
+                # answer to a request we already cancelled, nobody is waiting for it
+                continue
+            else:
+                # add the response dictionary to the back of the queue
+                self._queue_notification(response)
+        
+        self._fail_pending(process, "MCP server closed its output")
+    
+    def _queue_notification(self, message):
+        """
+        Put a server notification on response_queue, dropping the oldest one if it is full. Never waits: this runs
+        on the reader thread, and every tool response behind the notification would wait with it.
+        """
+        try:
+            self.response_queue.put_nowait(message)
+            return
+        except Full:
+            pass
+        try:
+            self.response_queue.get_nowait()
+        except Empty:
+            pass
+        self.notifications_dropped += 1
+        try:
+            self.response_queue.put_nowait(message)
+        except Full:
+            self.notifications_dropped += 1
     
-    def _send_request(self, method, params=None, is_notification=False):
+    def memory_stats(self):
+        """What this session is holding on to, plus the process RSS. Everything but RSS has a fixed upper bound"""
+        with self.pending_lock:
+            pending = len(self.pending)
+            cancelled = len(self.cancelled)
+        return {
+            "rss_bytes": current_rss_bytes(),
+            "pending_requests": pending,
+            "queued_notifications": self.response_queue.qsize(),
+            "notifications_dropped": self.notifications_dropped,
+            "stderr_lines": len(self.stderr_tail),
+            "cancelled_ids": cancelled,
+            "latency_samples": sum(len(samples) for samples in self.latencies.values()),
+            "catalog_tools": len(self.catalog.tools),
+        }
+    
+    def _read_stderr(self, process):
+        """Keep reading the server's stderr into stderr_tail until the pipe closes"""
+        try:
+            for line in process.stderr:
+                self.stderr_tail.append(line.rstrip())
+        except Exception:
+            pass
+    
+    def _supervise(self, process):
+        """Wait for the server process to exit, then immediately fail any request still waiting on it"""
+        exit_code = process.wait()
+        # a close() we asked for isn't a crash
+        if process is self.process and self.session_id:
+            print(f"❌ MCP server exited unexpectedly (exit code {exit_code})")
+            for line in list(self.stderr_tail)[-10:]:
+                print(f"   stderr: {line}")
+        self._fail_pending(process, f"MCP server exited (exit code {exit_code})")
+    
+    def _fail_pending(self, process, reason):
+        """Answer every waiting request with an error response so callers stop waiting right away"""
+        # a thread from an old, already replaced server must not fail requests sent to the new one
+        if process is not self.process:
+            return
+        with self.pending_lock:
+            waiting = list(self.pending.items())
+            self.pending.clear()
+        for request_id, waiter in waiting:
+            waiter.put(self._crash_response(request_id, reason))
+    
+    def _crash_response(self, request_id, reason):
+        """JSON-RPC error response used when the server died before answering"""
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "error": {"code": -32000, "message": reason, "server_crashed": True}
+        }
+    
+    def _timeout_response(self, request_id, key, timeout):
+        """JSON-RPC error response used when a request took longer than its timeout and was cancelled"""
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "error": {"code": -32001, "message": f"{key} timed out after {timeout:.1f}s", "timed_out": True}
+        }
+    
+    def latency_percentile(self, key, percentile):
+        """Observed latency (seconds) of a tool/method at a percentile (0-100), None if it was never measured"""
+        samples = sorted(self.latencies.get(key, ()))
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(percentile / 100 * (len(samples) - 1))))
+        return samples[index]
+    
+    def timeout_for(self, key):
+        """
+        How long to wait for a tool/method. Fixed overrides win, then timeout_factor x the observed p95 latency
+        (clamped between min_timeout and max_timeout) once there are enough samples, otherwise default_timeout.
+        So a snapshot that always takes 0.3 s fails after 5 s instead of 30 s, and a slow navigation gets more room.
+        """
+        if key in self.timeout_overrides:
+            return self.timeout_overrides[key]
+        if len(self.latencies.get(key, ())) < self.min_samples:
+            return self.default_timeout
+        learned = self.latency_percentile(key, 95) * self.timeout_factor
+        return max(self.min_timeout, min(self.max_timeout, learned))
+    
+    def _record_latency(self, key, seconds):
+        """Remember how long one request took"""
+        if key not in self.latencies:
+            self.latencies[key] = deque(maxlen=50)
+        self.latencies[key].append(seconds)
+    
+    def cancel_request(self, request_id, reason):
+        """Tell the server to stop working on a request (MCP notifications/cancelled) and forget about it"""
+        with self.pending_lock:
+            self.pending.pop(request_id, None)
+            self.cancelled[request_id] = True
+            # a server that never answers cancelled requests must not grow this forever
+            while len(self.cancelled) > self.max_cancelled:
+                self.cancelled.pop(next(iter(self.cancelled)))
+        self._send_request("notifications/cancelled", {"requestId": request_id, "reason": reason}, is_notification=True)
+    
+    def is_alive(self):
+        """True if the server process is running"""
+        return self.process is not None and self.process.poll() is None
+    
+    def restart(self):
+        """
+        Restart a dead (or stuck) server: stop what's left of it, start a new one, redo the MCP handshake and navigate back to the last known URL.
+        Returns True if the new session is ready.
+        """
+        if self.restart_count >= self.max_restarts:
+            print(f"❌ MCP server restart limit reached ({self.max_restarts})")
+            return False
+        self.restart_count += 1
+        print(f"🔄 Restarting MCP server (attempt {self.restart_count} of {self.max_restarts})...")
+        
+        self.close()
+        self.process = None
+        self.session_id = None
+        
+        if not self.complete_initialization():
+            print("❌ MCP server restart failed")
+            return False
+        
+        if self.last_url:
+            print(f"🔄 Restoring page: {self.last_url}")
+            self._send_request("tools/call", {"name": "browser_navigate", "arguments": {"url": self.last_url}})
+        print("✅ MCP server restarted")
+        return True
+    
+    def _send_request(self, method, params=None, is_notification=False, timeout=None):
         """
         Send JSON-RPC request to MCP server via stdin.
+        timeout: seconds to wait for the answer, defaults to the tool's adaptive timeout (see timeout_for).
 
         - Build JSON-RPC request dictionary with method name
         - Add unique ID if NOT a notification (notifications don't get IDs)
@@ -98,7 +364,7 @@ class SessionMCPClient:
         - Convert dictionary to JSON string and add newline
         - Write message to server's stdin
         - Flush buffer to send immediately
-        - Wait for response from queue (skip for notifications)
+        - Wait for response from queue (skip for notifications), cancel the request if it times out
         - Return response dictionary (or None for notifications)
         """
         
@@ -117,15 +383,51 @@ class SessionMCPClient:
             request["params"] = params
         # Convert request dictionary to JSON string and add newline for line buffering
         message = json.dumps(request) + '\n'
-        # We then send the message to the server
-        self.process.stdin.write(message)
-        # Force buffered data to send immediately (don't wait for buffer to fill)
-        self.process.stdin.flush()
+        
+        # Register where the reader thread should put the answer before sending, so a fast answer can't be missed
+        waiter = None
+        if not is_notification:
+            waiter = Queue(maxsize=1)
+            with self.pending_lock:
+                self.pending[request["id"]] = waiter
+        
+        try:
+            # We then send the message to the server
+            self.process.stdin.write(message)
+            # Force buffered data to send immediately (don't wait for buffer to fill)
+            self.process.stdin.flush()
+        except (OSError, ValueError) as e:
+            # Broken pipe / closed stdin: the server is already gone, fail now instead of waiting for a timeout
+            if waiter:
+                with self.pending_lock:
+                    self.pending.pop(request["id"], None)
+                return self._crash_response(request["id"], f"MCP server not accepting requests: {e}")
+            return None
         
         # Wait for response (skip for notifications)
         if not is_notification:
-            # Wait up to 30 seconds for response from queue (responses are dictionaries)
-            return self.response_queue.get(timeout=30)
+            # tool calls are timed per tool, everything else per method
+            key = params["name"] if method == "tools/call" else method
+            if timeout is None:
+                timeout = self.timeout_for(key)
+            start = time.time()
+            try:
+                # Wait for the response (responses are dictionaries). If the server dies meanwhile the supervisor answers with an error right away.
+                response = waiter.get(timeout=timeout)
+            except Empty:
+                # nobody answered in time: tell the server to drop it, and count the full timeout as a sample so a
+                # tool that is genuinely slow gets a longer timeout next time
+                print(f"⏱️ {key} timed out after {timeout:.1f}s, cancelling request {request['id']}")
+                self.cancel_request(request["id"], f"Timed out after {timeout:.1f}s")
+                self._record_latency(key, timeout)
+                MCP_ERRORS.inc(1, key)
+                return self._timeout_response(request["id"], key, timeout)
+            if not response.get("error", {}).get("server_crashed"):
+                self._record_latency(key, time.time() - start)
+                MCP_SECONDS.observe(time.time() - start, key)
+            if response.get("error"):
+                MCP_ERRORS.inc(1, key)
+            return response
         return None
     
     def establish_session(self):
@@ -164,7 +466,10 @@ class SessionMCPClient:
             
             # Check for "result" key to confirm successful initialization (vs error response)
             if "result" in response:
+                if not self.session_id:
+                    ACTIVE_SESSIONS.inc()
                 self.session_id = "stdio-session"  # Stdio doesn't use session IDs
+                self.server_info = response["result"].get("serverInfo")
                 print("✅ Session established")
                 return True
             
@@ -183,7 +488,7 @@ class SessionMCPClient:
 
         - Establish the session
         - Send initialized notification to confirm readiness
-        - Check for the available tools
+        - Load the available tools (from the disk cache for this server version, else tools/list)
         """
         print("\n=== Complete MCP Initialization ===")
         
@@ -196,12 +501,22 @@ class SessionMCPClient:
         self._send_request("initialized", is_notification=True)
         print("✅ Initialized notification sent")
         
+        # Warm start: same server version as an earlier run, its tool list is already on disk
+        if self.server_info and self.catalog.load(self.server_info):
+            print(f"\n3. Tools loaded from cache ({len(self.catalog.tools)} tools)")
+            return True
+        
         # Response structure: {"result": {"tools": [...]}}
         print("\n3. Test tools/list:")
         tools_result = self._send_request("tools/list")
         
         # If there is something returned from the tools result and there is a value for the "result" key then we show success and return true.
         if tools_result and "result" in tools_result:
+            tools = tools_result["result"].get("tools", [])
+            if self.server_info:
+                self.catalog.save(self.server_info, tools)
+            else:
+                self.catalog.set_tools(tools)
             print("🎉 SUCCESS! Tools working!")
             return True
         
@@ -230,14 +545,61 @@ class SessionMCPClient:
         if parameters:
             params["arguments"] = parameters
         
+        # Wrong tool name or arguments: answer locally instead of waiting for the server to reject it
+        problems = self.catalog.validate(tool_name, parameters)
+        if problems:
+            print(f"❌ Invalid call to {tool_name}: {'; '.join(problems)}")
+            return {
+                "jsonrpc": "2.0",
+                "id": None,
+                "error": {"code": -32602, "message": f"Invalid call to {tool_name}: {'; '.join(problems)}", "invalid_arguments": True}
+            }
+        
+        # Server crashed earlier: bring it back before sending anything
+        if not self.is_alive() and self.auto_restart and not self.restart():
+            return self._crash_response(None, "MCP server is not running")
+        
         # Send tool call request and return response dictionary
-        return self._send_request("tools/call", params)
+        if self.profiler is not None and self.reader_thread is not None:
+            # the reader parses this call's answer, its samples belong to the run too
+            self.profiler.watch(self.reader_thread.ident)
+        with self.profiler.phase(f"mcp:{tool_name}") if self.profiler is not None else NO_PHASE:
+            response = self._send_request("tools/call", params)
+            
+            # Server died while handling this call: restart it and try the call once more if that's safe
+            if response and response.get("error", {}).get("server_crashed") and self.auto_restart:
+                if self.restart():
+                    if tool_name in self.idempotent_tools:
+                        response = self._send_request("tools/call", params)
+                    else:
+                        # the restarted browser is back on last_url, the caller has to look at the page again
+                        print(f"⚠️ Not retrying {tool_name} after the restart, it may have run already")
+                        response = self._crash_response(
+                            response.get("id"),
+                            f"MCP server restarted during {tool_name}, not retried (it may have run already). "
+                            f"Take a new snapshot before acting again")
+                        response["error"]["restarted"] = True
+        
+        # Remember where we are so a restarted server can go back there
+        if tool_name == "browser_navigate" and response and not response.get("error"):
+            self.last_url = parameters.get("url")
+        
+        return response
     
     def close(self):
         """Close the server process"""
         if self.process:
-            self.process.terminate()
-            self.process.wait()
+            # clear the session first so the supervisor doesn't report this as a crash
+            if self.session_id:
+                ACTIVE_SESSIONS.dec()
+            self.session_id = None
+            if self.process.poll() is None:
+                self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
 
 
 if __name__ == "__main__":
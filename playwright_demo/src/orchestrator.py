@@ -1,59 +1,244 @@
-# import the goods...
-from src.browser.browser_actions import BrowserAutomator
-from src.ai.ai_client import AnthropicClient
+# import the goods... (BrowserAutomator and AnthropicClient are imported in __init__, only when the defaults are
+# needed, so importing this file doesn't load the MCP client / SDK setup)
 from src.ai.prompt_builder import PromptBuilder
 from src.ai.response_parser import ResponseParser
+from src.ai.model_router import ModelRouter
+from src.ai.fast_path import FastPathRules
+from src.ai.action_history import ActionHistory
+from src.ai.usage import UsageTracker, GoalBudget, format_usage
+from src.utils.snapshot_parser import SnapshotParser
+from src.browser.extraction import format_records, spec_covers_goal
+from src.browser.explorer import ExplorerPool, format_findings
+from src.browser.branches import can_speculate, run_branch, pick_branch
+from src.checkpoint import CheckpointStore
+from src.snapshot_archive import SnapshotArchive
+from src.utils.profiler import RunProfiler
+from src.utils.metrics import GOALS, ACTIVE_GOALS, STEPS, STEP_SECONDS
 # needed for adding delays when webpages are loading
 import time
+# VISUAL_FALLBACK env var turns on the screenshot fallback
+import os
+# explore links can be relative to the current page
+from urllib.parse import urljoin
 
 class Orchestrator:
     
-    def __init__(self):
-        """Initialize all components (constructor)"""
+    def __init__(self, browser=None, ai_client=None, router=None):
+        """
+        Initialize all components (constructor)
+
+        browser and ai_client can be passed in to swap the defaults, e.g. AnthropicClient(backend=LocalBackend(...))
+        to run the loop without network calls to the LLM. When ai_client is passed in and no router is given, every
+        step goes to that client (no small model tier).
+        """
         # initialize the BrowserAutomator object
-        self.browser = BrowserAutomator()
+        if browser is None:
+            from src.browser.browser_actions import BrowserAutomator
+            browser = BrowserAutomator()
+        self.browser = browser
         # initialize the AnthropicClient object
-        self.ai_client = AnthropicClient()
+        if ai_client is None:
+            from src.ai.ai_client import AnthropicClient
+        self.ai_client = ai_client or AnthropicClient()
         # initialize the PromptBuilder object
         self.prompt_builder = PromptBuilder()
         # initialize the ResponseParser object
         self.response_parser = ResponseParser()
-        # the max number of automation iteration loops before being a quitter
-        self.max_steps = 20
+        # decides per step whether the small or large model answers
+        if router is None:
+            small_client = self.ai_client
+            # only the provider's own small model (LLM_BACKEND=xai has none, it would get a Claude model name)
+            small_model = ModelRouter.small_model_for(getattr(getattr(self.ai_client, "backend", None), "name", None))
+            if ai_client is None and small_model:
+                small_client = AnthropicClient(model=small_model)
+            router = ModelRouter(small_client, self.ai_client, self.response_parser)
+        self.router = router
+        # tokens / cost / model time of the current goal, every client the router uses reports to it
+        self.usage = UsageTracker()
+        for client in (self.router.small_client, self.router.large_client):
+            if hasattr(client, "backend"):
+                client.backend.usage = self.usage
+        # per goal limits (steps, tokens, cost, wall time), GOAL_MAX_* env vars, see src/ai/usage.py
+        self.budget = GoalBudget.from_env()
+        # totals of the last execute_goal (usage plus wall_seconds and steps)
+        self.last_usage = None
+        # memory of the steps taken during the current goal (reset by execute_goal)
+        self.history = ActionHistory()
+        # parses snapshots into elements and picks obvious actions without calling the AI
+        self.snapshot_parser = SnapshotParser()
+        self.fast_path = FastPathRules()
+        # seconds to let the page settle after each step / after filling a field (0 for offline load tests)
+        self.settle_seconds = 2
+        self.fill_settle_seconds = 5
+        # print the browser session's memory accounting every N steps (0 turns it off)
+        self.memory_report_every = 5
+        # Visual fallback (opt-in, VISUAL_FALLBACK=1): when the snapshot fails, has no refs or is bigger than
+        # visual_snapshot_chars, send a downscaled screenshot plus a pruned snapshot (at most pruned_snapshot_chars)
+        # instead. At most max_visual_steps per goal, after that the normal text path is used again.
+        self.visual_fallback = os.getenv("VISUAL_FALLBACK", "0") == "1"
+        self.visual_snapshot_chars = 40000
+        self.pruned_snapshot_chars = 8000
+        self.max_visual_steps = 3
+        # whether the last execute_goal reached its goal (the result string alone doesn't say, job workers need it)
+        self.goal_achieved = False
+        # whether the last execute_goal ran out of steps or budget: a final answer, running it again would end the same
+        # way (unlike an AI error or a crash, which job workers retry)
+        self.goal_stopped = False
+        # where runs with a run_id save their progress after every step (see execute_goal / resume)
+        self.checkpoints = CheckpointStore()
+        # also save the page's storage in each checkpoint (one extra browser_evaluate per step)
+        self.checkpoint_storage = True
+        # opt-in (SNAPSHOT_ARCHIVE=1): keep every step's snapshot and action (see snapshot_archive.py), runs without a
+        # run_id are archived under a generated one, the last one used is in archive_run_id
+        self.archive = SnapshotArchive() if os.getenv("SNAPSHOT_ARCHIVE", "0") == "1" else None
+        self.archive_run_id = None
+        # opt-in (PROFILE=sample or PROFILE=cprofile): profile every goal, tagged by step phase (see utils/profiler.py)
+        self.profiler = RunProfiler.from_env()
+        # "explore" action: the model names several links, they are opened at the same time in explorer sessions
+        # (max_explore_tabs at once, at most max_explore_pages per step) and their summaries go into the next prompts.
+        # explorer_factory builds one explorer browser (default: another BrowserAutomator), explorers live for one goal
+        self.max_explore_tabs = 3
+        self.max_explore_pages = 6
+        self.explorer_factory = None
+        self.explorer_pool = None
+        # page summaries from explore steps and listings from extract steps, the prompt shows the newest max_findings
+        self.findings = []
+        self.max_findings = 6
+        # Speculative mode (opt-in, SPECULATIVE=1): when the model's confidence is below speculate_below and it named
+        # alternatives, up to speculate_k candidate actions run at once in explorer sessions cloned from the main tab,
+        # and the main tab performs the one that got somewhere (see branches.py)
+        self.speculate = os.getenv("SPECULATIVE", "0") == "1"
+        self.speculate_below = 0.6
+        self.speculate_k = 3
+        # per goal: steps that were speculated on / where an alternative won over the model's pick
+        self.speculated_steps = 0
+        self.speculation_switches = 0
+    
+    # the max number of automation iteration loops before being a quitter (stored in the budget)
+    @property
+    def max_steps(self):
+        return self.budget.max_steps
     
-    def execute_goal(self, user_goal, start_url="https://google.com"):
+    @max_steps.setter
+    def max_steps(self, value):
+        self.budget.max_steps = value
+    
+    def execute_goal(self, user_goal, start_url="https://google.com", run_id=None):
         """
         Execute a user goal using AI-driven browser automation
         
         Args:
             user_goal: What the user wants (e.g., "Find cheapest laptop under $500")
             start_url: Starting URL (default: Google)
+            run_id: Optional name for this run. Progress is checkpointed after every step under it, and if an
+                unfinished checkpoint for it exists the run continues from there instead of from start_url.
         
         Returns:
             Result string or error message
         """
+        if self.profiler is not None:
+            self.profiler.start(run_id or f"goal-{time.strftime('%Y%m%d-%H%M%S')}")
+            # MCP calls show up as their own phase inside the step phase that made them
+            if hasattr(self.browser.client, "profiler"):
+                self.browser.client.profiler = self.profiler
+        ACTIVE_GOALS.inc()
+        outcome = "error"
+        try:
+            result = self._execute_goal(user_goal, start_url, run_id)
+            outcome = "success" if self.goal_achieved else "failed"
+            return result
+        finally:
+            ACTIVE_GOALS.dec()
+            GOALS.inc(1, outcome)
+            # explorer sessions only live for one goal
+            if self.explorer_pool:
+                self.explorer_pool.close()
+                self.explorer_pool = None
+            if self.profiler is not None:
+                self.profiler.stop()
+    
+    def _execute_goal(self, user_goal, start_url, run_id):
+        """The goal loop itself (execute_goal wraps it in the profiler when profiling is on)"""
+        self._phase("setup")
+        # an earlier attempt of this run stopped part way: continue from its last good step
+        checkpoint = self.checkpoints.resumable(run_id) if run_id else None
+        
         # printing out user goal...
         print(f"\n🎯 Goal: {user_goal}")
-        print(f"🌐 Starting at: {start_url}")
+        if checkpoint:
+            print(f"♻️ Resuming run {run_id} after step {checkpoint['step']} at {checkpoint['current_url']}")
+        else:
+            print(f"🌐 Starting at: {start_url}")
         print("=" * 60)
+        self.goal_achieved = False
+        self.goal_stopped = False
+        # usage, wall time, the cheaper mode and the router's totals are per goal
+        self.usage.reset()
+        self.router.reset()
+        goal_start = time.time()
+        if self.archive:
+            self.archive_run_id = run_id or f"run-{time.strftime('%Y%m%d-%H%M%S')}-{os.urandom(3).hex()}"
+            # the archive is for debugging, a full disk or a broken directory must not end the goal
+            try:
+                self.archive.start_run(self.archive_run_id, user_goal, start_url)
+            except Exception as e:
+                print(f"⚠️ Snapshot archive failed: {e}")
         
         # Step 1: Initialize browser this uses the mcp_client.py file to orchestrate all this
         if not self.browser.initialize():
             return "❌ Failed to initialize browser"
         
-        # Step 2: Navigate to starting URL, this uses the browser_actions.py file to orchestrate all this
-        self.browser.navigate_to_website(start_url)
-        current_url = start_url
+        # Step 2: Navigate to starting URL (or the checkpointed page), this uses the browser_actions.py file to orchestrate all this
+        current_url = checkpoint["current_url"] if checkpoint else start_url
+        self.browser.navigate_to_website(current_url)
+        if checkpoint and checkpoint.get("storage"):
+            self.browser.restore_storage_state(checkpoint["storage"])
         
         # Step 3: Main orchestration loop
         step_count = 0
         goal_achieved = False
         result = None
+        # how many steps in a row went wrong, the router sends these to the large model
+        recent_failures = 0
+        # compacted memory of earlier steps, fed into every prompt
+        self.history = ActionHistory()
+        self.findings = []
+        self.speculated_steps = 0
+        self.speculation_switches = 0
+        # previous step's action (plus "ok"), and how many steps the fast path handled
+        last_action = None
+        fast_path_steps = 0
+        if checkpoint:
+            step_count = checkpoint["step"]
+            recent_failures = checkpoint["recent_failures"]
+            self.history = ActionHistory.from_dict(checkpoint["history"])
+            self.findings = checkpoint.get("findings", [])
+            last_action = checkpoint["last_action"]
+        # steps that used the screenshot fallback (bounded by max_visual_steps)
+        visual_steps = 0
+        # set once a budget is nearly used up (cheaper mode) / fully used up (stop)
+        downgraded = False
+        budget_stop = None
         
         # The loop that continues until the goal is achieved or the max # of steps is reached
         while not goal_achieved and step_count < self.max_steps:
+            # check the token / cost / time budgets before spending anything on the next step
+            budget_status, budget_reason = self.budget.check(self.usage.snapshot(), time.time() - goal_start)
+            if budget_status == "stop":
+                print(f"🛑 Budget: {budget_reason}, stopping the goal")
+                budget_stop = budget_reason
+                break
+            if budget_status == "downgrade" and not downgraded:
+                print(f"💸 Budget: {budget_reason}, switching to the small model without screenshots")
+                downgraded = True
+                self.router.downgrade()
+            step_start = time.time()
+            step_usage_start = self.usage.snapshot()
+            self._phase("snapshot")
+            
             # increment and track the # of steps
             step_count += 1
+            STEPS.inc()
             print(f"\n{'='*60}")
             print(f"📍 Step {step_count} of {self.max_steps}")
             print(f"{'='*60}")
@@ -62,16 +247,21 @@ class Orchestrator:
             print("📸 Taking page snapshot...")
             # function call returns a dictionary from browser_actions/mcp_client
             snapshot_result = self.browser.take_page_snapshot()
+            self._phase("parse")
+            
+            # Extract snapshot text from result (the raw result repeats the whole snapshot, don't keep both)
+            snapshot = self._extract_snapshot_text(snapshot_result) if snapshot_result else ""
+            snapshot_result = None
+            
+            # pathological page (no snapshot, no refs, or huge): decide whether this step looks at a screenshot instead
+            visual = not downgraded and self._needs_visual(snapshot, visual_steps)
             
-            # if the snapshots not there attempt the loop again
-            if not snapshot_result:
+            # if the snapshots not there attempt the loop again (unless the screenshot fallback can take over)
+            if not snapshot and not visual:
                 print("⚠️ Failed to get snapshot, retrying...")
-                time.sleep(2)
+                time.sleep(self.settle_seconds)
                 continue
             
-            # Extract snapshot text from result
-            snapshot = self._extract_snapshot_text(snapshot_result)
-            
             # Try to get current URL (fallback to last known if it fails)
             new_url = self.browser.get_current_url()
             if new_url:
@@ -79,52 +269,145 @@ class Orchestrator:
             
             print(f"📄 Current page: {current_url}")
             
-            # 3b. Build prompt for AI
-            print("🤖 Asking AI for next action...")
-            prompt = self.prompt_builder.build(
-                goal=user_goal,
-                snapshot=snapshot,
-                page_url=current_url,
-                step_number=step_count
-            )
+            # everything before this step is done: save it, a failure from here on resumes at this page
+            if run_id:
+                self._phase("checkpoint")
+                self._save_checkpoint(run_id, user_goal, start_url, step_count - 1, current_url, recent_failures,
+                                      last_action)
             
-            # 3c. Get AI decision
-            try:
-                ai_response = self.ai_client.get_next_action(prompt)
-                print(f"🔍 DEBUG - Claude's raw response: {ai_response}")
-            except Exception as e:
-                print(f"❌ AI call failed: {e}")
-                return f"AI error: {str(e)}"
+            # identifies this exact page state, used to spot repeated actions that change nothing
+            self._phase("parse")
+            page_fingerprint = ActionHistory.fingerprint(current_url, snapshot)
             
-            # 3d. Parse AI response
-            action = self.response_parser.parse(ai_response)
+            # 3b. Check the rules engine first, obvious steps don't need an AI round trip
+            elements = self.snapshot_parser.parse_yaml(snapshot)
+            # refs on this page, checked before a click/fill is sent to the browser
+            ref_index = self.snapshot_parser.build_ref_index(elements)
+            # set when the AI keeps answering with a ref that isn't usable on this page
+            ref_problem = None
+            self._phase("decide")
+            action = self.fast_path.suggest(user_goal, elements, current_url, last_action, self.history)
+            # a rule that already fired on this exact page didn't work, let the AI decide instead
+            if action and self.history.is_loop(action, page_fingerprint):
+                action = None
+            
+            if action:
+                fast_path_steps += 1
+                print(f"⚡ Fast path ({action['confidence']:.2f}): skipping AI call")
+            else:
+                # 3c/3d. Build prompt and get AI decision (router picks the model and parses the response)
+                print("🤖 Asking AI for next action...")
+                ask = self._ask_ai
+                if visual:
+                    visual_steps += 1
+                    print(f"🖼️ Visual fallback ({visual_steps} of {self.max_visual_steps}): snapshot is "
+                          f"{len(snapshot)} chars")
+                    ask = self._ask_ai_visual
+                try:
+                    action = ask(user_goal, snapshot, current_url, step_count, recent_failures)
+                    # no snapshot and no screenshot either, nothing to decide from
+                    if action is None:
+                        print("⚠️ Failed to get snapshot or screenshot, retrying...")
+                        time.sleep(self.settle_seconds)
+                        continue
+                    
+                    # same action on the same page already went nowhere, warn the model and ask once more
+                    if action["action"] not in ("complete", "error") and self.history.is_loop(action, page_fingerprint):
+                        print("🔁 Loop detected, asking AI for a different action...")
+                        self.history.add_loop_warning(step_count, action)
+                        action = ask(user_goal, snapshot, current_url, step_count, recent_failures)
+                        if action is None:
+                            print("⚠️ Failed to get snapshot or screenshot, retrying...")
+                            time.sleep(self.settle_seconds)
+                            continue
+                    
+                    # ref that isn't on the page (or can't take this action): ask again right away with the reason,
+                    # instead of paying for a browser call that fails and a wasted step
+                    ref_problem = ref_index.check(action)
+                    if ref_problem:
+                        print(f"🚫 Invalid ref from AI: {ref_problem}")
+                        action = ask(user_goal, snapshot, current_url, step_count, recent_failures, hint=ref_problem)
+                        if action is None:
+                            print("⚠️ Failed to get snapshot or screenshot, retrying...")
+                            time.sleep(self.settle_seconds)
+                            continue
+                        ref_problem = ref_index.check(action)
+                except Exception as e:
+                    print(f"❌ AI call failed: {e}")
+                    self._report_usage(goal_start, step_count)
+                    return f"AI error: {str(e)}"
+                
+                # unsure between several actions: try them in cloned sessions, keep the one that got somewhere
+                if self.speculate and not visual and not ref_problem:
+                    action = self._speculate(user_goal, action, ref_index, current_url)
             
             print(f"💡 AI Decision: {action['action']}")
             if action.get('reasoning'):
                 print(f"   Reasoning: {action['reasoning']}")
             
             # 3e. Execute the action
-            if action["action"] == "navigate":
+            self._phase("act")
+            # tracks whether this step did what it was supposed to (fed back to the router)
+            step_ok = True
+            # the page the action runs on (current_url changes when navigating)
+            action_url = current_url
+            if ref_problem:
+                print(f"⚠️ AI still picked an unusable ref, skipping the browser call: {ref_problem}")
+                step_ok = False
+            
+            elif action["action"] == "navigate":
                 url = action.get("value", "")
                 print(f"🌐 Navigating to: {url}")
-                self.browser.navigate_to_website(url)
+                step_ok = self.browser.navigate_to_website(url)
                 current_url = url
             
             elif action["action"] == "fill":
                 ref = action.get("ref", "")
                 value = action.get("value", "")
                 print(f"⌨️  Filling {ref} with '{value}'")
-                self.browser.fill(ref, value)
+                step_ok = self.browser.fill(ref, value, element=self._describe_element(ref_index.get(ref)))
 
             
                 print("⏳ Waiting for page to load...")
-                time.sleep(5)  # Give navigation time to complete
+                time.sleep(self.fill_settle_seconds)  # Give navigation time to complete
 
             
             elif action["action"] == "click":
                 ref = action.get("ref", "")
                 print(f"🖱️  Clicking {ref}")
-                self.browser.click(ref)
+                step_ok = self.browser.click(ref, element=self._describe_element(ref_index.get(ref)))
+            
+            elif action["action"] == "press_enter":
+                print("⏎  Pressing Enter")
+                step_ok = self.browser.press_enter()
+            
+            elif action["action"] == "extract":
+                print("🔎 Extracting listings in the browser")
+                records = self.browser.extract(action)
+                # the records are the answer only if the spec applied everything the goal asks for, or the model said
+                # so up front ("goal_complete"). Otherwise they go back to the model as findings and it decides
+                if records and (action.get("goal_complete") is True or spec_covers_goal(user_goal, action)):
+                    goal_achieved = True
+                    result = format_records(records)
+                    print(f"✅ Found {len(records)} matching listings:\n{result}")
+                elif records:
+                    print(f"📋 Extracted {len(records)} listings, passing them to the AI:\n{format_records(records)}")
+                    self.findings.append({"url": current_url, "ok": True, "seconds": 0.0,
+                                          "summary": "Listings extracted from this page:\n" + format_records(records)})
+                else:
+                    print("⚠️ No matching listings on this page")
+                    step_ok = False
+            
+            elif action["action"] == "explore":
+                urls = self._explore_targets(action, ref_index, current_url)
+                # the urls stand in for the value, so the history shows them and a different set isn't a "loop"
+                action["value"] = " ".join(urls)
+                if urls:
+                    print(f"🧭 Exploring {len(urls)} pages in parallel")
+                    step_ok = self._explore(urls)
+                else:
+                    print("⚠️ Explore action without usable links")
+                    step_ok = False
             
             elif action["action"] == "complete":
                 goal_achieved = True
@@ -134,23 +417,275 @@ class Orchestrator:
             elif action["action"] == "error":
                 print(f"⚠️ AI Error: {action.get('message', 'Unknown error')}")
                 print("   Continuing to next step...")
+                step_ok = False
             
             else:
                 print(f"⚠️ Unknown action: {action['action']}")
+                step_ok = False
+            
+            self._phase("record")
+            recent_failures = 0 if step_ok else recent_failures + 1
+            # remembered so the fast path rules can chain steps (fill -> press Enter)
+            last_action = dict(action, ok=step_ok)
+            if not goal_achieved:
+                self.history.record(step_count, action, step_ok, action_url, page_fingerprint)
+            if self.archive:
+                try:
+                    self.archive.add_step(self.archive_run_id, step_count, snapshot, url=action_url, action=action,
+                                          ok=step_ok)
+                except Exception as e:
+                    print(f"⚠️ Snapshot archive failed at step {step_count}: {e}")
+            
+            # only the fingerprint of this page is needed from here on, let the snapshot go before waiting
+            snapshot = elements = None
+            if self.memory_report_every and step_count % self.memory_report_every == 0:
+                self._report_memory(step_count)
+            print(f"📊 Step {step_count}: {format_usage(self.usage.since(step_usage_start))}, "
+                  f"{time.time() - step_start:.1f}s total")
+            STEP_SECONDS.observe(time.time() - step_start)
             
             # 3f. Wait for page to settle
-            time.sleep(2)
+            self._phase("settle")
+            time.sleep(self.settle_seconds)
         
         # Step 4: Return result
+        self._phase("finish")
         print(f"\n{'='*60}")
+        self.router.print_summary()
+        print(f"⚡ Fast path handled {fast_path_steps} of {step_count} steps")
+        if visual_steps:
+            print(f"🖼️ Visual fallback used on {visual_steps} steps")
+        if self.speculated_steps:
+            print(f"🔀 Speculated on {self.speculated_steps} steps, an alternative won {self.speculation_switches} times")
+        self._report_usage(goal_start, step_count)
+        self.goal_achieved = goal_achieved
         if goal_achieved:
             print(f"🎉 SUCCESS!")
             self.browser.client.close()
+            if run_id:
+                self.checkpoints.mark(run_id, "done", result)
             return result
         else:
-            print(f"⏱️ Reached maximum steps")
             self.browser.client.close()
-            return f"Did not complete goal within {self.max_steps} steps"
+            if budget_stop:
+                result = f"Stopped after {step_count} steps: {budget_stop}"
+            else:
+                print(f"⏱️ Reached maximum steps")
+                result = f"Did not complete goal within {self.max_steps} steps"
+            self.goal_stopped = True
+            if run_id:
+                self.checkpoints.mark(run_id, "stopped", result)
+            return result
+    
+    def resume(self, run_id):
+        """
+        Continue a run that stopped part way (AI error, crash, killed process) from its last checkpoint, in a fresh
+        browser session. Returns the result like execute_goal.
+        """
+        checkpoint = self.checkpoints.resumable(run_id)
+        if not checkpoint:
+            return f"❌ No unfinished checkpoint for run {run_id}"
+        return self.execute_goal(checkpoint["goal"], start_url=checkpoint["start_url"], run_id=run_id)
+    
+    def _save_checkpoint(self, run_id, user_goal, start_url, step, current_url, recent_failures, last_action):
+        """Persist the state after `step` finished steps"""
+        storage = None
+        if self.checkpoint_storage:
+            get_storage_state = getattr(self.browser, "get_storage_state", None)
+            storage = get_storage_state() if get_storage_state else None
+        self.checkpoints.save(run_id, {
+            "status": "running",
+            "goal": user_goal,
+            "start_url": start_url,
+            "step": step,
+            "current_url": current_url,
+            "storage": storage,
+            "history": self.history.to_dict(),
+            "recent_failures": recent_failures,
+            "last_action": last_action,
+            "findings": self.findings,
+        })
+    
+    def _explore_targets(self, action, ref_index, current_url):
+        """Absolute urls of an explore action ("urls" and/or link "refs"), without repeats, at most max_explore_pages"""
+        targets = list(action.get("urls") or [])
+        for ref in action.get("refs") or []:
+            # same cleanup as the parser does for "ref": "[ref=e26]" -> "e26"
+            element = ref_index.get(str(ref).strip("[] ").replace("ref=", ""))
+            if element and element.get("url"):
+                targets.append(element["url"])
+        urls = []
+        for target in targets:
+            url = urljoin(current_url, str(target))
+            if url.startswith("http") and url not in urls:
+                urls.append(url)
+        return urls[:self.max_explore_pages]
+    
+    def _explorers(self):
+        """The goal's ExplorerPool (explore steps and speculative branches), started on first use"""
+        if self.explorer_pool is None:
+            factory = self.explorer_factory
+            if factory is None:
+                from src.browser.browser_actions import BrowserAutomator
+                factory = BrowserAutomator
+            self.explorer_pool = ExplorerPool(factory, max_tabs=max(self.max_explore_tabs, self.speculate_k))
+        return self.explorer_pool
+    
+    def _explore(self, urls):
+        """Open the urls at the same time in explorer sessions and keep their summaries. True if any page loaded"""
+        start = time.time()
+        findings = self._explorers().explore(urls)
+        for finding in findings:
+            status = "✅" if finding["ok"] else f"❌ {finding['error']}"
+            print(f"   {status} {finding['url']} ({finding['seconds']:.1f}s)")
+        print(f"🧭 Explored {len(findings)} pages in {time.time() - start:.1f}s "
+              f"(slowest page {max(finding['seconds'] for finding in findings):.1f}s)")
+        self.findings.extend(findings)
+        return any(finding["ok"] for finding in findings)
+    
+    def _speculate(self, user_goal, action, ref_index, current_url):
+        """
+        Model unsure (confidence below speculate_below) and it named alternatives: run up to speculate_k candidates at
+        once in sessions cloned from the main tab and return the one that moved toward the goal, or the model's own
+        pick if none of them changed the page. The main tab then performs the returned action.
+        """
+        if not can_speculate(action, ref_index.get(action.get("ref"))) or not action.get("alternatives"):
+            return action
+        try:
+            confidence = float(action.get("confidence", 1.0))
+        except (TypeError, ValueError):
+            confidence = 1.0
+        if confidence >= self.speculate_below:
+            return action
+        
+        candidates = [action]
+        for alternative in action["alternatives"]:
+            if not isinstance(alternative, dict):
+                continue
+            alternative = dict(alternative)
+            if isinstance(alternative.get("ref"), str):
+                alternative["ref"] = alternative["ref"].strip("[] ").replace("ref=", "")
+            # same rules as the model's pick: an action that is safe to run in a clone, with a usable ref
+            if ref_index.check(alternative) or not can_speculate(alternative, ref_index.get(alternative.get("ref"))):
+                continue
+            if any(ActionHistory.action_key(alternative) == ActionHistory.action_key(c) for c in candidates):
+                continue
+            candidates.append(alternative)
+        candidates = candidates[:self.speculate_k]
+        if len(candidates) < 2:
+            return action
+        
+        get_storage_state = getattr(self.browser, "get_storage_state", None)
+        storage = get_storage_state() if get_storage_state else None
+        print(f"🔀 Unsure ({confidence:.2f}): trying {len(candidates)} actions in cloned sessions")
+        start = time.time()
+        branches = self._explorers().map(
+            lambda browser, candidate: run_branch(browser, current_url, storage, candidate,
+                                                  ref_index.get(candidate.get("ref"))),
+            candidates
+        )
+        for candidate, branch in zip(candidates, branches):
+            label = self.history.describe(candidate)
+            if isinstance(branch, Exception):
+                print(f"   ❌ {label}: {branch}")
+            else:
+                status = "changed the page" if branch["ok"] and branch["changed"] else "no change"
+                print(f"   {'✅' if branch['ok'] and branch['changed'] else '➖'} {label}: {status} "
+                      f"-> {branch['url']} ({branch['seconds']:.1f}s)")
+        self.speculated_steps += 1
+        
+        best = pick_branch(branches, user_goal)
+        if best is None:
+            print(f"🔀 No branch got anywhere ({time.time() - start:.1f}s), keeping the model's pick")
+            return action
+        if best["action"] is not action:
+            self.speculation_switches += 1
+        print(f"🔀 Keeping {self.history.describe(best['action'])} ({time.time() - start:.1f}s)")
+        return best["action"]
+    
+    def _phase(self, name):
+        """Tag what the loop is doing from here on for the profiler (no-op when profiling is off)"""
+        if self.profiler is not None:
+            self.profiler.set_phase(name)
+    
+    def _report_usage(self, goal_start, step_count):
+        """Print the goal's usage totals and keep them in last_usage"""
+        self.last_usage = dict(self.usage.snapshot(), wall_seconds=time.time() - goal_start, steps=step_count)
+        print(f"💰 Goal usage: {format_usage(self.last_usage)}, {self.last_usage['wall_seconds']:.1f}s wall time")
+    
+    def _report_memory(self, step_count):
+        """Print the MCP session's memory accounting (browsers without one are skipped)"""
+        memory_stats = getattr(self.browser.client, "memory_stats", None)
+        if not memory_stats:
+            return
+        stats = memory_stats()
+        rss = f"{stats['rss_bytes'] / 1_000_000:.0f} MB" if stats["rss_bytes"] else "unknown"
+        print(f"🧠 Memory after step {step_count}: RSS {rss}, {stats['pending_requests']} pending, "
+              f"{stats['queued_notifications']} queued / {stats['notifications_dropped']} dropped notifications")
+    
+    def _needs_visual(self, snapshot, visual_steps):
+        """True if this step should use the screenshot fallback"""
+        if not self.visual_fallback or visual_steps >= self.max_visual_steps:
+            return False
+        return not snapshot or "[ref=" not in snapshot or len(snapshot) > self.visual_snapshot_chars
+    
+    def _describe_element(self, element):
+        """Accessible description for MCP tool calls, e.g. 'button "Add to Cart"' (None if the ref isn't known)"""
+        if not element:
+            return None
+        return f'{element["role"]} "{element["name"]}"' if element["name"] else element["role"]
+    
+    def _history_text(self, hint=None):
+        """History summary for the prompt, plus a one-off hint about the previous answer"""
+        history = self.history.summary()
+        if hint:
+            history = f"{history}\nWARNING: your last answer was rejected: {hint}".strip()
+        return history
+    
+    def _ask_ai_visual(self, user_goal, snapshot, current_url, step_count, recent_failures, hint=None):
+        """
+        Visual fallback: prompt with a pruned snapshot and a downscaled screenshot (large model).
+        Without a screenshot the pruned snapshot alone is sent, which still caps the prompt size.
+        Returns None if there is neither a snapshot nor a screenshot.
+        """
+        screenshot = self.browser.take_screenshot()
+        pruned = self.snapshot_parser.prune_snapshot(snapshot, self.pruned_snapshot_chars)
+        if not screenshot and not snapshot:
+            return None
+        prompt = self.prompt_builder.build(
+            goal=user_goal,
+            snapshot=pruned or "(no elements found in the text snapshot)",
+            page_url=current_url,
+            step_number=step_count,
+            history=self._history_text(hint),
+            visual=bool(screenshot),
+            max_steps=self.max_steps,
+            findings=format_findings(self.findings[-self.max_findings:])
+        )
+        if not screenshot:
+            return self.router.get_action(prompt, snapshot=pruned, step_number=step_count, recent_failures=recent_failures)
+        return self.router.get_visual_action(prompt, screenshot)
+    
+    def _ask_ai(self, user_goal, snapshot, current_url, step_count, recent_failures, hint=None):
+        """Build the prompt (with the step history and an optional hint) and return the parsed action from the router"""
+        prompt = self.prompt_builder.build(
+            goal=user_goal,
+            snapshot=snapshot,
+            page_url=current_url,
+            step_number=step_count,
+            history=self._history_text(hint),
+            max_steps=self.max_steps,
+            findings=format_findings(self.findings[-self.max_findings:]),
+            # the orchestrator's threshold, so the prompt and _speculate agree on when to hedge
+            alternatives_below=self.speculate_below if self.speculate else None,
+            max_alternatives=self.speculate_k - 1
+        )
+        return self.router.get_action(
+            prompt,
+            snapshot=snapshot,
+            step_number=step_count,
+            recent_failures=recent_failures
+        )
     
     def _extract_snapshot_text(self, snapshot_result):
         """Extract YAML snapshot text from result dictionary"""
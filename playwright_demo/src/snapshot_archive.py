@@ -0,0 +1,184 @@
+"""
+The purpose of this file is to keep every page snapshot the agent saw, step by step, for debugging and offline
+evaluation, without paying full price for it. Snapshots are big and most of their lines repeat from one step (and one
+run) to the next, so they are stored the way git stores files:
+
+    objects/ab/cdef...    one compressed chunk of snapshot text, named by the sha256 of its content. A chunk that is
+                          already stored is never written twice, so repeated headers, nav bars and footers cost nothing.
+    runs/<run_id>.jsonl   the run's manifest: a header line (goal, start_url) then one line per step with the url,
+                          action, whether it worked and the list of chunk hashes that make up its snapshot.
+
+Chunks are cut where the content says so (after a line whose hash hits a marker, with a minimum and maximum length),
+not every N lines, so a line added near the top of a page doesn't shift every chunk after it.
+
+Reading one step only reads the small manifest and that step's chunks, never the rest of the run. pages() and
+actions() turn a run back into what FakeBrowser / LocalBackend need to replay it offline.
+"""
+
+import os
+import json
+import time
+import zlib
+import hashlib
+import threading
+
+DEFAULT_ARCHIVE_DIR = os.getenv("SNAPSHOT_ARCHIVE_DIR",
+                                os.path.join(os.path.dirname(__file__), "..", "snapshot_archive"))
+
+# a chunk ends after a line whose crc32 % CHUNK_MARKER == 0, i.e. about every CHUNK_MARKER lines
+CHUNK_MARKER = 32
+MIN_CHUNK_LINES = 8
+MAX_CHUNK_LINES = 256
+
+
+def chunk_snapshot(text, marker=CHUNK_MARKER, min_lines=MIN_CHUNK_LINES, max_lines=MAX_CHUNK_LINES):
+    """Split snapshot text into content-defined chunks of whole lines ("".join(chunks) == text)"""
+    chunks = []
+    current = []
+    for line in text.splitlines(keepends=True):
+        current.append(line)
+        at_marker = zlib.crc32(line.encode("utf-8")) % marker == 0
+        if (len(current) >= min_lines and at_marker) or len(current) >= max_lines:
+            chunks.append("".join(current))
+            current = []
+    if current:
+        chunks.append("".join(current))
+    return chunks
+
+
+class SnapshotArchive:
+
+    def __init__(self, directory=None, compression_level=6):
+        self.directory = os.path.abspath(directory or DEFAULT_ARCHIVE_DIR)
+        self.compression_level = compression_level
+
+    def _object_path(self, digest):
+        return os.path.join(self.directory, "objects", digest[:2], digest[2:])
+
+    def manifest_path(self, run_id):
+        """Manifest file for a run id (anything but letters, digits, - and _ is replaced)"""
+        safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in str(run_id))
+        return os.path.join(self.directory, "runs", f"{safe}.jsonl")
+
+    def _write_object(self, data):
+        """Store one chunk if it isn't stored yet, returns its hash"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # temp file + rename: a reader never sees half a chunk, two writers of the same chunk write the same bytes.
+            # The temp name is per process and thread, goals running side by side often store the same chunk
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(temp_path, "wb") as f:
+                    f.write(zlib.compress(data, self.compression_level))
+                os.replace(temp_path, path)
+            except OSError:
+                # another writer got the chunk there first (Windows refuses to replace a file that's open), fine
+                if not os.path.exists(path):
+                    raise
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+        return digest
+
+    def _read_object(self, digest):
+        with open(self._object_path(digest), "rb") as f:
+            return zlib.decompress(f.read())
+
+    def _append(self, run_id, entry):
+        path = self.manifest_path(run_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, default=str) + "\n")
+
+    def start_run(self, run_id, goal=None, start_url=None):
+        """Write the run's header line (a resumed run gets another one, its steps continue the same manifest)"""
+        self._append(run_id, {"run_id": run_id, "goal": goal, "start_url": start_url, "started_at": time.time()})
+
+    def add_step(self, run_id, step, snapshot, url=None, action=None, ok=None):
+        """Store one step's snapshot (chunked, deduplicated) and append it to the run's manifest"""
+        snapshot = snapshot or ""
+        chunks = [self._write_object(chunk.encode("utf-8")) for chunk in chunk_snapshot(snapshot)]
+        self._append(run_id, {
+            "step": step,
+            "url": url,
+            "action": action,
+            "ok": ok,
+            "size": len(snapshot.encode("utf-8")),
+            "chunks": chunks,
+            "time": time.time(),
+        })
+
+    def _manifest(self, run_id):
+        """(header, {step: entry}) for a run, a step recorded twice (resumed run) keeps its latest entry"""
+        header = None
+        steps = {}
+        try:
+            with open(self.manifest_path(run_id), encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    if "step" in entry:
+                        steps[entry["step"]] = entry
+                    elif header is None:
+                        header = entry
+        except FileNotFoundError:
+            pass
+        return header, steps
+
+    def runs(self):
+        """Run ids in the archive, oldest manifest first"""
+        runs_dir = os.path.join(self.directory, "runs")
+        if not os.path.isdir(runs_dir):
+            return []
+        names = sorted(os.listdir(runs_dir), key=lambda name: os.path.getmtime(os.path.join(runs_dir, name)))
+        return [name[:-len(".jsonl")] for name in names if name.endswith(".jsonl")]
+
+    def header(self, run_id):
+        """goal / start_url / started_at of a run, None if the run isn't archived"""
+        return self._manifest(run_id)[0]
+
+    def steps(self, run_id):
+        """Step entries of a run in step order (url, action, ok, size, chunks), without the snapshots"""
+        steps = self._manifest(run_id)[1]
+        return [steps[step] for step in sorted(steps)]
+
+    def get_snapshot(self, run_id, step):
+        """Snapshot text of one step (reads only that step's chunks), None if the step isn't archived"""
+        entry = self._manifest(run_id)[1].get(step)
+        if entry is None:
+            return None
+        return b"".join(self._read_object(digest) for digest in entry["chunks"]).decode("utf-8")
+
+    def pages(self, run_id):
+        """{url: snapshot} with the last snapshot seen on every url, the `pages` a FakeBrowser replays"""
+        return {entry["url"]: self.get_snapshot(run_id, entry["step"]) for entry in self.steps(run_id)}
+
+    def actions(self, run_id):
+        """The actions of a run in order, e.g. to script a LocalBackend with json.dumps(action) per step"""
+        return [entry["action"] for entry in self.steps(run_id) if entry.get("action")]
+
+    def stats(self):
+        """Bytes the archived snapshots would take raw vs what their chunks take on disk"""
+        raw = steps = 0
+        for run_id in self.runs():
+            for entry in self.steps(run_id):
+                steps += 1
+                raw += entry["size"]
+        stored = objects = 0
+        objects_dir = os.path.join(self.directory, "objects")
+        for folder, _, files in os.walk(objects_dir):
+            for name in files:
+                if not name.endswith(".tmp"):
+                    objects += 1
+                    stored += os.path.getsize(os.path.join(folder, name))
+        return {
+            "runs": len(self.runs()),
+            "steps": steps,
+            "chunks": objects,
+            "raw_bytes": raw,
+            "stored_bytes": stored,
+            "ratio": round(raw / stored, 1) if stored else None,
+        }
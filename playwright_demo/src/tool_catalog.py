@@ -0,0 +1,166 @@
+"""
+The purpose of this file is to remember which tools the MCP server offers and what arguments they take.
+
+The catalog from tools/list is saved to disk per server name + version, so a later run against the same server
+version can skip the tools/list round trip. Each tool's inputSchema is compiled once into a validator function, which
+lets SessionMCPClient.send_tool_call reject a call with a wrong tool name or wrong arguments before anything is sent.
+
+Only the parts of JSON Schema the Playwright MCP tools use are checked: type, properties, required, enum, items and
+additionalProperties. Anything else in a schema is ignored (accepted).
+"""
+
+import os
+import re
+import json
+import tempfile
+
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "playwright-mcp-catalog")
+
+# JSON Schema type name -> Python types (bool is an int in Python, so it's excluded from the number types below)
+JSON_TYPES = {
+    "string": (str,),
+    "number": (int, float),
+    "integer": (int,),
+    "boolean": (bool,),
+    "array": (list, tuple),
+    "object": (dict,),
+    "null": (type(None),),
+}
+
+
+def _type_ok(value, expected):
+    """True if value matches a JSON Schema type name (or list of names)"""
+    names = expected if isinstance(expected, list) else [expected]
+    for name in names:
+        if name not in JSON_TYPES:
+            return True
+        if name in ("number", "integer") and isinstance(value, bool):
+            continue
+        if isinstance(value, JSON_TYPES[name]):
+            return True
+    return False
+
+
+def compile_validator(schema, path="arguments"):
+    """
+    Turn a JSON Schema into a function(value) -> list of error strings (empty list = valid).
+    The schema is walked once here, so validating a call is just running the nested checks.
+    """
+    schema = schema or {}
+    checks = []
+
+    if "type" in schema:
+        expected = schema["type"]
+        def check_type(value):
+            if not _type_ok(value, expected):
+                return [f"{path} should be {expected}, got {type(value).__name__}"]
+            return []
+        checks.append(check_type)
+
+    if "enum" in schema:
+        allowed = schema["enum"]
+        def check_enum(value):
+            if value not in allowed:
+                return [f"{path} should be one of {allowed}, got {value!r}"]
+            return []
+        checks.append(check_enum)
+
+    properties = {
+        name: compile_validator(sub_schema, f"{path}.{name}")
+        for name, sub_schema in schema.get("properties", {}).items()
+    }
+    required = schema.get("required", [])
+    closed = schema.get("additionalProperties") is False
+    if properties or required or closed:
+        def check_object(value):
+            if not isinstance(value, dict):
+                return []
+            errors = [f"{path}.{name} is required" for name in required if name not in value]
+            for name, item in value.items():
+                if name in properties:
+                    errors.extend(properties[name](item))
+                elif closed:
+                    errors.append(f"{path}.{name} is not an allowed argument")
+            return errors
+        checks.append(check_object)
+
+    if isinstance(schema.get("items"), dict):
+        item_validator = compile_validator(schema["items"], f"{path}[]")
+        def check_items(value):
+            if not isinstance(value, (list, tuple)):
+                return []
+            errors = []
+            for item in value:
+                errors.extend(item_validator(item))
+            return errors
+        checks.append(check_items)
+
+    def validate(value):
+        errors = []
+        for check in checks:
+            errors.extend(check(value))
+        return errors
+    return validate
+
+
+class ToolCatalog:
+    """Tools offered by one MCP server version, with a compiled argument validator per tool"""
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or os.getenv("MCP_CATALOG_DIR", DEFAULT_CACHE_DIR)
+        # tool name -> tool definition from tools/list
+        self.tools = {}
+        # tool name -> validator function
+        self.validators = {}
+        self.server_info = None
+
+    def cache_path(self, server_info):
+        """Cache file for a server, e.g. tools-Playwright-0.0.41.json"""
+        name = server_info.get("name", "unknown")
+        version = server_info.get("version", "unknown")
+        safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{name}-{version}")
+        return os.path.join(self.cache_dir, f"tools-{safe}.json")
+
+    def set_tools(self, tools, server_info=None):
+        """Replace the catalog with a tools/list result and compile the validators"""
+        self.server_info = server_info
+        self.tools = {tool["name"]: tool for tool in tools}
+        self.validators = {
+            tool["name"]: compile_validator(tool.get("inputSchema"))
+            for tool in tools
+        }
+
+    def load(self, server_info):
+        """Load the cached catalog for this server version. Returns True on a cache hit"""
+        path = self.cache_path(server_info)
+        try:
+            with open(path, encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return False
+        if cached.get("server_info") != server_info:
+            return False
+        self.set_tools(cached["tools"], server_info)
+        return True
+
+    def save(self, server_info, tools):
+        """Store a tools/list result for this server version and load it into the catalog"""
+        self.set_tools(tools, server_info)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.cache_path(server_info)
+        # write to a temp file first so a crashed run never leaves half a catalog behind
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"server_info": server_info, "tools": tools}, f)
+        os.replace(temp_path, path)
+
+    def __contains__(self, tool_name):
+        return tool_name in self.tools
+
+    def validate(self, tool_name, arguments):
+        """List of problems with a call (empty list = fine). An empty catalog accepts everything"""
+        if not self.tools:
+            return []
+        if tool_name not in self.tools:
+            return [f"unknown tool '{tool_name}'"]
+        return self.validators[tool_name](arguments or {})
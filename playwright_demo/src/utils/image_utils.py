@@ -0,0 +1,35 @@
+"""
+The purpose of this file is to keep screenshots cheap to send to the LLM. A full resolution PNG of a page costs far
+more tokens and upload time than the model needs to find a button, so captures are downscaled and re-encoded as JPEG.
+
+Pillow is optional: without it the image is sent as the browser produced it (still JPEG, just not resized).
+"""
+
+import io
+import base64
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+def downscale_image(image_base64, media_type="image/png", max_width=1024, quality=60):
+    """
+    Return (image_base64, media_type) no wider than max_width, JPEG encoded at the given quality.
+    Returns the input unchanged when Pillow isn't installed.
+    """
+    if Image is None:
+        return image_base64, media_type
+
+    image = Image.open(io.BytesIO(base64.b64decode(image_base64)))
+    if image.width > max_width:
+        height = max(1, round(image.height * max_width / image.width))
+        image = image.resize((max_width, height), Image.LANCZOS)
+    # JPEG has no alpha channel
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return base64.b64encode(buffer.getvalue()).decode("ascii"), "image/jpeg"
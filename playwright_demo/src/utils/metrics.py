@@ -0,0 +1,320 @@
+"""
+The purpose of this file is to keep always-on totals for a long running worker (steps, goals, model and MCP latency,
+snapshot sizes, parse failures, open sessions) and show them to Prometheus. Per goal logs (usage.py, the profiler)
+say what one run did, these say how the whole fleet is doing: rate(agent_steps_total[5m]) is steps/sec,
+agent_goals_total{result="success"} / agent_goals_total is the success rate, and so on.
+
+Updating a metric is on the hot path (every MCP call, every step), so it takes no lock: every thread adds into its own
+shard (a dict only that thread writes to), and reading a metric sums the shards. Only a thread's first update of a
+metric takes a lock, to register its shard. When the thread ends its shard is folded into the metric's base totals, so
+short lived threads (explorer pools, heartbeats) don't pile up shards. A read can land between two updates of a
+histogram (count already bumped, sum not yet), which is fine for metrics scraped every few seconds.
+
+    REGISTRY.render()                   Prometheus text format
+    start_metrics_server(port=9464)     serves it on http://127.0.0.1:9464/metrics (jobs.py worker --metrics-port)
+    REGISTRY.export() / merge()         totals as plain data, how goal processes (warm_runner.py) report back
+
+The agent's metrics are defined at the bottom of this file, the code that updates them imports them from here.
+"""
+
+import bisect
+import weakref
+import threading
+
+# seconds, from a fast MCP call to a slow model answer
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# snapshot sizes, 1 KB to 4 MB
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _ShardOwner:
+    """Kept in one thread's threading.local: freed when the thread ends, which is when its shard gets folded"""
+
+    __slots__ = ("__weakref__",)
+
+
+class _Metric:
+    """Shared part of every metric: name, help, label names and the per-thread shards"""
+
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._local = threading.local()
+        # shard id -> shard of a live thread, plus the totals of threads that ended (and merged from other processes)
+        self._shards = {}
+        self._base = {}
+        self._next_shard_id = 0
+        self._shards_lock = threading.Lock()
+
+    def _shard(self):
+        """This thread's {label values: value}, created (under the lock) the first time the thread updates us"""
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = {}
+            owner = _ShardOwner()
+            with self._shards_lock:
+                self._next_shard_id += 1
+                shard_id = self._next_shard_id
+                self._shards[shard_id] = shard
+            # the thread's locals go away with the thread, and with them the owner
+            weakref.finalize(owner, self._retire, shard_id).atexit = False
+            self._local.owner = owner
+            self._local.shard = shard
+            return shard
+
+    def _retire(self, shard_id):
+        """A thread ended: move its shard into the base totals (nobody writes to it anymore)"""
+        with self._shards_lock:
+            shard = self._shards.pop(shard_id, None)
+            if shard:
+                self._add_into(self._base, shard)
+
+    def _key(self, values):
+        if len(values) != len(self.labels):
+            raise ValueError(f"{self.name} takes labels {self.labels}, got {values}")
+        return tuple(str(value) for value in values)
+
+    def _shard_copies(self):
+        # dict.copy() runs in one go under the GIL, so the owner threads can keep writing meanwhile. Under the lock,
+        # so a shard can't be folded into the base between the two copies and be counted twice
+        with self._shards_lock:
+            return [self._base.copy()] + [shard.copy() for shard in self._shards.values()]
+
+    def _merge(self, data):
+        with self._shards_lock:
+            self._add_into(self._base, data)
+
+
+class Counter(_Metric):
+    """Only goes up (totals), e.g. Counter("agent_steps_total", "Steps run").inc()"""
+
+    kind = "counter"
+
+    def inc(self, amount=1, *values):
+        """Add amount for these label values (one value per label name, in order)"""
+        key = self._key(values)
+        shard = self._shard()
+        shard[key] = shard.get(key, 0) + amount
+
+    def collect(self):
+        """{label values: total} over every thread"""
+        totals = {}
+        for shard in self._shard_copies():
+            for key, value in shard.items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def value(self, *values):
+        return self.collect().get(self._key(values), 0)
+
+    @staticmethod
+    def _add_into(target, data):
+        for key, value in data.items():
+            target[key] = target.get(key, 0) + value
+
+    def _render(self):
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_number(value)}"
+                for key, value in sorted(self.collect().items())]
+
+
+class Gauge(Counter):
+    """Goes up and down (things open right now). inc() where it opens and dec() where it closes, from any thread"""
+
+    kind = "gauge"
+
+    def dec(self, amount=1, *values):
+        self.inc(-amount, *values)
+
+
+class Histogram(_Metric):
+    """Distribution of a value (latencies, sizes): count per bucket plus sum and count"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, amount, *values):
+        """Record one value for these label values"""
+        key = self._key(values)
+        shard = self._shard()
+        cell = shard.get(key)
+        if cell is None:
+            # one count per bucket (not cumulative, that's done when rendering), the +Inf bucket, sum
+            cell = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        cell[bisect.bisect_left(self.buckets, amount)] += 1
+        cell[-1] += amount
+
+    def collect(self):
+        """{label values: [count per bucket..., count above the last bucket, sum]} over every thread"""
+        totals = {}
+        for shard in self._shard_copies():
+            for key, cell in shard.items():
+                cell = list(cell)
+                total = totals.get(key)
+                if total is None:
+                    totals[key] = cell
+                else:
+                    for i, value in enumerate(cell):
+                        total[i] += value
+        return totals
+
+    def count(self, *values):
+        cell = self.collect().get(self._key(values))
+        return sum(cell[:-1]) if cell else 0
+
+    def sum(self, *values):
+        cell = self.collect().get(self._key(values))
+        return cell[-1] if cell else 0.0
+
+    @staticmethod
+    def _add_into(target, data):
+        for key, cell in data.items():
+            mine = target.get(key)
+            if mine is None:
+                target[key] = list(cell)
+            else:
+                for i, value in enumerate(cell):
+                    mine[i] += value
+
+    def _render(self):
+        lines = []
+        for key, cell in sorted(self.collect().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), cell[:-1]):
+                cumulative += count
+                le = f'le="{_format_number(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_number(cell[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        # name -> metric, in the order they were defined
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            existing = self.metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labels != metric.labels:
+                    raise ValueError(f"Metric {metric.name} already defined as a {existing.kind} {existing.labels}")
+                return existing
+            self.metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._add(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=()):
+        return self._add(Gauge(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help_text, labels, buckets))
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format"""
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.append(f"# HELP {metric.name} {_escape(metric.help)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric._render())
+        return "\n".join(lines) + "\n"
+
+    def export(self):
+        """Totals as plain picklable data: {name: [[label values, value or histogram cell], ...]}"""
+        return {name: [[list(key), value] for key, value in metric.collect().items()]
+                for name, metric in list(self.metrics.items())}
+
+    def merge(self, exported):
+        """Add totals from export() (another process) into this registry. Unknown metric names are skipped"""
+        for name, entries in (exported or {}).items():
+            metric = self.metrics.get(name)
+            if metric is not None and not isinstance(metric, Gauge):
+                # gauges are "open right now" in the other process, by the time we merge they're closed again
+                metric._merge({tuple(key): value for key, value in entries})
+
+
+def make_metrics_handler(registry):
+    """Request handler class that answers GET /metrics from registry"""
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsRequestHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path.split("?")[0].rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            payload = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            # scraped every few seconds, not worth a line each time
+            pass
+
+    return MetricsRequestHandler
+
+
+def start_metrics_server(port=9464, host="127.0.0.1", registry=None):
+    """Serve /metrics on a daemon thread (port 0 picks a free port). Returns the server, shutdown() stops it"""
+    # imported here, most runs never serve metrics
+    from http.server import ThreadingHTTPServer
+    server = ThreadingHTTPServer((host, port), make_metrics_handler(registry or REGISTRY))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"📈 Metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+REGISTRY = MetricsRegistry()
+
+# Orchestrator
+GOALS = REGISTRY.counter("agent_goals_total", "Goals finished, by result (success, failed, error)", ("result",))
+ACTIVE_GOALS = REGISTRY.gauge("agent_active_goals", "Goals running right now")
+STEPS = REGISTRY.counter("agent_steps_total", "Steps run (rate() of this is steps/sec)")
+STEP_SECONDS = REGISTRY.histogram("agent_step_seconds", "Wall time of one step")
+# AnthropicClient / ModelRouter
+LLM_SECONDS = REGISTRY.histogram("agent_llm_request_seconds", "Model call latency", ("model",))
+LLM_ERRORS = REGISTRY.counter("agent_llm_errors_total", "Model calls that raised", ("model",))
+PARSE_FAILURES = REGISTRY.counter("agent_llm_parse_failures_total", "Model answers that were not a usable action")
+# SessionMCPClient
+MCP_SECONDS = REGISTRY.histogram("agent_mcp_request_seconds", "MCP round trip, by tool (or method)", ("tool",))
+MCP_ERRORS = REGISTRY.counter("agent_mcp_errors_total", "MCP requests answered with an error or timed out", ("tool",))
+ACTIVE_SESSIONS = REGISTRY.gauge("agent_mcp_sessions", "MCP sessions (browser servers) open right now")
+# BrowserAutomator
+SNAPSHOT_BYTES = REGISTRY.histogram("agent_snapshot_bytes", "Size of page snapshots", buckets=BYTES_BUCKETS)
+BROWSER_ACTIONS = REGISTRY.counter("agent_browser_actions_total", "Browser actions, by action and result",
+                                   ("action", "result"))
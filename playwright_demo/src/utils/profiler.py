@@ -0,0 +1,231 @@
+"""
+The purpose of this file is to find out where a slow run spends its time: Python work (snapshot text extraction,
+JSON parsing in the MCP reader thread, prompt building) or waiting on the browser / LLM / sleeps.
+
+Two modes:
+    sample - a background thread records the Python stacks of the run's threads every `interval` seconds: the thread
+             that called start() (the goal), threads that entered a phase and threads added with watch() (the MCP
+             reader). Other threads in the process (other goals, idle pools) are left out. Each sample is tagged
+             with the phase its thread was in (Orchestrator: setup, snapshot, parse, checkpoint, decide, act, record,
+             settle; SessionMCPClient: mcp:<tool>). Writes a collapsed stack file (one "frame;frame;frame count" line
+             per stack, the input format of flamegraph.pl, speedscope and most flamegraph viewers).
+    cprofile - cProfile on the thread that runs the goal (exact call counts, more overhead, no other threads).
+             Writes a .prof file for pstats / snakeviz.
+Both write a <name>-top.txt report: wall time per phase and the top N functions.
+
+Samples only see Python frames: time blocked in C (time.sleep, lock waits, pipe reads) counts as self time of the
+Python function that made the call. Waiting on an MCP answer shows up as Condition.wait under _send_request, the
+reader thread waiting for the server as _read_responses.
+
+Nothing here runs unless a profiler is created (PROFILE=sample or PROFILE=cprofile for the Orchestrator), the
+instrumented code only checks `profiler is None`.
+"""
+
+import os
+import sys
+import time
+import io
+import threading
+import contextlib
+from collections import Counter
+
+DEFAULT_PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.path.dirname(__file__), "..", "..", "profiles"))
+MODES = ("sample", "cprofile")
+
+# shared "do nothing" phase for code paths that run without a profiler
+NO_PHASE = contextlib.nullcontext()
+
+
+def _frame_name(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class RunProfiler:
+
+    def __init__(self, mode="sample", output_dir=None, interval=0.005, top=25):
+        """
+        mode: "sample" or "cprofile"
+        output_dir: where the collapsed / .prof / top files go (PROFILE_DIR, then playwright_demo/profiles)
+        interval: seconds between samples
+        top: functions listed in the report
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiler mode {mode!r}, expected one of {MODES}")
+        self.mode = mode
+        self.output_dir = os.path.abspath(output_dir or DEFAULT_PROFILE_DIR)
+        self.interval = interval
+        self.top = top
+        self.name = None
+        self.running = False
+        # thread id -> tuple of phase names (tuples are swapped, never changed, so the sampler can read them unlocked).
+        # Only these threads and the one that called start() are sampled
+        self._phases = {}
+        self._owner = None
+        # thread id -> (phase tuple, time it was entered), for wall time per phase
+        self._phase_started = {}
+        self.phase_seconds = Counter()
+        self.samples = Counter()
+        self.sample_count = 0
+        self._cprofile = None
+        self._sampler = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Profiler for PROFILE=sample|cprofile, None when PROFILE is unset (profiling off)"""
+        mode = os.getenv("PROFILE", "").strip().lower()
+        return cls(mode) if mode else None
+
+    # ---- phases ----
+
+    def _enter(self, phases, thread_id=None):
+        thread_id = thread_id or threading.get_ident()
+        now = time.perf_counter()
+        with self._lock:
+            previous = self._phase_started.get(thread_id)
+            if previous and previous[0]:
+                self.phase_seconds["/".join(previous[0])] += now - previous[1]
+            self._phase_started[thread_id] = (phases, now)
+        self._phases[thread_id] = phases
+
+    def watch(self, thread_id):
+        """Sample this thread too (one that works for the run without entering phases of its own)"""
+        self._phases.setdefault(thread_id, ())
+
+    def set_phase(self, name):
+        """Start a new top level phase on this thread (the previous one ends here)"""
+        self._enter((name,))
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Nested phase for a block, e.g. an MCP call made while the Orchestrator is in its "snapshot" phase"""
+        thread_id = threading.get_ident()
+        outer = self._phases.get(thread_id, ())
+        self._enter(outer + (name,), thread_id)
+        try:
+            yield
+        finally:
+            self._enter(outer, thread_id)
+
+    # ---- start / stop ----
+
+    def start(self, name=None):
+        """Start profiling, name is used for the output files (default: a timestamp)"""
+        self.name = "".join(c if c.isalnum() or c in "-_" else "_" for c in (name or time.strftime("%Y%m%d-%H%M%S")))
+        self.samples.clear()
+        self.phase_seconds.clear()
+        self.sample_count = 0
+        self._phases = {}
+        self._phase_started = {}
+        self._owner = threading.get_ident()
+        self.running = True
+        if self.mode == "cprofile":
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        else:
+            self._stop.clear()
+            self._sampler = threading.Thread(target=self._sample_loop, name="profiler-sampler", daemon=True)
+            self._sampler.start()
+
+    def stop(self):
+        """Stop profiling, write the output files and print the report. Returns the report text"""
+        if not self.running:
+            return ""
+        self.running = False
+        if self._cprofile:
+            self._cprofile.disable()
+        if self._sampler:
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+        # close the phases that are still open
+        now = time.perf_counter()
+        with self._lock:
+            for phases, started in self._phase_started.values():
+                if phases:
+                    self.phase_seconds["/".join(phases)] += now - started
+            self._phase_started = {}
+
+        report = self.report()
+        self.write(report)
+        print(report)
+        self._cprofile = None
+        return report
+
+    # ---- sampling ----
+
+    def _sample_loop(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (thread_id != self._owner and thread_id not in self._phases):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame.f_code))
+                    frame = frame.f_back
+                stack.reverse()
+                root = (names.get(thread_id, f"thread-{thread_id}"),) + self._phases.get(thread_id, ())
+                self.samples[";".join(root + tuple(stack))] += 1
+            self.sample_count += 1
+
+    def collapsed(self):
+        """Collapsed stack lines ("thread;phase;frame;... count"), heaviest first"""
+        return [f"{stack} {count}" for stack, count in self.samples.most_common()]
+
+    def top_functions(self, n=None):
+        """
+        [(function, self samples, total samples)] heaviest first by self samples. Self = the function was running,
+        total = it was anywhere on the stack (counted once per sample).
+        """
+        own = Counter()
+        total = Counter()
+        for stack, count in self.samples.items():
+            frames = [frame for frame in stack.split(";") if " (" in frame]
+            if not frames:
+                continue
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        return [(frame, count, total[frame]) for frame, count in own.most_common(n or self.top)]
+
+    # ---- output ----
+
+    def report(self):
+        """Wall time per phase and the hottest functions, as text"""
+        lines = [f"🔬 Profile {self.name} ({self.mode})", "Phase wall time:"]
+        for phase, seconds in sorted(self.phase_seconds.items(), key=lambda item: -item[1]):
+            lines.append(f"  {seconds:8.3f}s  {phase}")
+
+        if self.mode == "cprofile" and self._cprofile:
+            import pstats
+            output = io.StringIO()
+            pstats.Stats(self._cprofile, stream=output).sort_stats("tottime").print_stats(self.top)
+            lines.append(f"Top {self.top} functions by own time:")
+            lines.append(output.getvalue().strip())
+        else:
+            lines.append(f"Top {self.top} functions ({self.sample_count} samples every {self.interval * 1000:.0f}ms, "
+                         f"self / total):")
+            for frame, own, total in self.top_functions():
+                lines.append(f"  {own * self.interval:8.3f}s {total * self.interval:8.3f}s  {frame}")
+        return "\n".join(lines)
+
+    def write(self, report=None):
+        """Write <name>-top.txt plus <name>.collapsed (sample) or <name>.prof (cprofile), returns the paths"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, self.name)
+        paths = [f"{base}-top.txt"]
+        with open(paths[0], "w", encoding="utf-8") as f:
+            f.write((report or self.report()) + "\n")
+        if self._cprofile:
+            paths.append(f"{base}.prof")
+            self._cprofile.dump_stats(paths[-1])
+        else:
+            paths.append(f"{base}.collapsed")
+            with open(paths[-1], "w", encoding="utf-8") as f:
+                f.write("\n".join(self.collapsed()) + "\n")
+        print(f"🔬 Profile written to {', '.join(paths)}")
+        return paths
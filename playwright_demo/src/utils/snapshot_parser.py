@@ -0,0 +1,165 @@
+"""
+The purpose of this file is to turn the YAML accessibility snapshot from @playwright/mcp into a list of elements we
+can search in Python. A snapshot looks like this:
+
+    - generic [ref=e2]:
+      - combobox "Search" [ref=e26] [active]
+      - link "Gmail" [ref=e5] [cursor=pointer]:
+        - /url: https://mail.google.com
+
+Every line with a [ref=...] becomes a dictionary:
+    {"ref": "e26", "role": "combobox", "name": "Search", "depth": 1, "attributes": ["active"], "url": None}
+"""
+
+import re
+
+# "- role "name" [attr] [attr]:" ... the name part is optional and may contain escaped quotes
+ELEMENT_LINE = re.compile(r'^(?P<indent>\s*)- (?P<role>[\w-]+)(?: "(?P<name>(?:[^"\\]|\\.)*)")?(?P<rest>.*)$')
+# each [...] block after the name, e.g. [ref=e26] or [cursor=pointer]
+ATTRIBUTE = re.compile(r'\[([^\]]+)\]')
+# "- /url: https://..." child line that belongs to the link above it
+URL_LINE = re.compile(r'^\s*- /url: (?P<url>\S+)')
+
+# roles a user can type into
+TEXT_INPUT_ROLES = ("textbox", "searchbox", "combobox")
+
+# roles kept by prune_snapshot: things the agent can act on, plus headings to show where it is on the page
+ACTIONABLE_ROLES = TEXT_INPUT_ROLES + (
+    "link", "button", "checkbox", "radio", "menuitem", "option", "tab", "switch", "slider", "spinbutton", "heading"
+)
+
+
+class RefIndex:
+    """
+    Lookup of the refs in one snapshot, used to catch a bad ref from the model before it costs a browser round trip.
+    An empty index (no snapshot, e.g. screenshot-only steps) accepts everything since there is nothing to check against.
+    """
+
+    # actions that need a ref, and the roles that ref may have (None = any role)
+    ACTION_ROLES = {
+        "click": None,
+        "fill": TEXT_INPUT_ROLES + ("spinbutton",),
+    }
+
+    def __init__(self, elements):
+        self.elements = {element["ref"]: element for element in elements}
+
+    def __len__(self):
+        return len(self.elements)
+
+    def get(self, ref):
+        return self.elements.get(ref)
+
+    def check(self, action):
+        """None if the action's ref is fine, otherwise a hint telling the model what was wrong"""
+        kind = action.get("action")
+        if kind not in self.ACTION_ROLES or not self.elements:
+            return None
+
+        ref = action.get("ref")
+        element = self.elements.get(ref)
+        if element is None:
+            return (f"ref '{ref}' does not exist on the current page. Only use refs that appear in the page "
+                    f"structure as [ref=...].")
+
+        roles = self.ACTION_ROLES[kind]
+        if roles and element["role"] not in roles:
+            candidates = [e for e in self.elements.values() if e["role"] in roles][:5]
+            suggestion = ", ".join(f'{e["ref"]} ({e["role"]} "{e["name"]}")' for e in candidates) or "none on this page"
+            return (f"ref '{ref}' is a {element['role']} \"{element['name']}\", you can't {kind} it. "
+                    f"Elements you can {kind}: {suggestion}.")
+        return None
+
+
+class SnapshotParser:
+
+    def parse_yaml(self, snapshot_text):
+        """
+        Parse snapshot text into a list of element dictionaries (only elements that have a ref, in page order)
+        """
+        elements = []
+        if not snapshot_text:
+            return elements
+
+        for line in snapshot_text.splitlines():
+            # link targets show up as a child line, attach them to the closest element above
+            url_match = URL_LINE.match(line)
+            if url_match:
+                if elements:
+                    elements[-1]["url"] = url_match.group("url")
+                continue
+
+            match = ELEMENT_LINE.match(line)
+            if not match:
+                continue
+
+            attributes = ATTRIBUTE.findall(match.group("rest"))
+            ref = next((attr[4:] for attr in attributes if attr.startswith("ref=")), None)
+            if not ref:
+                continue
+
+            name = match.group("name")
+            elements.append({
+                "ref": ref,
+                "role": match.group("role"),
+                "name": name.replace('\\"', '"') if name else "",
+                "depth": len(match.group("indent")) // 2,
+                "attributes": [attr for attr in attributes if not attr.startswith("ref=")],
+                "url": None,
+            })
+
+        return elements
+
+    def build_ref_index(self, elements):
+        """RefIndex for the elements of one snapshot"""
+        return RefIndex(elements)
+
+    def find_elements(self, elements, role=None, name_contains=None):
+        """
+        Return every element matching the criteria. role can be a single role or a tuple of roles, name_contains is
+        a case-insensitive substring of the accessible name.
+        """
+        roles = (role,) if isinstance(role, str) else role
+        matches = []
+        for element in elements:
+            if roles and element["role"] not in roles:
+                continue
+            if name_contains and name_contains.lower() not in element["name"].lower():
+                continue
+            matches.append(element)
+        return matches
+
+    def find_element(self, elements, role=None, name_contains=None):
+        """Return the first element matching the criteria, or None"""
+        matches = self.find_elements(elements, role=role, name_contains=name_contains)
+        return matches[0] if matches else None
+
+    def find_search_boxes(self, elements):
+        """
+        Return the text inputs that look like a site search: searchbox role, or a textbox/combobox named "search"
+        """
+        boxes = []
+        for element in self.find_elements(elements, role=TEXT_INPUT_ROLES):
+            if element["role"] == "searchbox" or "search" in element["name"].lower():
+                boxes.append(element)
+        return boxes
+
+    def prune_snapshot(self, snapshot_text, max_chars=8000, max_name_chars=80):
+        """
+        Shrink a snapshot to one line per actionable element (links, buttons, inputs, headings...), names shortened,
+        until max_chars is reached. Used when the full snapshot is too big to send, the rest is counted, not sent.
+        """
+        lines = []
+        used = 0
+        elements = [e for e in self.parse_yaml(snapshot_text) if e["role"] in ACTIONABLE_ROLES]
+        for count, element in enumerate(elements):
+            name = element["name"]
+            if len(name) > max_name_chars:
+                name = name[:max_name_chars] + "..."
+            line = f'- {element["role"]} "{name}" [ref={element["ref"]}]'
+            if used + len(line) + 1 > max_chars:
+                lines.append(f"- ... ({len(elements) - count} more elements omitted)")
+                break
+            lines.append(line)
+            used += len(line) + 1
+        return "\n".join(lines)
@@ -0,0 +1,79 @@
+"""
+Stand-in for BrowserAutomator used by the offline tests. Pages are snapshot strings keyed by URL, links map
+(url, ref) to the URL that clicking the ref leads to ((url, "Enter") for pressing Enter). records maps a URL to the
+raw listings extract() finds there. A page mapped to None fails to snapshot, screenshot is what take_screenshot()
+returns.
+"""
+
+from src.browser.extraction import refine_records
+
+class FakeClient:
+
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+
+    def __init__(self, pages, links=None, records=None):
+        self.pages = pages
+        self.links = links or {}
+        self.records = records or {}
+        self.screenshot = None
+        # what get_storage_state() returns / restore_storage_state() last received
+        self.storage = None
+        self.restored_storage = None
+        self.url = None
+        self.client = FakeClient()
+        # every browser call in order, e.g. ("click", "e1")
+        self.calls = []
+
+    def initialize(self):
+        return True
+
+    def navigate_to_website(self, url):
+        self.calls.append(("navigate", url))
+        self.url = url
+        return True
+
+    def take_page_snapshot(self):
+        snapshot = self.pages.get(self.url, "")
+        if snapshot is None:
+            return None
+        return {"result": {"content": [{"type": "text", "text": f"- Page URL: {self.url}\n```yaml\n{snapshot}\n```"}]}}
+
+    def take_screenshot(self):
+        self.calls.append(("screenshot",))
+        return self.screenshot
+
+    def get_storage_state(self):
+        return self.storage
+
+    def restore_storage_state(self, state):
+        self.calls.append(("restore_storage",))
+        self.restored_storage = state
+        return True
+
+    def get_current_url(self):
+        return self.url
+
+    def click(self, ref, element=None):
+        self.calls.append(("click", ref))
+        self.url = self.links.get((self.url, ref), self.url)
+        return True
+
+    def fill(self, ref, text, element=None):
+        self.calls.append(("fill", ref, text))
+        return True
+
+    def extract(self, spec):
+        self.calls.append(("extract",))
+        return refine_records(self.records.get(self.url, []), spec)
+
+    def press_enter(self):
+        self.calls.append(("press_enter",))
+        self.url = self.links.get((self.url, "Enter"), self.url)
+        return True
@@ -0,0 +1,55 @@
+"""
+Tiny stand-in for @playwright/mcp used by the offline MCP client tests. Speaks newline-delimited JSON-RPC on
+stdin/stdout like the real server. Special tools:
+    crash_server - exits immediately without answering
+    slow_tool - answers after {"seconds": N}
+Every other tool answers with a text result echoing its name and arguments.
+"""
+
+import sys
+import json
+import time
+
+TOOLS = [
+    {
+        "name": "browser_navigate",
+        "inputSchema": {
+            "type": "object",
+            "properties": {"url": {"type": "string"}},
+            "required": ["url"],
+            "additionalProperties": False
+        }
+    },
+    {"name": "browser_snapshot", "inputSchema": {"type": "object", "properties": {}}},
+    {"name": "crash_server", "inputSchema": {"type": "object", "properties": {}}},
+    {"name": "slow_tool", "inputSchema": {"type": "object", "properties": {"seconds": {"type": "number"}}}},
+]
+
+
+def reply(request_id, result):
+    sys.stdout.write(json.dumps({"jsonrpc": "2.0", "id": request_id, "result": result}) + "\n")
+    sys.stdout.flush()
+
+
+for line in sys.stdin:
+    request = json.loads(line)
+    method = request.get("method")
+    request_id = request.get("id")
+    sys.stderr.write(f"fake server got {method}\n")
+    sys.stderr.flush()
+
+    if method == "initialize":
+        reply(request_id, {"protocolVersion": "2024-11-05", "serverInfo": {"name": "fake-mcp", "version": "1.0.0"}})
+    elif method == "tools/list":
+        reply(request_id, {"tools": TOOLS})
+    elif method == "tools/call":
+        name = request["params"]["name"]
+        arguments = request["params"].get("arguments", {})
+        if name == "crash_server":
+            sys.exit(1)
+        if name == "slow_tool":
+            time.sleep(arguments.get("seconds", 1))
+        reply(request_id, {"content": [{"type": "text", "text": f"{name} {json.dumps(arguments)}"}]})
+    elif request_id is not None:
+        sys.stdout.write(json.dumps({"jsonrpc": "2.0", "id": request_id, "error": {"code": -32601, "message": "Unknown method"}}) + "\n")
+        sys.stdout.flush()
@@ -0,0 +1,55 @@
+from src.ai.action_history import ActionHistory
+from src.ai.ai_client import AnthropicClient
+from src.ai.llm_backend import LocalBackend
+from src.orchestrator import Orchestrator
+from tests.fake_browser import FakeBrowser
+import json
+
+def test_history_compacts_and_detects_loops():
+    print("🧪 Testing ActionHistory compaction and loop detection...")
+    print("=" * 50)
+
+    history = ActionHistory(max_recent=2)
+    page = ActionHistory.fingerprint("https://a.com/list", "- button [ref=e1]")
+    click = {"action": "click", "ref": "e1"}
+
+    history.record(1, {"action": "navigate", "value": "https://a.com/list"}, True, "https://google.com", "fp0")
+    history.record(2, click, False, "https://a.com/list", page)
+    assert history.is_loop(click, page)
+    assert not history.is_loop(click, "other-page")
+
+    history.record(3, click, False, "https://a.com/list", page)
+    summary = history.summary()
+    print(summary)
+    assert "Earlier steps (1): 1 navigate; 0 failed" in summary
+    assert "Step 3: click e1 on a.com/list -> FAILED" in summary
+    assert "WARNING" in summary
+    assert len(history.recent) == 2
+    print("\n✅ ActionHistory test completed!")
+
+def test_orchestrator_breaks_loop():
+    print("🧪 Testing Orchestrator re-asks instead of repeating a dead click...")
+    print("=" * 50)
+
+    # clicking e1 does nothing, e2 leads to the answer page
+    browser = FakeBrowser(
+        pages={"https://shop.test": '- button "Buy" [ref=e1]\n- link "Deals" [ref=e2]', "https://shop.test/deals": "- text"},
+        links={("https://shop.test", "e2"): "https://shop.test/deals"}
+    )
+    click_e1 = json.dumps({"action": "click", "ref": "e1"})
+    backend = LocalBackend(
+        responses=[click_e1, click_e1, json.dumps({"action": "click", "ref": "e2"})],
+        rules=[(r"Current page: https://shop.test/deals", json.dumps({"action": "complete", "value": "done"}))]
+    )
+    orchestrator = Orchestrator(browser=browser, ai_client=AnthropicClient(backend=backend))
+    orchestrator.settle_seconds = 0
+
+    assert orchestrator.execute_goal("Find the deals", start_url="https://shop.test") == "done"
+    # e1 was clicked once, the repeat was caught before reaching the browser
+    assert browser.calls.count(("click", "e1")) == 1
+    assert ("click", "e2") in browser.calls
+    print("\n✅ Orchestrator loop test completed!")
+
+if __name__ == "__main__":
+    test_history_compacts_and_detects_loops()
+    test_orchestrator_breaks_loop()
@@ -0,0 +1,75 @@
+from src.ai.action_history import ActionHistory
+from src.ai.ai_client import AnthropicClient
+from src.ai.llm_backend import LocalBackend
+from src.checkpoint import CheckpointStore
+from src.orchestrator import Orchestrator
+from tests.fake_browser import FakeBrowser
+import json
+import tempfile
+
+PAGES = {"https://shop.test": '- button "Buy" [ref=e1]\n- link "Deals" [ref=e2]', "https://shop.test/deals": "- text"}
+LINKS = {("https://shop.test", "e2"): "https://shop.test/deals"}
+
+class FlakyBackend(LocalBackend):
+    """LocalBackend whose provider goes down after a number of calls"""
+
+    def __init__(self, fail_after, **kwargs):
+        super().__init__(**kwargs)
+        self.fail_after = fail_after
+
+    def complete(self, prompt, max_tokens=None):
+        if self.calls >= self.fail_after:
+            raise RuntimeError("529 overloaded")
+        return super().complete(prompt, max_tokens=max_tokens)
+
+def make_orchestrator(backend, store):
+    browser = FakeBrowser(pages=PAGES, links=LINKS)
+    orchestrator = Orchestrator(browser=browser, ai_client=AnthropicClient(backend=backend))
+    orchestrator.settle_seconds = 0
+    orchestrator.checkpoints = store
+    return orchestrator
+
+def test_history_round_trip():
+    print("🧪 Testing ActionHistory serialization...")
+    print("=" * 50)
+
+    history = ActionHistory(max_recent=1)
+    history.record(1, {"action": "navigate", "value": "https://a.com"}, True, "https://google.com", "fp0")
+    history.record(2, {"action": "click", "ref": "e1"}, False, "https://a.com", "fp1")
+    history.record(3, {"action": "click", "ref": "e1"}, False, "https://a.com", "fp1")
+
+    restored = ActionHistory.from_dict(json.loads(json.dumps(history.to_dict())))
+    assert restored.summary() == history.summary()
+    assert restored.is_loop({"action": "click", "ref": "e1"}, "fp1")
+    print("\n✅ History round trip test completed!")
+
+def test_resume_after_ai_failure():
+    print("🧪 Testing checkpoint and resume after an AI failure...")
+    print("=" * 50)
+
+    store = CheckpointStore(tempfile.mkdtemp())
+
+    # first attempt: step 1 clicks through to the deals page, then the AI provider goes down
+    first = make_orchestrator(FlakyBackend(1, responses=[json.dumps({"action": "click", "ref": "e2"})]), store)
+    first.browser.storage = {"origin": "https://shop.test", "localStorage": {"cart": "1"}, "sessionStorage": {}, "cookies": ""}
+    assert first.execute_goal("Find the deals", start_url="https://shop.test", run_id="deals").startswith("AI error")
+    checkpoint = store.resumable("deals")
+    assert checkpoint["step"] == 1 and checkpoint["current_url"] == "https://shop.test/deals"
+
+    # second attempt in a fresh session: starts on the deals page, one AI call instead of two
+    backend = LocalBackend(responses=[json.dumps({"action": "complete", "value": "found the deals"})])
+    second = make_orchestrator(backend, store)
+    assert second.resume("deals") == "found the deals"
+    assert second.browser.calls[0] == ("navigate", "https://shop.test/deals")
+    assert second.browser.restored_storage["localStorage"] == {"cart": "1"}
+    assert backend.calls == 1
+    # the step taken before the failure is still in the history
+    assert "Step 1: click e2" in second.history.summary()
+
+    assert store.load("deals")["status"] == "done"
+    assert second.resume("deals").startswith("❌ No unfinished checkpoint")
+    print("\n✅ Resume test completed!")
+
+if __name__ == "__main__":
+    test_history_round_trip()
+    test_resume_after_ai_failure()
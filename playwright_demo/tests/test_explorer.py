@@ -0,0 +1,104 @@
+from src.browser.explorer import ExplorerPool, summarize_snapshot
+from src.ai.ai_client import AnthropicClient
+from src.ai.llm_backend import LocalBackend
+from src.orchestrator import Orchestrator
+from tests.fake_browser import FakeBrowser
+import json
+import time
+
+RESULTS = """- heading "Laptops" [level=1] [ref=e0]
+- link "Laptop A" [ref=e1] [cursor=pointer]:
+  - /url: /laptop-a
+- link "Laptop B" [ref=e2] [cursor=pointer]:
+  - /url: /laptop-b
+- link "Laptop C" [ref=e3] [cursor=pointer]:
+  - /url: https://other.test/laptop-c"""
+
+PRODUCTS = {
+    "https://shop.test/laptop-a": '- heading "Laptop A" [ref=e1]\n- text: "$799"\n- button "Add to cart" [ref=e2]',
+    "https://shop.test/laptop-b": '- heading "Laptop B" [ref=e1]\n- text: "$499"\n- button "Add to cart" [ref=e2]',
+    "https://other.test/laptop-c": '- heading "Laptop C" [ref=e1]\n- text: "$650"\n- button "Add to cart" [ref=e2]',
+}
+
+class SlowBrowser(FakeBrowser):
+    """Explorer tab that takes a while to load every page"""
+
+    opened = []
+
+    def __init__(self):
+        super().__init__(pages=PRODUCTS)
+        self.opened.append(self)
+
+    def take_page_snapshot(self):
+        time.sleep(0.3)
+        return super().take_page_snapshot()
+
+class PromptLog(LocalBackend):
+    """LocalBackend that keeps every prompt it was asked"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.prompts = []
+
+    def complete(self, prompt, max_tokens=None):
+        self.prompts.append(prompt)
+        return super().complete(prompt, max_tokens=max_tokens)
+
+def test_summaries():
+    print("🧪 Testing page summaries...")
+    print("=" * 50)
+
+    summary = summarize_snapshot(RESULTS + "\n- generic:\n  - text: Laptops")
+    print(summary)
+    assert summary.splitlines() == ['heading "Laptops" [level=1]', 'link "Laptop A"', 'link "Laptop B"',
+                                    'link "Laptop C"', "text: Laptops"]
+    assert summarize_snapshot(RESULTS, max_chars=40).endswith("...")
+
+    # an explorer that won't start is reported, not raised
+    class BrokenBrowser(FakeBrowser):
+        def initialize(self):
+            return False
+    pool = ExplorerPool(lambda: BrokenBrowser(pages={}))
+    assert pool.explore(["https://a.test"]) == [
+        {"url": "https://a.test", "ok": False, "error": "explorer browser did not start", "seconds": 0.0}]
+    print("\n✅ Summary test completed!")
+
+def test_explore_runs_pages_in_parallel():
+    print("🧪 Testing parallel exploration...")
+    print("=" * 50)
+
+    backend = PromptLog(responses=[
+        json.dumps({"action": "explore", "refs": ["e1", "[ref=e2]", "e3", "e9"]}),
+        json.dumps({"action": "complete", "value": "Laptop B is the cheapest at $499"}),
+    ])
+    main = FakeBrowser(pages={"https://shop.test/laptops": RESULTS})
+    orchestrator = Orchestrator(browser=main, ai_client=AnthropicClient(backend=backend))
+    orchestrator.settle_seconds = 0
+    orchestrator.explorer_factory = SlowBrowser
+    SlowBrowser.opened.clear()
+
+    start = time.time()
+    result = orchestrator.execute_goal("Which laptop is cheapest?", start_url="https://shop.test/laptops")
+    elapsed = time.time() - start
+    print(f"Explored 3 pages (0.3s each) in {elapsed:.2f}s")
+    assert result == "Laptop B is the cheapest at $499"
+    # the three pages loaded at the same time, not one after another
+    assert elapsed < 0.8
+
+    # every summary made it into the next prompt, the main tab stayed put
+    assert "Pages you explored" not in backend.prompts[0]
+    for url in PRODUCTS:
+        assert f"[{url}]" in backend.prompts[1]
+    assert '"$499"' in backend.prompts[1]
+    assert main.calls == [("navigate", "https://shop.test/laptops")]
+    assert "explore 'https://shop.test/laptop-a" in orchestrator.history.summary()
+
+    # one session per tab, closed when the goal ended
+    assert len(SlowBrowser.opened) == 3
+    assert all(browser.client.closed for browser in SlowBrowser.opened)
+    assert orchestrator.explorer_pool is None
+    print("\n✅ Parallel exploration test completed!")
+
+if __name__ == "__main__":
+    test_summaries()
+    test_explore_runs_pages_in_parallel()
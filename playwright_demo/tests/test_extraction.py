@@ -0,0 +1,96 @@
+from src.browser.extraction import refine_records, parse_price, format_records, build_extraction_script, \
+    spec_covers_goal
+from src.browser.browser_actions import BrowserAutomator
+from src.ai.ai_client import AnthropicClient
+from src.ai.llm_backend import LocalBackend
+from src.orchestrator import Orchestrator
+from tests.fake_browser import FakeBrowser
+import json
+
+LISTINGS = [
+    {"name": "Acer Aspire 3 Laptop", "price": "$449.99", "link": "https://shop.test/acer"},
+    {"name": "Acer Aspire 3 Laptop", "price": "$449.99", "link": "https://shop.test/acer"},
+    {"name": "HP 14 Laptop", "price": "$329.00", "link": "https://shop.test/hp"},
+    {"name": "MacBook Air Laptop", "price": "$1,099.00", "link": "https://shop.test/mac"},
+    {"name": "Laptop Sleeve", "price": None, "link": "https://shop.test/sleeve"},
+    {"name": "", "price": "$5", "link": "https://shop.test/empty"},
+]
+
+class ScriptedClient:
+    def __init__(self, response):
+        self.response = response
+        self.arguments = None
+
+    def send_tool_call(self, tool_name, parameters=None):
+        self.arguments = parameters
+        return self.response
+
+def test_refine_records():
+    print("🧪 Testing local filtering and sorting of extracted records...")
+    print("=" * 50)
+
+    assert parse_price("$1,099.00") == 1099.0
+    assert parse_price("Free") is None
+
+    cheapest = refine_records(LISTINGS, {"max_price": "$500", "contains": "laptop"})
+    assert [r["name"] for r in cheapest] == ["HP 14 Laptop", "Acer Aspire 3 Laptop"]
+
+    # unpriced records go last, duplicates and nameless records are dropped
+    everything = refine_records(LISTINGS, {"sort": "price_desc", "limit": 10})
+    assert [r["link"] for r in everything] == [
+        "https://shop.test/mac", "https://shop.test/acer", "https://shop.test/hp", "https://shop.test/sleeve"
+    ]
+    assert format_records(cheapest[:1]) == "1. HP 14 Laptop - $329.00 (https://shop.test/hp)"
+    print("\n✅ Record refinement test completed!")
+
+def test_browser_extract_parses_evaluate_result():
+    print("🧪 Testing BrowserAutomator.extract...")
+    print("=" * 50)
+
+    browser = BrowserAutomator(load_profile="full")
+    browser.initialized = True
+    text = "### Result\n" + json.dumps(json.dumps(LISTINGS)) + "\n\n### Ran Playwright code\n```js\n```"
+    browser.client = ScriptedClient({"result": {"content": [{"type": "text", "text": text}]}})
+
+    records = browser.extract({"action": "extract", "selector": "div.result", "max_price": 400})
+    assert [r["name"] for r in records] == ["HP 14 Laptop"]
+    # only the browser relevant parts of the spec go into the script
+    assert '"selector": "div.result"' in browser.client.arguments["function"]
+    assert "max_price" not in build_extraction_script({"max_price": 400})
+    print("\n✅ Extract test completed!")
+
+def test_orchestrator_answers_with_extract():
+    print("🧪 Testing Orchestrator finishes a goal with one extract step...")
+    print("=" * 50)
+
+    browser = FakeBrowser(
+        pages={"https://shop.test/s?k=laptop": '- link "HP 14 Laptop" [ref=e1]'},
+        records={"https://shop.test/s?k=laptop": LISTINGS}
+    )
+    backend = LocalBackend(responses=[json.dumps({"action": "extract", "max_price": 500, "limit": 1})])
+    orchestrator = Orchestrator(browser=browser, ai_client=AnthropicClient(backend=backend))
+    orchestrator.settle_seconds = 0
+
+    result = orchestrator.execute_goal("Find the cheapest laptop under $500", start_url="https://shop.test/s?k=laptop")
+    assert result == "1. HP 14 Laptop - $329.00 (https://shop.test/hp)"
+    assert backend.calls == 1
+
+    # the goal asks for more than a price range: the records go back to the model, which picks the answer
+    assert spec_covers_goal("Find the cheapest laptop under $500", {"max_price": "$500"})
+    assert not spec_covers_goal("Find a laptop with 16GB RAM under $500", {"max_price": 500})
+    assert not spec_covers_goal("Find a cheap laptop", {"max_price": 500})
+    backend = LocalBackend(
+        responses=[json.dumps({"action": "extract", "max_price": 500})],
+        rules=[(r"HP 14 Laptop - \$329\.00", json.dumps({"action": "complete", "value": "Acer Aspire 3, it has 16GB"}))]
+    )
+    orchestrator = Orchestrator(browser=browser, ai_client=AnthropicClient(backend=backend))
+    orchestrator.settle_seconds = 0
+    result = orchestrator.execute_goal("Find a laptop with 16GB RAM under $500", start_url="https://shop.test/s?k=laptop")
+    assert result == "Acer Aspire 3, it has 16GB"
+    assert backend.calls == 2
+    print("\n✅ Orchestrator extract test completed!")
+
+if __name__ == "__main__":
+    test_refine_records()
+    test_browser_extract_parses_evaluate_result()
+    test_orchestrator_answers_with_extract()
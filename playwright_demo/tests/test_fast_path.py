@@ -0,0 +1,107 @@
+from src.ai.fast_path import FastPathRules
+from src.ai.action_history import ActionHistory
+from src.ai.llm_backend import LocalBackend
+from src.ai.ai_client import AnthropicClient
+from src.orchestrator import Orchestrator
+from src.utils.snapshot_parser import SnapshotParser
+from tests.fake_browser import FakeBrowser
+import json
+
+SEARCH_PAGE = """- generic [ref=e2]:
+  - combobox "Search Amazon" [ref=e26] [active]
+  - button "Go" [ref=e27] [cursor=pointer]
+  - link "Today's \\"Deals\\"" [ref=e28] [cursor=pointer]:
+    - /url: /deals
+"""
+
+def test_snapshot_parser():
+    print("🧪 Testing SnapshotParser...")
+    print("=" * 50)
+
+    parser = SnapshotParser()
+    elements = parser.parse_yaml(SEARCH_PAGE)
+
+    assert [e["ref"] for e in elements] == ["e2", "e26", "e27", "e28"]
+    assert elements[1]["role"] == "combobox" and elements[1]["attributes"] == ["active"]
+    assert elements[3]["name"] == 'Today\'s "Deals"' and elements[3]["url"] == "/deals"
+    assert parser.find_element(elements, role="button")["ref"] == "e27"
+    assert [e["ref"] for e in parser.find_search_boxes(elements)] == ["e26"]
+    print("\n✅ SnapshotParser test completed!")
+
+def test_fast_path_chain():
+    print("🧪 Testing navigate -> fill -> press Enter chain...")
+    print("=" * 50)
+
+    rules = FastPathRules()
+    elements = SnapshotParser().parse_yaml(SEARCH_PAGE)
+    goal = "Go to amazon and search for wireless mouse"
+
+    # on google, the goal names amazon so go there
+    action = rules.suggest(goal, [], "https://www.google.com")
+    assert action["action"] == "navigate" and action["value"] == "https://www.amazon.com"
+
+    # on amazon with one search box, fill it
+    action = rules.suggest(goal, elements, "https://www.amazon.com/", dict(action, ok=True))
+    assert action["action"] == "fill" and action["ref"] == "e26" and action["value"] == "wireless mouse"
+
+    # right after filling, submit
+    action = rules.suggest(goal, elements, "https://www.amazon.com/", dict(action, ok=True))
+    assert action["action"] == "press_enter"
+    print("\n✅ Fast path chain test completed!")
+
+def test_fast_path_defers_to_ai():
+    print("🧪 Testing fast path leaves unclear steps to the AI...")
+    print("=" * 50)
+
+    rules = FastPathRules()
+    # no site and no search in the goal
+    assert rules.suggest("Find the cheapest laptop", [], "https://www.google.com") is None
+    # two search boxes, don't guess
+    two_boxes = SnapshotParser().parse_yaml('- searchbox "Search" [ref=e1]\n- searchbox "Search docs" [ref=e2]')
+    assert rules.suggest("search for python", two_boxes, "https://python.org") is None
+    assert rules.search_query("search amazon for 'usb c cable' under $20") == "usb c cable"
+    assert rules.site_url("open github.com and look around") == "https://github.com"
+    # "on" doesn't mean "go there"
+    assert rules.site_url("turn on dark mode on github") is None
+
+    # once the goal has been on the named site, opening a result elsewhere isn't undone
+    goal = "Go to google and search for python tutorial, open the first result"
+    assert rules.suggest(goal, [], "about:blank")["value"] == "https://www.google.com"
+    result_click = {"action": "click", "ref": "e40", "ok": True}
+    history = ActionHistory()
+    history.record(1, {"action": "navigate", "value": "https://www.google.com"}, True, "about:blank", "p1")
+    history.record(2, {"action": "click", "ref": "e40"}, True, "https://www.google.com/search?q=python", "p2")
+    assert rules.suggest(goal, [], "https://realpython.com/python-first-steps/", result_click, history) is None
+    print("\n✅ Fast path fallback test completed!")
+
+def test_fast_path_stops_after_search():
+    print("🧪 Testing the fast path past the results page...")
+    print("=" * 50)
+
+    # the results page has the same search box, the goal's query must not be typed in again
+    results_page = SEARCH_PAGE + '- link "Logitech M185 Wireless Mouse" [ref=e40] [cursor=pointer]:\n  - /url: /dp/1\n'
+    pages = {"https://www.amazon.com/": SEARCH_PAGE,
+             "https://www.amazon.com/s?k=wireless+mouse": results_page,
+             "https://www.amazon.com/dp/1": '- heading "Logitech M185" [ref=e1]'}
+    links = {("https://www.amazon.com/", "Enter"): "https://www.amazon.com/s?k=wireless+mouse",
+             ("https://www.amazon.com/s?k=wireless+mouse", "e40"): "https://www.amazon.com/dp/1"}
+    browser = FakeBrowser(pages=pages, links=links)
+    backend = LocalBackend(responses=[json.dumps({"action": "click", "ref": "e40"}),
+                                      json.dumps({"action": "complete", "value": "opened the first mouse"})])
+    orchestrator = Orchestrator(browser=browser, ai_client=AnthropicClient(backend=backend))
+    orchestrator.settle_seconds = 0
+    orchestrator.fill_settle_seconds = 0
+    result = orchestrator.execute_goal("Search for wireless mouse and open the first result",
+                                       start_url="https://www.amazon.com/", run_id=None)
+    print(f"Browser calls: {browser.calls}")
+    assert result == "opened the first mouse"
+    actions = [call[0] for call in browser.calls if call[0] != "screenshot"]
+    assert actions.count("fill") == 1 and actions.count("press_enter") == 1
+    assert ("click", "e40") in browser.calls and backend.calls == 2
+    print("\n✅ Fast path results page test completed!")
+
+if __name__ == "__main__":
+    test_snapshot_parser()
+    test_fast_path_chain()
+    test_fast_path_defers_to_ai()
+    test_fast_path_stops_after_search()
@@ -0,0 +1,121 @@
+from src.jobs.job_queue import JobQueue
+from src.jobs.worker import JobWorker
+from src.jobs.http_api import make_server
+from urllib.request import urlopen, Request
+import os
+import json
+import time
+import tempfile
+import threading
+
+def make_queue():
+    return JobQueue(os.path.join(tempfile.mkdtemp(), "jobs.sqlite3"))
+
+class FakeOrchestrator:
+    """Succeeds unless the goal says "fail" (runs out of steps) or "crash" (raises), records which goals ran"""
+
+    ran = []
+    lock = threading.Lock()
+
+    def __init__(self):
+        self.goal_achieved = False
+        self.goal_stopped = False
+
+    def execute_goal(self, goal, start_url="https://google.com", run_id=None):
+        with self.lock:
+            self.ran.append(goal)
+        time.sleep(0.01)
+        if "crash" in goal:
+            raise RuntimeError("browser went away")
+        self.goal_achieved = "fail" not in goal
+        self.goal_stopped = not self.goal_achieved
+        return f"answer to {goal}" if self.goal_achieved else "Did not complete goal within 20 steps"
+
+def test_lease_retry_and_expiry():
+    print("🧪 Testing job leases and retries...")
+    print("=" * 50)
+
+    queue = make_queue()
+    first = queue.submit("goal one", max_attempts=2)
+    second = queue.submit("goal two", max_attempts=1)
+
+    job = queue.claim("worker-a", lease_seconds=60)
+    assert job["id"] == first and job["status"] == "running" and job["attempts"] == 1
+    # the other worker gets the next job, never the leased one
+    assert queue.claim("worker-b", lease_seconds=0.05)["id"] == second
+    assert queue.claim("worker-c") is None
+
+    # failed attempt goes back in the queue, only the lease owner can report
+    assert not queue.fail(first, "worker-b", "not mine")
+    assert queue.fail(first, "worker-a", "timeout")
+    assert queue.get(first)["status"] == "queued"
+
+    # worker-b died: its lease runs out and job two (no attempts left) is failed
+    time.sleep(0.1)
+    assert queue.claim("worker-c")["id"] == first
+    assert queue.get(second)["status"] == "failed"
+    assert queue.complete(first, "worker-c", "done!")
+    assert queue.get(first)["result"] == "done!"
+    assert queue.counts() == {"queued": 0, "running": 0, "done": 1, "failed": 1}
+
+    # a final failure doesn't go back in the queue, whatever attempts are left
+    third = queue.submit("goal three", max_attempts=3)
+    queue.claim("worker-a")
+    assert queue.fail(third, "worker-a", "Did not complete goal within 20 steps", retry=False)
+    assert queue.get(third)["status"] == "failed" and queue.get(third)["attempts"] == 1
+    print("\n✅ Lease test completed!")
+
+def test_workers_drain_queue_once_each():
+    print("🧪 Testing concurrent workers...")
+    print("=" * 50)
+
+    queue = make_queue()
+    for number in range(12):
+        goal = {5: "please fail", 8: "please crash"}.get(number, f"goal {number}")
+        queue.submit(goal, max_attempts=2)
+
+    FakeOrchestrator.ran = []
+    workers = [JobWorker(queue, concurrency=3, poll_interval=0.05, orchestrator_factory=FakeOrchestrator,
+                         worker_name=f"host{n}") for n in range(2)]
+    for worker in workers:
+        worker.start()
+    deadline = time.time() + 20
+    while time.time() < deadline and queue.counts()["done"] + queue.counts()["failed"] < 12:
+        time.sleep(0.05)
+    for worker in workers:
+        worker.stop()
+
+    assert queue.counts() == {"queued": 0, "running": 0, "done": 10, "failed": 2}
+    # every good goal ran exactly once, running out of steps is final, the crashing one used both attempts
+    assert len(FakeOrchestrator.ran) == 13
+    assert FakeOrchestrator.ran.count("please fail") == 1
+    assert FakeOrchestrator.ran.count("please crash") == 2
+    assert sum(worker.completed for worker in workers) == 10
+    print("\n✅ Worker test completed!")
+
+def test_http_endpoint():
+    print("🧪 Testing the job HTTP endpoint...")
+    print("=" * 50)
+
+    queue = make_queue()
+    server = make_server(queue, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    request = Request(f"{base}/jobs", data=json.dumps({"goal": "Find a laptop"}).encode(), method="POST",
+                      headers={"Content-Type": "application/json"})
+    job_id = json.load(urlopen(request))["id"]
+    job = json.load(urlopen(f"{base}/jobs/{job_id}"))
+    assert job["goal"] == "Find a laptop" and job["status"] == "queued"
+    assert json.load(urlopen(f"{base}/stats"))["queued"] == 1
+    assert [j["id"] for j in json.load(urlopen(f"{base}/jobs?status=queued"))] == [job_id]
+    # the worker's metrics, for Prometheus
+    assert "# TYPE agent_goals_total counter" in urlopen(f"{base}/metrics").read().decode("utf-8")
+    server.shutdown()
+    server.server_close()
+    print("\n✅ HTTP endpoint test completed!")
+
+if __name__ == "__main__":
+    test_lease_retry_and_expiry()
+    test_workers_drain_queue_once_each()
+    test_http_endpoint()
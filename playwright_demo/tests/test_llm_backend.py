@@ -0,0 +1,60 @@
+from src.ai.llm_backend import LocalBackend, RecordingBackend, create_backend
+from src.ai.ai_client import AnthropicClient
+import json
+import os
+import tempfile
+
+def test_local_backend():
+    print("🧪 Testing LocalBackend...")
+    print("=" * 50)
+
+    click = json.dumps({"action": "click", "ref": "e1", "goal_complete": False})
+    backend = LocalBackend(
+        responses=[click],
+        rules=[(r"amazon", '{"action": "navigate", "value": "https://amazon.com"}')]
+    )
+
+    # rules win over scripted responses
+    assert "amazon.com" in backend.complete("Go to amazon")
+    # scripted responses are handed out in order, then the default completes the goal
+    assert backend.complete("anything") == click
+    assert json.loads(backend.complete("anything"))["action"] == "complete"
+
+    # streaming gives back the exact same text in pieces
+    chunks = list(backend.stream("anything"))
+    assert len(chunks) > 1
+    assert "".join(chunks) == backend.default_response
+
+    # batch answers keep prompt order
+    assert backend.complete_batch(["Go to amazon", "other"]) == [
+        backend.complete("Go to amazon"), backend.default_response
+    ]
+    print("\n✅ LocalBackend test completed!")
+
+def test_recording_round_trip():
+    print("🧪 Testing RecordingBackend -> LocalBackend replay...")
+    print("=" * 50)
+
+    path = os.path.join(tempfile.mkdtemp(), "recording.jsonl")
+    recorder = RecordingBackend(LocalBackend(responses=["first", "second"]), path)
+    recorder.complete("prompt one")
+    recorder.complete("prompt two")
+
+    replay = LocalBackend.from_recording(path)
+    assert replay.complete("prompt two") == "second"
+    assert replay.complete("prompt one") == "first"
+    print("\n✅ Recording test completed!")
+
+def test_client_uses_backend():
+    print("🧪 Testing AnthropicClient with an injected backend...")
+    print("=" * 50)
+
+    client = AnthropicClient(backend=create_backend("local", responses=["hello"]))
+    assert client.model == "local"
+    assert client.get_next_action("Say hello") == "hello"
+    print("\n✅ Client backend test completed!")
+
+if __name__ == "__main__":
+    test_local_backend()
+    test_recording_round_trip()
+    test_client_uses_backend()
@@ -0,0 +1,66 @@
+from src.browser.load_profile import get_load_profile, should_block, mcp_server_args
+import os
+import json
+import tempfile
+import threading
+
+def test_should_block():
+    print("🧪 Testing load profile request filtering...")
+    print("=" * 50)
+
+    full = get_load_profile("full")
+    no_media = get_load_profile("no-media")
+    text_only = get_load_profile("text-only")
+    page = "https://www.amazon.com/s?k=laptop"
+
+    assert not should_block(full, "image", "https://m.media-amazon.com/a.jpg", page)
+    assert should_block(no_media, "image", "https://m.media-amazon.com/a.jpg", page)
+    assert should_block(no_media, "script", "https://securepubads.g.doubleclick.net/tag.js", page)
+    assert not should_block(no_media, "script", "https://cdn.example.com/app.js", page)
+    # text-only also drops third-party hosts, but never the page document itself
+    assert should_block(text_only, "script", "https://cdn.example.com/app.js", page)
+    assert not should_block(text_only, "script", "https://images.amazon.com/app.js", page)
+    assert not should_block(text_only, "document", "https://cdn.example.com/", page)
+    print("\n✅ Request filtering test completed!")
+
+def test_mcp_server_args():
+    print("🧪 Testing MCP server arguments per profile...")
+    print("=" * 50)
+
+    assert mcp_server_args(get_load_profile("full")) == []
+
+    args = mcp_server_args(get_load_profile("text-only"), config_dir=tempfile.mkdtemp())
+    assert args[0] == "--config" and args[-2:] == ["--image-responses", "omit"]
+    with open(args[1]) as f:
+        config = json.load(f)
+    assert "--blink-settings=imagesEnabled=false" in config["browser"]["launchOptions"]["args"]
+    assert "https://fonts.gstatic.com" in config["network"]["blockedOrigins"]
+
+    # clients starting servers at the same time each swap in a whole file, no temp files left behind
+    config_dir = tempfile.mkdtemp()
+    no_media = get_load_profile("no-media")
+    threads = [threading.Thread(target=mcp_server_args, args=(no_media, config_dir)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert os.listdir(config_dir) == ["playwright-mcp-no-media.json"]
+
+    # screenshots need images, the visual fallback defaults to loading everything
+    saved = {key: os.environ.pop(key, None) for key in ("BROWSER_LOAD_PROFILE", "VISUAL_FALLBACK")}
+    try:
+        assert get_load_profile()["name"] == "no-media"
+        os.environ["VISUAL_FALLBACK"] = "1"
+        assert get_load_profile()["name"] == "full"
+        os.environ["BROWSER_LOAD_PROFILE"] = "text-only"
+        assert get_load_profile()["name"] == "text-only"
+    finally:
+        for key, value in saved.items():
+            os.environ.pop(key, None)
+            if value is not None:
+                os.environ[key] = value
+    print("\n✅ MCP arguments test completed!")
+
+if __name__ == "__main__":
+    test_should_block()
+    test_mcp_server_args()
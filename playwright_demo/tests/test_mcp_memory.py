@@ -0,0 +1,52 @@
+from src.mcp_client import SessionMCPClient
+import io
+import time
+import tempfile
+
+class FakeProcess:
+    def __init__(self):
+        self.stdin = io.StringIO()
+
+def make_client(**kwargs):
+    return SessionMCPClient(load_profile="full", catalog_dir=tempfile.mkdtemp(), **kwargs)
+
+def test_notification_queue_is_bounded():
+    print("🧪 Testing bounded notification queue...")
+    print("=" * 50)
+
+    client = make_client(max_notifications=3)
+    start = time.time()
+    for number in range(10):
+        client._queue_notification({"method": "notifications/progress", "params": {"progress": number}})
+    # the reader thread never waits on a full queue, responses behind it would wait too
+    assert time.time() - start < 0.1
+
+    # nobody read them: only the newest 3 are kept, the rest are counted as dropped
+    assert client.response_queue.qsize() == 3
+    assert client.notifications_dropped == 7
+    assert client.response_queue.get()["params"]["progress"] == 7
+    print("\n✅ Bounded queue test completed!")
+
+def test_memory_stats_stay_flat():
+    print("🧪 Testing memory accounting...")
+    print("=" * 50)
+
+    client = make_client(stderr_lines=5)
+    # cancel notifications go nowhere, no server needed
+    client.process = FakeProcess()
+    client.max_cancelled = 4
+    for number in range(1000):
+        client.stderr_tail.append(f"line {number}")
+        client._record_latency("browser_snapshot", 0.1)
+        client.cancel_request(number, "test")
+
+    stats = client.memory_stats()
+    assert stats["stderr_lines"] == 5
+    assert stats["latency_samples"] == 50
+    assert stats["cancelled_ids"] == 4
+    assert stats["rss_bytes"] is None or stats["rss_bytes"] > 0
+    print("\n✅ Memory accounting test completed!")
+
+if __name__ == "__main__":
+    test_notification_queue_is_bounded()
+    test_memory_stats_stay_flat()
@@ -0,0 +1,64 @@
+from src.mcp_client import SessionMCPClient
+import os
+import sys
+import tempfile
+import time
+
+FAKE_SERVER = [sys.executable, os.path.join(os.path.dirname(__file__), "fake_mcp_server.py")]
+
+def make_client():
+    client = SessionMCPClient(load_profile="full", catalog_dir=tempfile.mkdtemp())
+    client.server_command = FAKE_SERVER
+    return client
+
+def test_crash_fails_fast_and_recovers():
+    print("🧪 Testing crash detection and automatic restart...")
+    print("=" * 50)
+
+    client = make_client()
+    assert client.complete_initialization()
+    client.send_tool_call("browser_navigate", {"url": "https://example.com"})
+    first_process = client.process
+
+    # the crash is answered right away (no 30 s wait) and the server restarted. The tool isn't known to be safe
+    # to repeat, so it isn't sent again: the caller is told to look at the page first
+    start = time.time()
+    result = client.send_tool_call("crash_server")
+    assert time.time() - start < 10
+    assert client.restart_count == 1
+    assert client.process is not first_process
+    assert result["error"]["server_crashed"] and result["error"]["restarted"]
+
+    # a tool that is safe to repeat is retried once on the fresh server (and that crashed too)
+    client.idempotent_tools = client.idempotent_tools | {"crash_server"}
+    result = client.send_tool_call("crash_server")
+    assert client.restart_count == 2
+    assert result["error"]["server_crashed"] and "restarted" not in result["error"]
+
+    # the restarted server was sent back to the last URL and still takes calls
+    result = client.send_tool_call("browser_snapshot")
+    assert "browser_snapshot" in result["result"]["content"][0]["text"]
+    assert client.last_url == "https://example.com"
+    assert any("tools/call" in line for line in client.stderr_tail)
+    client.close()
+    print("\n✅ Supervisor test completed!")
+
+def test_restart_limit():
+    print("🧪 Testing restart limit...")
+    print("=" * 50)
+
+    client = make_client()
+    client.max_restarts = 0
+    assert client.complete_initialization()
+    result = client.send_tool_call("crash_server")
+    assert result["error"]["server_crashed"]
+    # no restarts allowed: later calls fail immediately instead of hanging
+    start = time.time()
+    assert client.send_tool_call("browser_snapshot")["error"]
+    assert time.time() - start < 1
+    client.close()
+    print("\n✅ Restart limit test completed!")
+
+if __name__ == "__main__":
+    test_crash_fails_fast_and_recovers()
+    test_restart_limit()
@@ -0,0 +1,92 @@
+from src.mcp_client import SessionMCPClient
+from src.browser.browser_actions import BrowserAutomator
+import os
+import sys
+import tempfile
+import time
+
+FAKE_SERVER = [sys.executable, os.path.join(os.path.dirname(__file__), "fake_mcp_server.py")]
+
+class ScriptedClient:
+    """Answers tool calls from a list of canned responses, in order"""
+
+    def __init__(self, responses, last_url=None):
+        self.responses = list(responses)
+        self.last_url = last_url
+        self.calls = []
+
+    def send_tool_call(self, tool_name, parameters=None):
+        self.calls.append(tool_name)
+        return self.responses.pop(0)
+
+def evaluate_result(text):
+    return {"result": {"content": [{"type": "text", "text": f"### Result\n\"{text}\"\n"}]}}
+
+TIMED_OUT = {"error": {"code": -32001, "message": "browser_click timed out", "timed_out": True}}
+
+def test_adaptive_timeout_policy():
+    print("🧪 Testing adaptive per-tool timeouts...")
+    print("=" * 50)
+
+    client = SessionMCPClient(load_profile="full", catalog_dir=tempfile.mkdtemp())
+    # too few samples: default
+    assert client.timeout_for("browser_snapshot") == 30
+    for seconds in (0.2, 0.3, 0.25, 0.3, 0.4):
+        client._record_latency("browser_snapshot", seconds)
+    # fast tool fails fast, but never below min_timeout
+    assert client.timeout_for("browser_snapshot") == 5
+    for seconds in (20, 25, 30, 28, 35):
+        client._record_latency("browser_navigate", seconds)
+    assert client.timeout_for("browser_navigate") == 105
+    client.timeout_overrides["browser_navigate"] = 60
+    assert client.timeout_for("browser_navigate") == 60
+    print("\n✅ Timeout policy test completed!")
+
+def test_timeout_cancels_request():
+    print("🧪 Testing timeout cancellation...")
+    print("=" * 50)
+
+    client = SessionMCPClient(load_profile="full", catalog_dir=tempfile.mkdtemp())
+    client.server_command = FAKE_SERVER
+    assert client.complete_initialization()
+    client.timeout_overrides["slow_tool"] = 0.5
+
+    start = time.time()
+    result = client.send_tool_call("slow_tool", {"seconds": 1.5})
+    assert time.time() - start < 1.5
+    assert result["error"]["timed_out"]
+
+    # the server was told to stop, and its late answer doesn't end up in the notification queue
+    time.sleep(1.5)
+    result = client.send_tool_call("browser_snapshot")
+    assert "browser_snapshot" in result["result"]["content"][0]["text"]
+    assert any("notifications/cancelled" in line for line in client.stderr_tail)
+    assert client.response_queue.empty()
+    client.close()
+    print("\n✅ Cancellation test completed!")
+
+def test_click_timeout_checks_navigation():
+    print("🧪 Testing navigation-aware click completion...")
+    print("=" * 50)
+
+    browser = BrowserAutomator(load_profile="full")
+    browser.initialized = True
+    browser.navigation_poll_interval = 0
+
+    # timed out but the page moved on: success
+    browser.client = ScriptedClient([TIMED_OUT, evaluate_result("https://b.com/results complete")], last_url="https://b.com/")
+    assert browser.click("e5")
+    assert browser.client.last_url == "https://b.com/results"
+
+    # timed out, page still loading, then done on the same URL: failure
+    browser.client = ScriptedClient(
+        [TIMED_OUT, {"error": {"timed_out": True}}, evaluate_result("https://b.com/ complete")], last_url="https://b.com/"
+    )
+    assert not browser.press_enter()
+    assert browser.client.calls == ["browser_press_key", "browser_evaluate", "browser_evaluate"]
+    print("\n✅ Navigation check test completed!")
+
+if __name__ == "__main__":
+    test_adaptive_timeout_policy()
+    test_timeout_cancels_request()
+    test_click_timeout_checks_navigation()
@@ -0,0 +1,137 @@
+from src.utils.metrics import MetricsRegistry, start_metrics_server, GOALS, STEPS, ACTIVE_GOALS, \
+    MCP_SECONDS, ACTIVE_SESSIONS, PARSE_FAILURES, LLM_SECONDS
+from src.mcp_client import SessionMCPClient
+from src.ai.ai_client import AnthropicClient
+from src.ai.llm_backend import LocalBackend
+from src.orchestrator import Orchestrator
+from tests.fake_browser import FakeBrowser
+import os
+import sys
+import json
+import tempfile
+import threading
+import urllib.request
+
+FAKE_SERVER = [sys.executable, os.path.join(os.path.dirname(__file__), "fake_mcp_server.py")]
+
+def test_counters_and_histograms():
+    print("🧪 Testing the metrics registry...")
+    print("=" * 50)
+
+    registry = MetricsRegistry()
+    calls = registry.counter("test_calls_total", "Calls", ("tool",))
+    latency = registry.histogram("test_seconds", "Latency", ("tool",), buckets=(0.1, 1.0))
+    # defining the same metric twice gives back the first one, a clash is an error
+    assert registry.counter("test_calls_total", "Calls", ("tool",)) is calls
+    try:
+        registry.gauge("test_calls_total", "Calls")
+        assert False, "a gauge with a counter's name should be refused"
+    except ValueError:
+        pass
+
+    # every thread counts into its own shard, nothing is lost
+    def work():
+        for _ in range(10000):
+            calls.inc(1, "browser_click")
+        latency.observe(0.05, "browser_click")
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latency.observe(0.5, 'say "hi"\n')
+    latency.observe(5, 'say "hi"\n')
+
+    assert calls.value("browser_click") == 80000
+    assert latency.count("browser_click") == 8 and abs(latency.sum("browser_click") - 0.4) < 1e-9
+
+    text = registry.render()
+    print(text)
+    assert "# TYPE test_calls_total counter" in text
+    assert 'test_calls_total{tool="browser_click"} 80000' in text
+    # buckets are cumulative, label values are escaped
+    assert 'test_seconds_bucket{tool="say \\"hi\\"\\n",le="0.1"} 0' in text
+    assert 'test_seconds_bucket{tool="say \\"hi\\"\\n",le="1"} 1' in text
+    assert 'test_seconds_bucket{tool="say \\"hi\\"\\n",le="+Inf"} 2' in text
+    assert 'test_seconds_count{tool="browser_click"} 8' in text
+
+    # short lived threads (a new pool per explore step, heartbeats...) don't leave a shard each behind
+    def short_job():
+        calls.inc(1, "browser_snapshot")
+        latency.observe(0.5, "browser_snapshot")
+    for _ in range(50):
+        batch = [threading.Thread(target=short_job) for _ in range(40)]
+        for thread in batch:
+            thread.start()
+        for thread in batch:
+            thread.join()
+    print(f"Live shards after 2000 threads: {len(calls._shards)}")
+    assert calls.value("browser_snapshot") == 2000 and latency.count("browser_snapshot") == 2000
+    assert len(calls._shards) <= 5 and len(latency._shards) <= 5
+    assert calls.value("browser_click") == 80000
+
+    # totals from another process add up, gauges don't carry over
+    other = MetricsRegistry()
+    other.counter("test_calls_total", "Calls", ("tool",)).inc(5, "browser_click")
+    other.histogram("test_seconds", "Latency", ("tool",), buckets=(0.1, 1.0)).observe(0.05, "browser_click")
+    other.gauge("test_open", "Open").inc()
+    gauge = registry.gauge("test_open", "Open")
+    registry.merge(other.export())
+    assert calls.value("browser_click") == 80005 and latency.count("browser_click") == 9
+    assert gauge.value() == 0
+    print("\n✅ Metrics registry test completed!")
+
+def test_agent_metrics_and_endpoint():
+    print("🧪 Testing the agent's metrics and the /metrics endpoint...")
+    print("=" * 50)
+
+    goals_before = GOALS.value("success")
+    steps_before = STEPS.value()
+    parse_failures_before = PARSE_FAILURES.value()
+    pages = {"https://shop.test": '- button "Buy" [ref=e1]'}
+    responses = ["not json at all",
+                 json.dumps({"action": "click", "ref": "e1"}),
+                 json.dumps({"action": "complete", "value": "bought"})]
+    orchestrator = Orchestrator(browser=FakeBrowser(pages=pages),
+                                ai_client=AnthropicClient(backend=LocalBackend(responses=responses)))
+    orchestrator.settle_seconds = 0
+    assert orchestrator.execute_goal("Buy it", start_url="https://shop.test", run_id=None) == "bought"
+    assert GOALS.value("success") == goals_before + 1
+    assert STEPS.value() == steps_before + 3
+    assert PARSE_FAILURES.value() == parse_failures_before + 1
+    assert ACTIVE_GOALS.value() == 0
+    # streamed answers are timed like the others
+    client = AnthropicClient(backend=LocalBackend(default_response="{}"))
+    streamed_before = LLM_SECONDS.count(client.model)
+    assert "".join(client.stream_next_action("hi")) == "{}"
+    assert LLM_SECONDS.count(client.model) == streamed_before + 1
+
+    # MCP round trips per tool, and open sessions
+    sessions_before = ACTIVE_SESSIONS.value()
+    client = SessionMCPClient(load_profile="full", catalog_dir=tempfile.mkdtemp())
+    client.server_command = FAKE_SERVER
+    assert client.complete_initialization()
+    assert ACTIVE_SESSIONS.value() == sessions_before + 1
+    slow_before = MCP_SECONDS.count("slow_tool")
+    client.send_tool_call("slow_tool", {"seconds": 0.05})
+    assert MCP_SECONDS.count("slow_tool") == slow_before + 1
+    client.close()
+    assert ACTIVE_SESSIONS.value() == sessions_before
+
+    server = start_metrics_server(port=0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            text = response.read().decode("utf-8")
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert "# TYPE agent_steps_total counter" in text
+    assert 'agent_mcp_request_seconds_count{tool="slow_tool"}' in text
+    assert f'agent_goals_total{{result="success"}} {GOALS.value("success")}' in text
+    print("\n✅ Agent metrics test completed!")
+
+if __name__ == "__main__":
+    test_counters_and_histograms()
+    test_agent_metrics_and_endpoint()
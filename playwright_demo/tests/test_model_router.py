@@ -0,0 +1,78 @@
+from src.ai.model_router import ModelRouter
+from src.ai.ai_client import AnthropicClient
+from src.ai.llm_backend import LocalBackend
+from src.ai.response_parser import ResponseParser
+from src.orchestrator import Orchestrator
+from tests.fake_browser import FakeBrowser
+import os
+import json
+
+CLICK = json.dumps({"action": "click", "ref": "e1", "confidence": 0.9, "goal_complete": False})
+UNSURE = json.dumps({"action": "click", "ref": "e2", "confidence": 0.2, "goal_complete": False})
+
+def make_router(small_responses):
+    small = AnthropicClient(backend=LocalBackend(responses=small_responses, model="small"))
+    large = AnthropicClient(backend=LocalBackend(responses=[CLICK] * 5, model="large"))
+    return ModelRouter(small, large, ResponseParser()), small, large
+
+def test_easy_step_stays_small():
+    print("🧪 Testing easy step goes to the small model...")
+    router, small, large = make_router([CLICK])
+
+    action = router.get_action("prompt", snapshot="- textbox [ref=e1]", step_number=1)
+    assert action["ref"] == "e1"
+    assert small.backend.calls == 1 and large.backend.calls == 0
+    print("✅ Easy step test completed!")
+
+def test_escalation():
+    print("🧪 Testing escalation on low confidence and parse failure...")
+    router, small, large = make_router([UNSURE, "not json at all"])
+
+    router.get_action("prompt", snapshot="", step_number=1)
+    router.get_action("prompt", snapshot="", step_number=2)
+    assert large.backend.calls == 2
+    assert router.summary()["escalations"] == 2
+    print("✅ Escalation test completed!")
+
+def test_hard_steps_skip_small():
+    print("🧪 Testing hard steps go straight to the large model...")
+    router, small, large = make_router([CLICK])
+
+    router.get_action("prompt", snapshot="x" * 50000, step_number=1)
+    router.get_action("prompt", snapshot="", step_number=15)
+    router.get_action("prompt", snapshot="", step_number=1, recent_failures=2)
+    assert small.backend.calls == 0 and large.backend.calls == 3
+    router.print_summary()
+    print("✅ Hard step test completed!")
+
+def test_small_tier_per_provider_and_goal():
+    print("🧪 Testing the small tier follows the provider and resets per goal...")
+
+    assert ModelRouter.small_model_for("anthropic") == ModelRouter.SMALL_MODEL
+    # no small model for this provider: no second client with a Claude model name, every step goes to the one model
+    previous = os.environ.get("LLM_BACKEND")
+    os.environ["LLM_BACKEND"] = "local"
+    try:
+        orchestrator = Orchestrator(browser=FakeBrowser(pages={"https://shop.test": '- button "Buy" [ref=e1]'}))
+    finally:
+        if previous is None:
+            os.environ.pop("LLM_BACKEND")
+        else:
+            os.environ["LLM_BACKEND"] = previous
+    assert orchestrator.router.small_client is orchestrator.router.large_client
+
+    # the summary covers one goal, escalations of an earlier goal can't make it go negative
+    router, small, large = make_router([UNSURE])
+    router.get_action("prompt", snapshot="", step_number=1)
+    router.reset()
+    router.get_action("prompt", snapshot="", step_number=1)
+    stats = router.summary()
+    assert (stats["small_calls"], stats["large_calls"], stats["escalations"]) == (1, 0, 0)
+    assert not router.downgraded
+    print("✅ Provider small tier test completed!")
+
+if __name__ == "__main__":
+    test_easy_step_stays_small()
+    test_escalation()
+    test_hard_steps_skip_small()
+    test_small_tier_per_provider_and_goal()
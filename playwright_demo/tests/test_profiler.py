@@ -0,0 +1,115 @@
+from src.utils.profiler import RunProfiler
+from src.mcp_client import SessionMCPClient
+from src.ai.ai_client import AnthropicClient
+from src.ai.llm_backend import LocalBackend
+from src.orchestrator import Orchestrator
+from tests.fake_browser import FakeBrowser
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+
+FAKE_SERVER = [sys.executable, os.path.join(os.path.dirname(__file__), "fake_mcp_server.py")]
+
+def busy_work(seconds):
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += sum(range(200))
+    return total
+
+def test_sampling_profiler_tags_phases():
+    print("🧪 Testing the sampling profiler...")
+    print("=" * 50)
+
+    # another goal's thread keeps the CPU busy meanwhile, it isn't part of this run
+    stop_other = threading.Event()
+    def other_goal():
+        while not stop_other.is_set():
+            busy_work(0.01)
+    other = threading.Thread(target=other_goal, name="other-goal", daemon=True)
+    other.start()
+
+    profiler = RunProfiler("sample", output_dir=tempfile.mkdtemp(), interval=0.002, top=5)
+    profiler.start("phases")
+    profiler.set_phase("parse")
+    busy_work(0.15)
+    profiler.set_phase("settle")
+    with profiler.phase("mcp:browser_snapshot"):
+        time.sleep(0.1)
+    report = profiler.stop()
+    stop_other.set()
+    other.join()
+
+    # only this run's thread was sampled
+    assert all(line.startswith("MainThread;") for line in profiler.collapsed())
+    assert profiler.phase_seconds["parse"] >= 0.15
+    assert profiler.phase_seconds["settle/mcp:browser_snapshot"] >= 0.1
+    # the hot function is found, and its samples carry the thread and phase as root frames
+    assert any("busy_work" in frame for frame, _, _ in profiler.top_functions(3))
+    assert any(line.startswith("MainThread;parse;") and "busy_work" in line for line in profiler.collapsed())
+    assert any(line.startswith("MainThread;settle;mcp:browser_snapshot;") for line in profiler.collapsed())
+    assert "busy_work" in report
+
+    files = sorted(os.listdir(profiler.output_dir))
+    assert files == ["phases-top.txt", "phases.collapsed"]
+    # flamegraph input: "frame;frame;... count"
+    with open(os.path.join(profiler.output_dir, "phases.collapsed")) as f:
+        assert all(line.rsplit(" ", 1)[1].strip().isdigit() for line in f if line.strip())
+    print("\n✅ Sampling profiler test completed!")
+
+def test_cprofile_mode():
+    print("🧪 Testing the cProfile mode...")
+    print("=" * 50)
+
+    profiler = RunProfiler("cprofile", output_dir=tempfile.mkdtemp())
+    profiler.start("exact")
+    busy_work(0.05)
+    report = profiler.stop()
+    assert "busy_work" in report
+    assert sorted(os.listdir(profiler.output_dir)) == ["exact-top.txt", "exact.prof"]
+    print("\n✅ cProfile mode test completed!")
+
+def test_orchestrator_and_mcp_phases():
+    print("🧪 Testing profiled goals and MCP calls...")
+    print("=" * 50)
+
+    # off unless asked for
+    os.environ.pop("PROFILE", None)
+    assert RunProfiler.from_env() is None
+
+    pages = {"https://shop.test": '- button "Buy" [ref=e1]'}
+    backend = LocalBackend(responses=[json.dumps({"action": "click", "ref": "e1"}),
+                                      json.dumps({"action": "complete", "value": "bought"})], latency=0.1)
+    orchestrator = Orchestrator(browser=FakeBrowser(pages=pages), ai_client=AnthropicClient(backend=backend))
+    orchestrator.settle_seconds = 0
+    orchestrator.profiler = RunProfiler("sample", output_dir=tempfile.mkdtemp(), interval=0.002)
+    assert orchestrator.execute_goal("Buy it", start_url="https://shop.test", run_id=None) == "bought"
+
+    phases = orchestrator.profiler.phase_seconds
+    print(f"Phases: {dict(phases)}")
+    # the model latency shows up where the decision is made
+    assert phases["decide"] >= 0.2
+    assert {"setup", "snapshot", "parse", "act", "record", "settle", "finish"} <= set(phases)
+    assert not orchestrator.profiler.running
+
+    # the MCP client tags its tool calls, nested in whatever phase the caller is in
+    profiler = RunProfiler("sample", output_dir=tempfile.mkdtemp(), interval=0.002)
+    client = SessionMCPClient(load_profile="full", catalog_dir=tempfile.mkdtemp(), profiler=profiler)
+    client.server_command = FAKE_SERVER
+    assert client.complete_initialization()
+    profiler.start("mcp")
+    profiler.set_phase("snapshot")
+    client.send_tool_call("slow_tool", {"seconds": 0.1})
+    profiler.stop()
+    client.close()
+    assert profiler.phase_seconds["snapshot/mcp:slow_tool"] >= 0.1
+    assert any(line.startswith("mcp-reader;") for line in profiler.collapsed())
+    print("\n✅ Profiled goal test completed!")
+
+if __name__ == "__main__":
+    test_sampling_profiler_tags_phases()
+    test_cprofile_mode()
+    test_orchestrator_and_mcp_phases()
@@ -0,0 +1,71 @@
+from src.utils.snapshot_parser import SnapshotParser
+from src.browser.browser_actions import BrowserAutomator
+from src.ai.ai_client import AnthropicClient
+from src.ai.llm_backend import LocalBackend
+from src.orchestrator import Orchestrator
+from tests.fake_browser import FakeBrowser
+import json
+
+PAGE = '''- combobox "Search Amazon" [ref=e26]
+- button "Go" [ref=e27] [cursor=pointer]
+- link "Today's Deals" [ref=e30]'''
+
+def test_ref_index_checks():
+    print("🧪 Testing ref validation...")
+    print("=" * 50)
+
+    parser = SnapshotParser()
+    index = parser.build_ref_index(parser.parse_yaml(PAGE))
+    assert index.check({"action": "click", "ref": "e27"}) is None
+    assert index.check({"action": "fill", "ref": "e26", "value": "laptop"}) is None
+    assert "does not exist" in index.check({"action": "click", "ref": "e99"})
+    hint = index.check({"action": "fill", "ref": "e27", "value": "laptop"})
+    assert "button" in hint and "e26" in hint
+    # actions without refs and empty snapshots are never blocked
+    assert index.check({"action": "navigate", "value": "https://amazon.com"}) is None
+    assert parser.build_ref_index([]).check({"action": "click", "ref": "e1"}) is None
+    print("\n✅ Ref validation test completed!")
+
+def test_orchestrator_reasks_on_bad_ref():
+    print("🧪 Testing Orchestrator re-asks instead of sending a bad ref...")
+    print("=" * 50)
+
+    browser = FakeBrowser(pages={"https://shop.test": PAGE})
+    backend = LocalBackend(responses=[
+        json.dumps({"action": "fill", "ref": "e27", "value": "laptop"}),
+        json.dumps({"action": "click", "ref": "e30"}),
+        json.dumps({"action": "complete", "value": "done"}),
+    ])
+    orchestrator = Orchestrator(browser=browser, ai_client=AnthropicClient(backend=backend))
+    orchestrator.settle_seconds = 0
+
+    assert orchestrator.execute_goal("Open the deals", start_url="https://shop.test") == "done"
+    # the bad fill never reached the browser, the corrected click did
+    assert ("fill", "e27", "laptop") not in browser.calls
+    assert ("click", "e30") in browser.calls
+    print("\n✅ Re-ask test completed!")
+
+def test_real_element_name_is_sent():
+    print("🧪 Testing element names in MCP calls...")
+    print("=" * 50)
+
+    calls = []
+    class RecordingClient:
+        last_url = None
+        def send_tool_call(self, tool_name, parameters=None):
+            calls.append(parameters)
+            return {"result": {"content": []}}
+
+    orchestrator = Orchestrator(browser=FakeBrowser(pages={}), ai_client=AnthropicClient(backend=LocalBackend()))
+    browser = BrowserAutomator(load_profile="full")
+    browser.initialized = True
+    browser.client = RecordingClient()
+    element = orchestrator._describe_element({"role": "button", "name": "Go", "ref": "e27"})
+    assert browser.click("e27", element=element)
+    assert calls[0] == {"element": 'button "Go"', "ref": "e27"}
+    print("\n✅ Element name test completed!")
+
+if __name__ == "__main__":
+    test_ref_index_checks()
+    test_orchestrator_reasks_on_bad_ref()
+    test_real_element_name_is_sent()
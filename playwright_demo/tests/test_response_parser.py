@@ -0,0 +1,43 @@
+from src.ai.response_parser import ResponseParser, extract_json
+import time
+
+def test_extract_json_repairs():
+    print("🧪 Testing tolerant JSON extraction...")
+    print("=" * 50)
+
+    fenced = 'Here is my answer:\n```json\n{"action": "click", "ref": "e26"}\n```\nHope that helps!'
+    assert extract_json(fenced) == {"action": "click", "ref": "e26"}
+
+    single_quoted = "{'action': 'fill', 'ref': 'e3', 'value': 'say \"hi\"', 'goal_complete': False,}"
+    assert extract_json(single_quoted) == {
+        "action": "fill", "ref": "e3", "value": 'say "hi"', "goal_complete": False
+    }
+
+    # braces inside strings don't end the object early, and a bad first object falls through to the next
+    nested = 'Ignore {this} one. {"action": "complete", "value": "Found {3} items", "data": {"a": [1, 2,]}}'
+    assert extract_json(nested)["value"] == "Found {3} items"
+    assert extract_json(nested)["data"] == {"a": [1, 2]}
+
+    assert extract_json("no json here") is None
+    assert extract_json('{"action": "click"') is None
+    # thousands of unbalanced braces give up after a few tries instead of rescanning from each one
+    started = time.perf_counter()
+    assert extract_json("{" * 20000) is None
+    assert time.perf_counter() - started < 1
+    print("\n✅ JSON extraction test completed!")
+
+def test_parse_validates_schema():
+    print("🧪 Testing per-action schema validation...")
+    print("=" * 50)
+
+    parser = ResponseParser()
+    assert parser.parse('{"action": "click"}')["action"] == "error"
+    assert parser.parse('{"action": "fill", "ref": "e1"}')["message"] == "'fill' action missing 'value'"
+    assert parser.parse('{"action": "dance"}')["action"] == "error"
+    assert parser.parse('{"action": "click", "ref": "[ref=e26]"}')["ref"] == "e26"
+    assert parser.parse('```\n{"action": "press_enter"}\n```')["action"] == "press_enter"
+    print("\n✅ Schema validation test completed!")
+
+if __name__ == "__main__":
+    test_extract_json_repairs()
+    test_parse_validates_schema()
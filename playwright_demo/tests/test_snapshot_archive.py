@@ -0,0 +1,121 @@
+from src.snapshot_archive import SnapshotArchive, chunk_snapshot
+from src.ai.ai_client import AnthropicClient
+from src.ai.llm_backend import LocalBackend
+from src.orchestrator import Orchestrator
+from tests.fake_browser import FakeBrowser
+import os
+import json
+import tempfile
+import threading
+
+def make_page(results):
+    """Search page: same long header/nav/footer every time, only the result list changes"""
+    header = "".join(f'- link "Menu item {i}" [ref=n{i}]\n' for i in range(300))
+    items = "".join(f'- listitem: "{result}"\n' for result in results)
+    footer = "".join(f'- text: "Footer line {i}"\n' for i in range(300))
+    return header + items + footer
+
+def test_chunks_are_deduplicated():
+    print("🧪 Testing content-addressed snapshot storage...")
+    print("=" * 50)
+
+    first = make_page([f"Laptop {i}" for i in range(20)])
+    second = make_page([f"Phone {i}" for i in range(20)])
+    assert "".join(chunk_snapshot(first)) == first
+
+    # one line added near the top only changes the chunks around it
+    shifted = '- banner "Sale!"\n' + first
+    unchanged = set(chunk_snapshot(first)) & set(chunk_snapshot(shifted))
+    print(f"Chunks: {len(chunk_snapshot(first))}, unchanged after an insert at the top: {len(unchanged)}")
+    assert len(unchanged) >= len(chunk_snapshot(first)) - 2
+
+    archive = SnapshotArchive(tempfile.mkdtemp())
+    archive.start_run("run-a", "find laptops", "https://shop.test")
+    archive.add_step("run-a", 1, first, url="https://shop.test/laptops", action={"action": "click", "ref": "n1"})
+    archive.add_step("run-a", 2, second, url="https://shop.test/phones", ok=True)
+    archive.start_run("run-b", "find laptops again", "https://shop.test")
+    archive.add_step("run-b", 1, first, url="https://shop.test/laptops")
+
+    stats = archive.stats()
+    print(f"Stats: {stats}")
+    assert stats["runs"] == 2 and stats["steps"] == 3
+    # three big snapshots, stored once-ish and compressed
+    assert stats["stored_bytes"] * 10 < stats["raw_bytes"]
+
+    assert archive.get_snapshot("run-a", 2) == second
+    assert archive.get_snapshot("run-b", 1) == first
+    assert archive.get_snapshot("run-a", 3) is None
+    assert archive.header("run-a")["goal"] == "find laptops"
+    assert [entry["url"] for entry in archive.steps("run-a")] == ["https://shop.test/laptops", "https://shop.test/phones"]
+
+    # random access: a step only needs its own chunks
+    only_in_second = set(archive.steps("run-a")[1]["chunks"]) - set(archive.steps("run-a")[0]["chunks"])
+    for digest in only_in_second:
+        os.remove(archive._object_path(digest))
+    assert archive.get_snapshot("run-a", 1) == first
+
+    # goals running side by side store the same chunks at the same moment
+    shared = SnapshotArchive(tempfile.mkdtemp())
+    errors = []
+    def store(number):
+        try:
+            for step in range(5):
+                shared.add_step(f"run-{number}", step, first)
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=store, args=(number,)) for number in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert all(shared.get_snapshot(f"run-{number}", 4) == first for number in range(8))
+    leftovers = [name for _, _, names in os.walk(shared.directory) for name in names if name.endswith(".tmp")]
+    assert leftovers == []
+    print("\n✅ Snapshot archive test completed!")
+
+def test_orchestrator_archives_and_replays():
+    print("🧪 Testing archived runs replay offline...")
+    print("=" * 50)
+
+    pages = {"https://shop.test": '- button "Buy" [ref=e1]\n- link "Deals" [ref=e2]',
+             "https://shop.test/deals": '- text: "50% off"'}
+    links = {("https://shop.test", "e2"): "https://shop.test/deals"}
+    responses = [json.dumps({"action": "click", "ref": "e2"}),
+                 json.dumps({"action": "complete", "value": "found the deals"})]
+
+    archive = SnapshotArchive(tempfile.mkdtemp())
+    orchestrator = Orchestrator(browser=FakeBrowser(pages=pages, links=links),
+                                ai_client=AnthropicClient(backend=LocalBackend(responses=responses)))
+    orchestrator.settle_seconds = 0
+    orchestrator.archive = archive
+    assert orchestrator.execute_goal("Find the deals", start_url="https://shop.test") == "found the deals"
+
+    run_id = orchestrator.archive_run_id
+    assert archive.runs() == [run_id]
+    steps = archive.steps(run_id)
+    assert [(entry["step"], entry["url"], entry["ok"]) for entry in steps] == [
+        (1, "https://shop.test", True), (2, "https://shop.test/deals", True)]
+    assert archive.get_snapshot(run_id, 1) == pages["https://shop.test"]
+
+    # replay the run from the archive alone
+    replay = Orchestrator(browser=FakeBrowser(pages=archive.pages(run_id), links=links),
+                          ai_client=AnthropicClient(backend=LocalBackend(
+                              responses=[json.dumps(action) for action in archive.actions(run_id)])))
+    replay.settle_seconds = 0
+    assert replay.execute_goal(archive.header(run_id)["goal"], start_url=archive.header(run_id)["start_url"]) \
+        == "found the deals"
+
+    # an archive that can't be written (here: its directory is a file) doesn't end the goal
+    broken_dir = os.path.join(tempfile.mkdtemp(), "archive")
+    open(broken_dir, "w").close()
+    broken = Orchestrator(browser=FakeBrowser(pages=pages, links=links),
+                          ai_client=AnthropicClient(backend=LocalBackend(responses=responses)))
+    broken.settle_seconds = 0
+    broken.archive = SnapshotArchive(broken_dir)
+    assert broken.execute_goal("Find the deals", start_url="https://shop.test") == "found the deals"
+    print("\n✅ Archive replay test completed!")
+
+if __name__ == "__main__":
+    test_chunks_are_deduplicated()
+    test_orchestrator_archives_and_replays()
@@ -0,0 +1,115 @@
+from src.browser.branches import run_branch, pick_branch, can_speculate
+from src.ai.ai_client import AnthropicClient
+from src.ai.llm_backend import LocalBackend
+from src.orchestrator import Orchestrator
+from tests.fake_browser import FakeBrowser
+import json
+
+PAGES = {"https://shop.test": '- link "Help" [ref=e1]\n- link "Deals" [ref=e2]\n- button "Add to cart" [ref=e3]',
+         "https://shop.test/deals": '- heading "Deals" [ref=e1]\n- text: "Laptop 50% off"'}
+# "Help" opens a popup the snapshot doesn't show, only "Deals" goes anywhere
+LINKS = {("https://shop.test", "e2"): "https://shop.test/deals"}
+
+# the clones number their refs differently than the main tab
+CLONE_PAGES = {"https://shop.test": '- link "Deals" [ref=e7]\n- link "Help" [ref=e8]\n- button "Add to cart" [ref=e9]',
+               "https://shop.test/deals": PAGES["https://shop.test/deals"]}
+CLONE_LINKS = {("https://shop.test", "e7"): "https://shop.test/deals"}
+
+def make_clone():
+    clone = FakeBrowser(pages=CLONE_PAGES, links=CLONE_LINKS)
+    make_clone.opened.append(clone)
+    return clone
+
+def test_branches():
+    print("🧪 Testing speculative branches...")
+    print("=" * 50)
+
+    clone = FakeBrowser(pages=CLONE_PAGES, links=CLONE_LINKS)
+    storage = {"cookies": [{"name": "session", "value": "abc"}]}
+    element = {"ref": "e2", "role": "link", "name": "Deals"}
+    branch = run_branch(clone, "https://shop.test", storage, {"action": "click", "ref": "e2"}, element)
+    print(f"Branch: {branch['url']} changed={branch['changed']}")
+    # restored to the main tab's state first, then the ref is matched by role + name
+    assert clone.restored_storage == storage
+    assert ("click", "e7") in clone.calls
+    assert branch["ok"] and branch["changed"] and branch["url"] == "https://shop.test/deals"
+
+    nothing = run_branch(FakeBrowser(pages=CLONE_PAGES, links=CLONE_LINKS), "https://shop.test", None,
+                         {"action": "click", "ref": "e1"}, {"ref": "e1", "role": "link", "name": "Help"})
+    assert nothing["ok"] and not nothing["changed"]
+
+    # progress wins over no change and errors, goal words break ties, then the model's ranking
+    assert pick_branch([nothing, RuntimeError("crashed"), branch], "Find laptop deals") is branch
+    assert pick_branch([nothing], "Find laptop deals") is None
+
+    # only what is safe to run twice (in the clone, then on the main tab) is speculated on
+    assert can_speculate({"action": "click", "ref": "e2"}, element)
+    assert can_speculate({"action": "navigate", "value": "https://shop.test/deals"})
+    assert not can_speculate({"action": "click", "ref": "e3"}, {"ref": "e3", "role": "button", "name": "Add to cart"})
+    assert not can_speculate({"action": "click", "ref": "e5"}, None)
+    assert not can_speculate({"action": "fill", "ref": "e2", "value": "x"}, element)
+    print("\n✅ Speculative branch test completed!")
+
+def test_orchestrator_keeps_the_branch_that_moved():
+    print("🧪 Testing speculation in a goal...")
+    print("=" * 50)
+
+    make_clone.opened = []
+    responses = [json.dumps({"action": "click", "ref": "e1", "confidence": 0.4,
+                             "alternatives": [{"action": "click", "ref": "[ref=e2]"},
+                                              {"action": "fill", "ref": "e2", "value": "x"},
+                                              {"action": "click", "ref": "e3"},
+                                              {"action": "click", "ref": "e99"}]}),
+                 json.dumps({"action": "complete", "value": "Laptop 50% off"})]
+    browser = FakeBrowser(pages=PAGES, links=LINKS)
+    orchestrator = Orchestrator(browser=browser, ai_client=AnthropicClient(backend=LocalBackend(responses=responses)))
+    orchestrator.settle_seconds = 0
+    orchestrator.speculate = True
+    orchestrator.explorer_factory = make_clone
+    assert orchestrator.execute_goal("Find laptop deals", start_url="https://shop.test", run_id=None) == "Laptop 50% off"
+
+    # the model's pick (e1) went nowhere in its clone, so the main tab clicked the alternative instead
+    clicks = [call for call in browser.calls if call[0] == "click"]
+    print(f"Main tab clicks: {clicks}")
+    assert clicks == [("click", "e2")]
+    # fill can't run in a clone, the button would be pressed twice (clone + main tab) and e99 isn't on the page:
+    # two branches (a session is reused once it's free)
+    assert sorted(call for clone in make_clone.opened for call in clone.calls if call[0] == "click") == [
+        ("click", "e7"), ("click", "e8")]
+    assert all(clone.client.closed for clone in make_clone.opened)
+    assert orchestrator.speculated_steps == 1 and orchestrator.speculation_switches == 1
+    # the prompt asks for alternatives at the orchestrator's own threshold
+    prompt = orchestrator.prompt_builder.build("Find laptop deals", PAGES["https://shop.test"], "https://shop.test", 1,
+                                               alternatives_below=orchestrator.speculate_below)
+    assert 'confidence is below 0.6, also add "alternatives"' in prompt
+    assert "alternatives" not in orchestrator.prompt_builder.build("g", PAGES["https://shop.test"], "u", 1)
+
+    # sure of itself: no branches
+    make_clone.opened = []
+    responses = [json.dumps({"action": "click", "ref": "e2", "confidence": 0.9,
+                             "alternatives": [{"action": "click", "ref": "e1"}]}),
+                 json.dumps({"action": "complete", "value": "done"})]
+    orchestrator = Orchestrator(browser=FakeBrowser(pages=PAGES, links=LINKS),
+                                ai_client=AnthropicClient(backend=LocalBackend(responses=responses)))
+    orchestrator.settle_seconds = 0
+    orchestrator.speculate = True
+    orchestrator.explorer_factory = make_clone
+    assert orchestrator.execute_goal("Find laptop deals", start_url="https://shop.test", run_id=None) == "done"
+    assert make_clone.opened == [] and orchestrator.speculated_steps == 0
+
+    # unsure about a button: it isn't tried in clones, the main tab presses it once
+    responses = [json.dumps({"action": "click", "ref": "e3", "confidence": 0.3,
+                             "alternatives": [{"action": "click", "ref": "e2"}]}),
+                 json.dumps({"action": "complete", "value": "added"})]
+    browser = FakeBrowser(pages=PAGES, links=LINKS)
+    orchestrator = Orchestrator(browser=browser, ai_client=AnthropicClient(backend=LocalBackend(responses=responses)))
+    orchestrator.settle_seconds = 0
+    orchestrator.speculate = True
+    orchestrator.explorer_factory = make_clone
+    assert orchestrator.execute_goal("Add it to the cart", start_url="https://shop.test", run_id=None) == "added"
+    assert make_clone.opened == [] and [call for call in browser.calls if call[0] == "click"] == [("click", "e3")]
+    print("\n✅ Speculation goal test completed!")
+
+if __name__ == "__main__":
+    test_branches()
+    test_orchestrator_keeps_the_branch_that_moved()
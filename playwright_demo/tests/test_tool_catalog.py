@@ -0,0 +1,72 @@
+from src.mcp_client import SessionMCPClient
+from src.tool_catalog import ToolCatalog, compile_validator
+import os
+import sys
+import tempfile
+import time
+
+FAKE_SERVER = [sys.executable, os.path.join(os.path.dirname(__file__), "fake_mcp_server.py")]
+
+def make_client(catalog_dir):
+    client = SessionMCPClient(load_profile="full", catalog_dir=catalog_dir)
+    client.server_command = FAKE_SERVER
+    return client
+
+def test_compiled_validator():
+    print("🧪 Testing compiled argument validators...")
+    print("=" * 50)
+
+    validate = compile_validator({
+        "type": "object",
+        "properties": {
+            "key": {"type": "string"},
+            "delay": {"type": "number"},
+            "button": {"type": "string", "enum": ["left", "right"]},
+            "values": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["key"],
+        "additionalProperties": False,
+    })
+    assert validate({"key": "Enter"}) == []
+    assert validate({"key": "Enter", "delay": 1.5, "button": "left", "values": ["a"]}) == []
+    assert validate({}) == ["arguments.key is required"]
+    assert validate({"key": "Enter", "delay": True}) == ["arguments.delay should be number, got bool"]
+    assert validate({"key": "Enter", "button": "middle"})
+    assert validate({"key": "Enter", "values": [1]}) == ["arguments.values[] should be string, got int"]
+    assert validate({"key": "Enter", "text": "x"}) == ["arguments.text is not an allowed argument"]
+
+    # an empty catalog (no tools/list yet) accepts everything
+    assert ToolCatalog(tempfile.mkdtemp()).validate("anything", {"x": 1}) == []
+    print("\n✅ Validator test completed!")
+
+def test_catalog_cached_per_server_version():
+    print("🧪 Testing tool catalog cache and local call rejection...")
+    print("=" * 50)
+
+    catalog_dir = tempfile.mkdtemp()
+    client = make_client(catalog_dir)
+    assert client.complete_initialization()
+    assert "browser_navigate" in client.catalog
+    assert os.path.exists(os.path.join(catalog_dir, "tools-fake-mcp-1.0.0.json"))
+
+    # bad calls never reach the server
+    assert client.send_tool_call("browser_navigate", {"link": "https://example.com"})["error"]["invalid_arguments"]
+    assert client.send_tool_call("browser_teleport", {})["error"]["invalid_arguments"]
+    assert client.send_tool_call("browser_navigate", {"url": "https://example.com"})["result"]
+    time.sleep(0.2)
+    assert sum("tools/call" in line for line in client.stderr_tail) == 1
+    client.close()
+
+    # warm start: same server version, no tools/list round trip
+    client = make_client(catalog_dir)
+    assert client.complete_initialization()
+    assert "browser_snapshot" in client.catalog
+    client.send_tool_call("browser_snapshot")
+    time.sleep(0.2)
+    assert not any("tools/list" in line for line in client.stderr_tail)
+    client.close()
+    print("\n✅ Catalog cache test completed!")
+
+if __name__ == "__main__":
+    test_compiled_validator()
+    test_catalog_cached_per_server_version()
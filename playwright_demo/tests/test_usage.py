@@ -0,0 +1,128 @@
+from src.ai.usage import UsageTracker, GoalBudget, estimate_cost
+from src.ai.llm_backend import AnthropicBackend, XAIBackend, LocalBackend
+from src.ai.ai_client import AnthropicClient
+from src.ai.model_router import ModelRouter
+from src.ai.response_parser import ResponseParser
+from src.ai.prompt_builder import PromptBuilder
+from src.orchestrator import Orchestrator
+from tests.fake_browser import FakeBrowser
+from types import SimpleNamespace
+import json
+
+PAGES = {"https://shop.test": '- button "Buy" [ref=e1]\n- link "Deals" [ref=e2]'}
+CLICK = json.dumps({"action": "click", "ref": "e1", "confidence": 0.9})
+
+def test_usage_tracker_and_budget():
+    print("🧪 Testing usage accounting and budgets...")
+    print("=" * 50)
+
+    assert estimate_cost("claude-sonnet-4-20250514", input_tokens=1_000_000) == 3.0
+    tracker = UsageTracker()
+    mark = tracker.snapshot()
+    tracker.add("claude-sonnet-4-20250514", input_tokens=1000, output_tokens=100, cache_read_tokens=4000, seconds=1.5)
+    step = tracker.since(mark)
+    assert step["calls"] == 1 and step["cache_read_tokens"] == 4000
+    assert abs(step["cost"] - (1000 * 3 + 100 * 15 + 4000 * 0.3) / 1_000_000) < 1e-12
+
+    budget = GoalBudget(max_input_tokens=10000, max_seconds=60)
+    assert budget.check(tracker.snapshot(), elapsed_seconds=10) == ("ok", None)
+    assert budget.check(tracker.snapshot(), elapsed_seconds=50)[0] == "downgrade"
+    status, reason = budget.check(tracker.snapshot(), elapsed_seconds=61)
+    assert status == "stop" and "seconds" in reason
+    print("\n✅ Usage and budget test completed!")
+
+def test_anthropic_usage_is_recorded():
+    print("🧪 Testing Anthropic response.usage is kept...")
+    print("=" * 50)
+
+    response = SimpleNamespace(
+        content=[SimpleNamespace(text="{}")],
+        usage=SimpleNamespace(input_tokens=120, output_tokens=30, cache_read_input_tokens=900, cache_creation_input_tokens=None)
+    )
+    backend = AnthropicBackend.__new__(AnthropicBackend)
+    backend.model, backend.max_tokens, backend.usage = "claude-sonnet-4-20250514", 1024, UsageTracker()
+    backend.client = SimpleNamespace(messages=SimpleNamespace(create=lambda **kwargs: response))
+    assert backend.complete("hi") == "{}"
+    totals = backend.usage.snapshot()
+    assert (totals["input_tokens"], totals["output_tokens"], totals["cache_read_tokens"]) == (120, 30, 900)
+    print("\n✅ Anthropic usage test completed!")
+
+def test_xai_stream_usage_is_recorded():
+    print("🧪 Testing streamed xAI calls count against the budget...")
+    print("=" * 50)
+
+    def delta(text):
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))], usage=None)
+    chunks = [delta('{"action": '), delta('"complete"}'),
+              SimpleNamespace(choices=[], usage=SimpleNamespace(prompt_tokens=200, completion_tokens=12))]
+    requests = []
+    def create(**kwargs):
+        requests.append(kwargs)
+        return iter(chunks)
+
+    backend = XAIBackend.__new__(XAIBackend)
+    backend.model, backend.max_tokens, backend.usage = "grok-4-fast-reasoning", 150, UsageTracker()
+    backend.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    assert "".join(backend.stream("hi")) == '{"action": "complete"}'
+    assert requests[0]["stream_options"] == {"include_usage": True}
+    totals = backend.usage.snapshot()
+    assert (totals["calls"], totals["input_tokens"], totals["output_tokens"]) == (1, 200, 12)
+    print("\n✅ xAI stream usage test completed!")
+
+def test_orchestrator_stops_on_token_budget():
+    print("🧪 Testing the goal stops when its token budget is used up...")
+    print("=" * 50)
+
+    browser = FakeBrowser(pages=PAGES)
+    backend = LocalBackend(responses=[CLICK] * 20)
+    orchestrator = Orchestrator(browser=browser, ai_client=AnthropicClient(backend=backend))
+    orchestrator.settle_seconds = 0
+    orchestrator.max_steps = 7
+    # one prompt is a few hundred tokens, two steps use this up
+    orchestrator.budget.max_input_tokens = 1200
+
+    result = orchestrator.execute_goal("Buy it", start_url="https://shop.test")
+    assert result.startswith("Stopped after") and "input_tokens budget used up" in result
+    # a final answer for job workers, not an error to retry
+    assert orchestrator.goal_stopped and not orchestrator.goal_achieved
+    assert orchestrator.last_usage["steps"] < 7
+    assert orchestrator.last_usage["input_tokens"] >= 1200
+    print("\n✅ Budget stop test completed!")
+
+def test_downgrade_uses_small_model_only():
+    print("🧪 Testing the cheaper mode near the budget...")
+    print("=" * 50)
+
+    # every step counts as hard (max_easy_step=0), so without the downgrade the large model answers all of them
+    small = AnthropicClient(backend=LocalBackend(default_response=json.dumps({"action": "complete", "value": "small"})))
+    large = AnthropicClient(backend=LocalBackend(
+        responses=[json.dumps({"action": "click", "ref": "e2"})],
+        default_response=json.dumps({"action": "complete", "value": "large"})
+    ))
+    router = ModelRouter(small, large, ResponseParser(), max_easy_step=0)
+    browser = FakeBrowser(pages=dict(PAGES, **{"https://shop.test/deals": "- text"}),
+                          links={("https://shop.test", "e2"): "https://shop.test/deals"})
+    orchestrator = Orchestrator(browser=browser, ai_client=large, router=router)
+    orchestrator.settle_seconds = 0
+    orchestrator.budget.max_output_tokens = 10_000
+    orchestrator.budget.downgrade_at = 0.0001
+
+    assert orchestrator.execute_goal("Find the deals", start_url="https://shop.test") == "small"
+    assert router.stats["large_calls"] == 1
+    assert router.stats["small_calls"] == 1
+    print("\n✅ Downgrade test completed!")
+
+def test_prompt_uses_configured_max_steps():
+    print("🧪 Testing the prompt shows the configured step budget...")
+    print("=" * 50)
+
+    assert "Step: 3 of 7" in PromptBuilder().build("goal", "- text", "https://a.com", 3, max_steps=7)
+    print("\n✅ Prompt step budget test completed!")
+
+if __name__ == "__main__":
+    test_usage_tracker_and_budget()
+    test_anthropic_usage_is_recorded()
+    test_xai_stream_usage_is_recorded()
+    test_orchestrator_stops_on_token_budget()
+    test_downgrade_uses_small_model_only()
+    test_prompt_uses_configured_max_steps()
@@ -0,0 +1,103 @@
+from src.utils.snapshot_parser import SnapshotParser
+from src.ai.ai_client import AnthropicClient
+from src.ai.llm_backend import LocalBackend
+from src.orchestrator import Orchestrator
+from tests.fake_browser import FakeBrowser
+import json
+
+# a results page whose snapshot is mostly text the agent can't act on
+HUGE_PAGE = "\n".join(
+    [f'- paragraph "{"lorem ipsum " * 40}"' for _ in range(200)]
+    + ['- heading "Results" [ref=e1]', '- link "Next page" [ref=e2]', '- button "Buy now" [ref=e3] [cursor=pointer]']
+)
+
+class VisionBackend(LocalBackend):
+    """LocalBackend that remembers which prompts came with an image"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.image_prompts = []
+
+    def complete_with_image(self, prompt, image_base64, media_type="image/jpeg", max_tokens=None):
+        self.image_prompts.append((prompt, image_base64, media_type))
+        return self.complete(prompt, max_tokens=max_tokens)
+
+def make_orchestrator(browser, backend):
+    orchestrator = Orchestrator(browser=browser, ai_client=AnthropicClient(backend=backend))
+    orchestrator.settle_seconds = 0
+    orchestrator.visual_fallback = True
+    orchestrator.visual_snapshot_chars = 5000
+    return orchestrator
+
+def test_prune_snapshot():
+    print("🧪 Testing snapshot pruning...")
+    print("=" * 50)
+
+    pruned = SnapshotParser().prune_snapshot(HUGE_PAGE, max_chars=40)
+    assert pruned.splitlines() == ['- heading "Results" [ref=e1]', "- ... (2 more elements omitted)"]
+    assert "lorem" not in SnapshotParser().prune_snapshot(HUGE_PAGE)
+    print("\n✅ Pruning test completed!")
+
+def test_huge_snapshot_uses_screenshot():
+    print("🧪 Testing visual fallback on a huge snapshot...")
+    print("=" * 50)
+
+    browser = FakeBrowser(pages={"https://shop.test": HUGE_PAGE})
+    browser.screenshot = ("aW1hZ2U=", "image/jpeg")
+    backend = VisionBackend(responses=[json.dumps({"action": "complete", "value": "Buy now is at e3"})])
+    orchestrator = make_orchestrator(browser, backend)
+
+    assert orchestrator.execute_goal("Buy the item", start_url="https://shop.test") == "Buy now is at e3"
+    prompt, image, media_type = backend.image_prompts[0]
+    assert image == "aW1hZ2U=" and media_type == "image/jpeg"
+    assert "screenshot of the current page is attached" in prompt
+    # the pruned snapshot went instead of the full one
+    assert "[ref=e3]" in prompt and "lorem" not in prompt
+    assert orchestrator.router.stats["visual_calls"] == 1
+    print("\n✅ Huge snapshot test completed!")
+
+def test_visual_retry_budget():
+    print("🧪 Testing the visual fallback retry budget...")
+    print("=" * 50)
+
+    # snapshot keeps failing and there's no screenshot either
+    browser = FakeBrowser(pages={"https://shop.test": None})
+    backend = VisionBackend()
+    orchestrator = make_orchestrator(browser, backend)
+    orchestrator.max_steps = 5
+    orchestrator.max_visual_steps = 2
+
+    result = orchestrator.execute_goal("Buy the item", start_url="https://shop.test")
+    assert result == "Did not complete goal within 5 steps"
+    # two fallback attempts, then plain snapshot retries - no LLM calls on a page we can't see
+    assert browser.calls.count(("screenshot",)) == 2
+    assert backend.calls == 0
+    print("\n✅ Retry budget test completed!")
+
+def test_visual_reask_without_screenshot():
+    print("🧪 Testing a visual re-ask that gets no screenshot...")
+    print("=" * 50)
+
+    class FlakyScreenshots(FakeBrowser):
+        # two screenshots, then the page can't be captured anymore
+        def take_screenshot(self):
+            self.calls.append(("screenshot",))
+            return ("aW1hZ2U=", "image/jpeg") if self.calls.count(("screenshot",)) <= 2 else None
+
+    # the snapshot fails, the model repeats its click, and the re-ask after the loop warning has nothing to look at
+    browser = FlakyScreenshots(pages={"https://shop.test": None})
+    backend = VisionBackend(default_response=json.dumps({"action": "click", "ref": "e9"}))
+    orchestrator = make_orchestrator(browser, backend)
+    orchestrator.max_steps = 3
+    orchestrator.max_visual_steps = 2
+
+    result = orchestrator.execute_goal("Buy the item", start_url="https://shop.test")
+    assert result == "Did not complete goal within 3 steps"
+    assert backend.calls == 2 and browser.calls.count(("click", "e9")) == 1
+    print("\n✅ Visual re-ask test completed!")
+
+if __name__ == "__main__":
+    test_prune_snapshot()
+    test_huge_snapshot_uses_screenshot()
+    test_visual_retry_budget()
+    test_visual_reask_without_screenshot()
@@ -0,0 +1,126 @@
+from src.jobs.warm_runner import WarmRunner
+from src.jobs.job_queue import JobQueue
+from src.jobs.worker import JobWorker
+import os
+import sys
+import tempfile
+import time
+import subprocess
+
+PROJECT_DIR = os.path.join(os.path.dirname(__file__), "..")
+
+class ForkedOrchestrator:
+    """Answers with the pid it ran in, fails goals that say "fail" and kills its process on "crash" """
+
+    def __init__(self):
+        self.goal_achieved = False
+        self.goal_stopped = False
+
+    def execute_goal(self, goal, start_url="https://google.com", run_id=None):
+        if "crash" in goal:
+            os._exit(3)
+        if goal.startswith("hang"):
+            # like a stuck goal with its MCP server still running: start a "server", report its pid, never return
+            server = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+            with open(goal.split(" ", 1)[1], "w") as f:
+                f.write(str(server.pid))
+            time.sleep(60)
+        self.goal_achieved = "fail" not in goal
+        self.goal_stopped = not self.goal_achieved
+        return f"{goal} in {os.getpid()} ({run_id})"
+
+def forked_orchestrator_factory():
+    return ForkedOrchestrator()
+
+def test_goals_run_in_forked_processes():
+    print("🧪 Testing goals in warm forked processes...")
+    print("=" * 50)
+
+    runner = WarmRunner(forked_orchestrator_factory, preload=["src.orchestrator"])
+    seconds = runner.warm_up()
+    print(f"Goal process start ({runner.start_method}): {seconds * 1000:.1f}ms")
+
+    result, succeeded, stopped = runner.run_goal("find laptops", run_id="job-1")
+    assert succeeded and not stopped and result.startswith("find laptops in ") and result.endswith("(job-1)")
+    # the goal ran in a child, not in this process
+    assert f" {os.getpid()} " not in result
+
+    # ran out of steps: a final answer, not something to retry
+    result, succeeded, stopped = runner.run_goal("fail please")
+    assert not succeeded and stopped and result.startswith("fail please")
+
+    # a dead goal process is reported, the runner keeps working
+    result, succeeded, stopped = runner.run_goal("crash now")
+    assert not succeeded and not stopped and result == "Worker error: goal process exited with code 3"
+    assert runner.run_goal("next goal")[1]
+    print("\n✅ Warm runner test completed!")
+
+def is_running(pid):
+    """True while pid runs (a killed process nobody reaped yet counts as gone)"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] not in ("Z", "X")
+    except FileNotFoundError:
+        return False
+
+def test_timed_out_goal_takes_its_server_down():
+    print("🧪 Testing a goal timeout stops the goal's server too...")
+    print("=" * 50)
+
+    if not os.path.isdir("/proc") or not hasattr(os, "killpg"):
+        print("⏭️ Needs process groups and /proc, skipped")
+        return
+    runner = WarmRunner(forked_orchestrator_factory, preload=["src.orchestrator"], goal_timeout=1, kill_grace=1)
+    pid_file = os.path.join(tempfile.mkdtemp(), "server.pid")
+    start = time.time()
+    result, succeeded, stopped = runner.run_goal(f"hang {pid_file}")
+    print(f"{result} ({time.time() - start:.1f}s)")
+    assert not succeeded and result == "Worker error: goal timed out after 1s"
+    with open(pid_file) as f:
+        server_pid = int(f.read())
+    # the server the goal started went down with it instead of living on without a parent
+    for _ in range(50):
+        if not is_running(server_pid):
+            break
+        time.sleep(0.1)
+    assert not is_running(server_pid)
+    # and the runner still works
+    assert runner.run_goal("next goal")[1]
+    print("\n✅ Goal timeout test completed!")
+
+def test_worker_forks_per_goal():
+    print("🧪 Testing a worker with fork_per_goal...")
+    print("=" * 50)
+
+    queue = JobQueue(os.path.join(tempfile.mkdtemp(), "jobs.sqlite3"))
+    done = queue.submit("goal one")
+    failed = queue.submit("crash the goal", max_attempts=1)
+
+    worker = JobWorker(queue, orchestrator_factory=forked_orchestrator_factory, fork_per_goal=True)
+    assert worker.run_once()["status"] == "done"
+    assert worker.run_once()["status"] == "failed"
+    assert worker.run_once() is None
+
+    assert queue.get(done)["result"].endswith(f"(job-{done})")
+    assert "exited with code 3" in queue.get(failed)["error"]
+    print("\n✅ Forking worker test completed!")
+
+def test_imports_are_lazy():
+    print("🧪 Testing heavy modules are not loaded on import...")
+    print("=" * 50)
+
+    # fresh interpreter, this one already has everything imported
+    script = ("import sys, src.orchestrator, src.jobs.job_queue; "
+              "print(sorted(m for m in ('dotenv', 'anthropic', 'src.mcp_client', 'concurrent.futures') "
+              "if m in sys.modules))")
+    output = subprocess.run([sys.executable, "-c", script], cwd=PROJECT_DIR, capture_output=True, text=True,
+                            check=True).stdout
+    print(f"Loaded: {output.strip()}")
+    assert output.strip() == "[]"
+    print("\n✅ Lazy import test completed!")
+
+if __name__ == "__main__":
+    test_goals_run_in_forked_processes()
+    test_timed_out_goal_takes_its_server_down()
+    test_worker_forks_per_goal()
+    test_imports_are_lazy()